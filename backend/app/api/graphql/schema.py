@@ -4,75 +4,62 @@ GraphQL schema for metrics and statistics including epistemic drift analysis
 import strawberry
 from typing import Optional, List
 from sqlalchemy import text
-import boto3
-from botocore.exceptions import ClientError
 import logging
 
 from app.core.database import LocalSessionLocal
 from app.core.config import settings
 from app.models.document import Document, DocumentChunk, DriftAnalysis
 from app.services.drift_analyzer import DriftAnalyzer
+from app.services.s3_inventory import s3_inventory_cache
 
 logger = logging.getLogger(__name__)
 drift_analyzer = DriftAnalyzer()
 
 
 def get_s3_stats() -> 'S3Stats':
-    """Query Digital Ocean Spaces for asset counts"""
-    try:
-        if not settings.S3_ENDPOINT or not settings.S3_ACCESS_KEY:
-            return S3Stats(
-                total_assets=0,
-                total_size_bytes=0,
-                total_size_mb=0.0,
-                configured=False
-            )
-        
-        s3_client = boto3.client(
-            's3',
-            endpoint_url=settings.S3_ENDPOINT,
-            aws_access_key_id=settings.S3_ACCESS_KEY,
-            aws_secret_access_key=settings.S3_SECRET_KEY,
-            region_name='nyc3'
-        )
-        
-        # Count objects in bucket
-        paginator = s3_client.get_paginator('list_objects_v2')
-        pages = paginator.paginate(Bucket=settings.S3_BUCKET)
-        
-        total_assets = 0
-        total_size = 0
-        
-        for page in pages:
-            if 'Contents' in page:
-                total_assets += len(page['Contents'])
-                total_size += sum(obj['Size'] for obj in page['Contents'])
-        
-        return S3Stats(
-            total_assets=total_assets,
-            total_size_bytes=total_size,
-            total_size_mb=round(total_size / (1024 * 1024), 2),
-            configured=True
-        )
-        
-    except ClientError as e:
-        logger.error(f"S3 error: {e}")
+    """
+    Digital Ocean Spaces asset counts from the cached S3 inventory
+    
+    Never lists the bucket inline: stale summaries are refreshed in the
+    background and the last known values are returned immediately.
+    """
+    if not settings.S3_ENDPOINT or not settings.S3_ACCESS_KEY:
         return S3Stats(
             total_assets=0,
             total_size_bytes=0,
             total_size_mb=0.0,
-            configured=True,
-            error=str(e)
+            configured=False,
+            images=0,
+            pdfs=0,
+            tiffs=0
         )
-    except Exception as e:
-        logger.error(f"Unexpected S3 error: {e}")
+    
+    summary = s3_inventory_cache.get_summary()
+    
+    if summary is None:
+        # First inventory is still being built in the background
         return S3Stats(
             total_assets=0,
             total_size_bytes=0,
             total_size_mb=0.0,
-            configured=False,
-            error=str(e)
+            configured=True,
+            images=0,
+            pdfs=0,
+            tiffs=0,
+            error=s3_inventory_cache.last_error
         )
+    
+    return S3Stats(
+        total_assets=summary['total_assets'],
+        total_size_bytes=summary['total_size_bytes'],
+        total_size_mb=round(summary['total_size_bytes'] / (1024 * 1024), 2),
+        configured=True,
+        images=summary['images'],
+        pdfs=summary['pdfs'],
+        tiffs=summary['tiffs'],
+        error=s3_inventory_cache.last_error,
+        refreshed_at=summary['refreshed_at'].isoformat()
+    )
 
 
 @strawberry.type
@@ -102,6 +89,7 @@ class S3Stats:
     pdfs: int
     tiffs: int
     error: Optional[str] = None
+    refreshed_at: Optional[str] = None  # When the cached inventory was taken
 
 
 @strawberry.type
@@ -0,0 +1,42 @@
+"""
+Admin API endpoints for in-process model residency
+"""
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any
+import asyncio
+import logging
+
+from app.services.model_residency import get_residency_manager
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/models")
+async def get_model_residency() -> Dict[str, Any]:
+    """
+    Get resident models with their memory use and idle time.
+    
+    Returns:
+        Process RSS, available system memory, watermarks and per-model
+        residency (loaded, idle seconds, active requests, RSS added by load)
+    """
+    return get_residency_manager().status()
+
+
+@router.post("/models/{name}/unload")
+async def unload_model(name: str) -> Dict[str, Any]:
+    """
+    Unload a resident model now to free its memory.
+    
+    Models serving a request are left alone; they unload once idle.
+    
+    Args:
+        name: Model name as listed by GET /models (e.g. granite)
+    """
+    residency = get_residency_manager()
+    if name not in {m["name"] for m in residency.status()["models"]}:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {name}")
+    
+    unloaded = await asyncio.to_thread(residency.unload, name, "admin request")
+    return {"model": name, "unloaded": unloaded, **residency.status()}
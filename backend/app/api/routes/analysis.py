@@ -2,13 +2,23 @@
 API route for Granite LLM analysis
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import asyncio
+import json
 import logging
+import threading
 
-from app.services.granite_service import get_granite_service
+from app.services.granite_service import (
+    GraniteService,
+    STATE_FAILED,
+    STATE_LOADING,
+    STATE_UNLOADED,
+    get_granite_service,
+)
 # from app.services.embedding_service import search_similar_chunks  # TODO: implement when embedding service ready
 
 router = APIRouter()
@@ -21,6 +31,8 @@ class AnalysisRequest(BaseModel):
     num_context_chunks: int = Field(5, ge=1, le=20, description="Number of context chunks to retrieve")
     max_tokens: Optional[int] = Field(None, ge=50, le=2048, description="Maximum tokens to generate")
     temperature: Optional[float] = Field(None, ge=0.0, le=2.0, description="Sampling temperature")
+    seed: Optional[int] = Field(None, ge=0, description="Sampling seed; seeded requests are reproducible and cached")
+    use_cache: bool = Field(True, description="Allow answers from the exact and semantic caches")
 
 
 class AnalysisResponse(BaseModel):
@@ -32,6 +44,13 @@ class AnalysisResponse(BaseModel):
     model: str
     timestamp: str
     context_chunks: List[Dict[str, Any]]
+    generated_tokens: Optional[int] = None
+    batch_size: Optional[int] = None
+    queue_wait_seconds: Optional[float] = None
+    cache: Optional[Dict[str, Any]] = None
+    inference_id: Optional[str] = None
+    context_packing: Optional[Dict[str, Any]] = None
+    speculative: Optional[Dict[str, Any]] = None
 
 
 class ModelInfoResponse(BaseModel):
@@ -39,9 +58,70 @@ class ModelInfoResponse(BaseModel):
     model_name: str
     device: str
     loaded: bool
+    state: Optional[str] = None
     max_tokens: int
     temperature: float
     quantized: str
+    prefix_cache_enabled: Optional[bool] = None
+    prefix_cache_tokens: Optional[int] = None
+    memory: Optional[Dict[str, Optional[int]]] = None
+    speculative: Optional[Dict[str, Any]] = None
+    tokens_per_second: Optional[float] = None
+    recent_tokens_per_second: Optional[float] = None
+
+
+def require_ready(granite: GraniteService):
+    """
+    Fail fast with 503 unless the model is ready.
+    
+    While weights are loading the response carries Retry-After, so clients
+    back off instead of holding connections open for minutes.
+    """
+    if granite.ready:
+        return
+    
+    if granite.state == STATE_UNLOADED and granite.evicted:
+        # Unloaded for idleness or memory: bring it back in the background
+        granite.start_loading()
+    
+    status = granite.load_status()
+    if status["state"] == STATE_LOADING:
+        raise HTTPException(
+            status_code=503,
+            detail={"message": "Granite model is loading. Retry shortly.", **status},
+            headers={"Retry-After": str(granite.retry_after_seconds())}
+        )
+    if status["state"] == STATE_FAILED:
+        message = "Granite model failed to load. Check logs, then POST /api/granite/load-model."
+    else:
+        message = "Granite model not loaded. POST /api/granite/load-model to load it."
+    raise HTTPException(status_code=503, detail={"message": message, **status})
+
+
+def retrieve_context_chunks(request: AnalysisRequest) -> List[Dict[str, Any]]:
+    """Retrieve context chunks for a query (mock until semantic search is wired in)"""
+    # TODO: Implement actual semantic search when embedding service is ready
+    # For now, return mock context chunks
+    logger.info(f"Retrieving {request.num_context_chunks} context chunks for query...")
+    
+    # Mock context chunks (replace with actual retrieval)
+    return [
+        {
+            "id": 1,
+            "text": "Design methods in the 1960s focused on systematic approaches to problem-solving, emphasizing rationality and scientific rigor.",
+            "citation": "Jones, J.C. (1970). Design Methods. John Wiley & Sons, p. 47."
+        },
+        {
+            "id": 2,
+            "text": "By the mid-1970s, there was a shift towards participatory design and user-centered approaches, challenging earlier technocratic assumptions.",
+            "citation": "Alexander, C. (1977). A Pattern Language. Oxford University Press, p. 203."
+        }
+    ]
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
 
 @router.post("/analyze", response_model=AnalysisResponse)
@@ -63,52 +143,93 @@ async def analyze_query(request: AnalysisRequest):
     """
     try:
         granite = get_granite_service()
+        require_ready(granite)
         
-        if not granite.model:
-            raise HTTPException(
-                status_code=503,
-                detail="Granite model not loaded. Please wait for initialization or check logs."
-            )
-        
-        # TODO: Implement actual semantic search when embedding service is ready
-        # For now, return mock context chunks
-        logger.info(f"Retrieving {request.num_context_chunks} context chunks for query...")
-        
-        # Mock context chunks (replace with actual retrieval)
-        context_chunks = [
-            {
-                "id": 1,
-                "text": "Design methods in the 1960s focused on systematic approaches to problem-solving, emphasizing rationality and scientific rigor.",
-                "citation": "Jones, J.C. (1970). Design Methods. John Wiley & Sons, p. 47."
-            },
-            {
-                "id": 2,
-                "text": "By the mid-1970s, there was a shift towards participatory design and user-centered approaches, challenging earlier technocratic assumptions.",
-                "citation": "Alexander, C. (1977). A Pattern Language. Oxford University Press, p. 203."
-            }
-        ]
+        context_chunks = retrieve_context_chunks(request)
         
         # Generate analysis
         logger.info("Generating Granite analysis...")
-        result = granite.generate_analysis(
+        result = await granite.generate_analysis_async(
             query=request.query,
             context_chunks=context_chunks,
             max_tokens=request.max_tokens,
-            temperature=request.temperature
+            temperature=request.temperature,
+            seed=request.seed,
+            use_cache=request.use_cache
         )
         
-        # Add context chunks to response
-        result["context_chunks"] = context_chunks
+        # Add the context chunks that made it into the prompt (ranked prefix)
+        result["context_chunks"] = context_chunks[:result["num_context_chunks"]]
         
         logger.info(f"✓ Analysis complete: {len(result['analysis'])} characters")
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Analysis failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/analyze/stream")
+async def analyze_query_stream(request: AnalysisRequest, http_request: Request):
+    """
+    Streaming variant of /analyze using Server-Sent Events.
+    
+    Emits `token` events ({"text": ...}) as Granite produces them, then one
+    `done` event with the context chunks (citations) and timing metadata,
+    including time to first token. An `error` event replaces `done` if
+    generation fails. Generation stops when the client disconnects.
+    
+    Args:
+        request: Analysis request with query and parameters
+        
+    Returns:
+        text/event-stream response
+    """
+    granite = get_granite_service()
+    require_ready(granite)
+    
+    context_chunks = retrieve_context_chunks(request)
+    cancel = threading.Event()
+    
+    async def events():
+        frames = granite.stream_analysis(
+            query=request.query,
+            context_chunks=context_chunks,
+            max_tokens=request.max_tokens,
+            temperature=request.temperature,
+            seed=request.seed,
+            use_cache=request.use_cache,
+            cancel=cancel
+        )
+        try:
+            async for frame in frames:
+                if await http_request.is_disconnected():
+                    logger.info("Client disconnected; stopping Granite generation")
+                    break
+                
+                if frame["type"] == "token":
+                    yield sse_event("token", {"text": frame["text"]})
+                else:
+                    frame.pop("type")
+                    frame["context_chunks"] = context_chunks[:frame["num_context_chunks"]]
+                    yield sse_event("done", frame)
+        except Exception as e:
+            logger.error(f"Streaming analysis failed: {str(e)}")
+            yield sse_event("error", {"detail": str(e)})
+        finally:
+            cancel.set()
+            await frames.aclose()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/model-info", response_model=ModelInfoResponse)
 async def get_model_info():
     """
@@ -121,17 +242,63 @@ async def get_model_info():
     return granite.get_model_info()
 
 
+@router.get("/queue")
+async def get_queue_stats():
+    """
+    Get batching scheduler statistics for Granite inference.
+    
+    Returns:
+        Queue depth, batch sizes and generation throughput (tokens/s)
+    """
+    granite = get_granite_service()
+    return granite.scheduler.stats()
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    Get Granite answer cache statistics.
+    
+    Returns:
+        Exact response cache (entries, size, hits/misses) and semantic cache
+        (threshold, hits/misses) figures since startup
+    """
+    granite = get_granite_service()
+    return {
+        "exact": await asyncio.to_thread(granite.response_cache.stats),
+        "semantic": granite.semantic_cache.stats()
+    }
+
+
+@router.post("/load-model", status_code=202)
+async def load_model():
+    """
+    Start loading the Granite model in the background.
+    
+    Returns immediately; poll /health until state is ready.
+    
+    Returns:
+        Whether a new load was started, plus the current load status
+    """
+    granite = get_granite_service()
+    started = granite.start_loading()
+    return {"started": started, **granite.load_status()}
+
+
 @router.get("/health")
 async def health_check():
     """
     Health check endpoint for Granite service.
     
     Returns:
-        Service status
+        Service status with the model lifecycle state (unloaded, loading,
+        ready, failed), loading stage and progress
     """
     granite = get_granite_service()
+    status = granite.load_status()
     return {
-        "status": "healthy" if granite.model else "initializing",
-        "model_loaded": granite.model is not None,
+        "status": {"ready": "healthy", "loading": "initializing"}.get(status["state"], "unavailable"),
+        "model_loaded": granite.ready,
+        **status,
         "timestamp": datetime.now().isoformat()
     }
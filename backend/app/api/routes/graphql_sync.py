@@ -2,17 +2,24 @@
 GraphQL sync endpoints - Import authority records with media from DDR Archive
 """
 import logging
-from fastapi import APIRouter, HTTPException
+import tempfile
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from pydantic import BaseModel
 
 from app.services.graphql_sync import GraphQLSyncService
+from app.services.sync_scheduler import SyncJobBusyError
+from app.api.routes.sync import sync_scheduler, busy_response
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 sync_service = GraphQLSyncService()
 
+# Request bodies larger than this are spooled to a temp file while streaming
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
 
 class SyncRequest(BaseModel):
     """GraphQL sync request payload"""
@@ -24,8 +31,12 @@ class SyncStats(BaseModel):
     total_items: int
     training_eligible: int
     synced: int
+    new: int = 0
+    updated: int = 0
+    unchanged: int = 0
     skipped: int
     errors: int
+    graphql_errors: int = 0
     dry_run: bool
 
 
@@ -74,6 +85,82 @@ async def sync_from_graphql(
         )
 
 
+@router.post("/sync/graphql/stream", response_model=SyncStats)
+async def stream_sync_from_graphql(
+    request: Request,
+    dry_run: bool = True
+):
+    """
+    Bulk sync training corpus from a raw GraphQL response body
+    
+    Unlike /sync/graphql, the body is the DDR GraphQL response itself (not
+    wrapped in graphql_response). It is spooled to disk as it arrives and
+    parsed incrementally, so large records_v1 payloads never sit in memory.
+    
+    Args:
+        dry_run: If True, don't actually insert to database (default: True for safety)
+    
+    Returns:
+        Sync statistics
+    """
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as body:
+            async for chunk in request.stream():
+                body.write(chunk)
+            body.seek(0)
+            
+            result = await run_in_threadpool(
+                sync_service.stream_sync_from_graphql,
+                body,
+                dry_run=dry_run
+            )
+        
+        return SyncStats(**result)
+        
+    except Exception as e:
+        logger.error(f"Streaming GraphQL sync failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"GraphQL sync failed: {str(e)}"
+        )
+
+
+@router.post("/sync/graphql/pull", response_model=SyncStats)
+async def pull_sync_from_graphql(dry_run: bool = True):
+    """
+    Fetch records_v1 from DDR Archive page by page and sync as pages arrive
+    
+    Pages are fetched concurrently with per-page retry, so one slow or failed
+    page does not stall or restart the whole sync. Real (non dry-run) syncs go
+    through the sync scheduler: a second trigger while one is running joins
+    it, and a sync running in another process returns 409.
+    
+    Args:
+        dry_run: If True, don't actually insert to database (default: True for safety)
+    
+    Returns:
+        Sync statistics
+    """
+    try:
+        if dry_run:
+            result = await sync_service.pull_sync_from_ddr(dry_run=True)
+        else:
+            run = await sync_scheduler.trigger('graphql', triggered_by='api')
+            if run['error']:
+                raise RuntimeError(run['error'])
+            result = run['result']
+        return SyncStats(**result)
+        
+    except SyncJobBusyError as e:
+        raise busy_response(e)
+    except Exception as e:
+        logger.error(f"Paginated GraphQL sync failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"GraphQL sync failed: {str(e)}"
+        )
+
+
 @router.post("/sync/validate", response_model=ValidationReport)
 async def validate_graphql_sync(graphql_response: dict):
     """
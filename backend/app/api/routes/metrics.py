@@ -9,6 +9,7 @@ from typing import Dict, Any
 import logging
 
 from app.core.database import get_local_db
+from app.services.ddr_client import get_ddr_metrics
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -65,3 +66,9 @@ async def health_check(db: Session = Depends(get_local_db)) -> Dict[str, str]:
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return {"status": "unhealthy", "error": str(e)}
+
+
+@router.get("/ddr")
+async def get_ddr_client_metrics() -> Dict[str, Any]:
+    """Per-query DDR GraphQL latency metrics and circuit breaker state"""
+    return get_ddr_metrics()
@@ -2,15 +2,18 @@
 Sync endpoints - trigger document sync from various sources
 Includes GraphQL DDR Archive sync and S3 Spaces sync
 """
+import asyncio
 import logging
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Header, Depends
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from sqlalchemy.orm import Session
 
 from app.services.s3_sync import S3SyncService
 from app.services.graphql_sync import GraphQLSyncService
 from app.services.pid_media_count import PIDMediaCountService
+from app.services.sync_scheduler import SyncScheduler, SyncJobBusyError, register_default_jobs
+from app.core.config import settings
 from app.core.database import get_local_db
 
 logger = logging.getLogger(__name__)
@@ -20,37 +23,152 @@ s3_sync_service = S3SyncService()
 graphql_sync_service = GraphQLSyncService()
 pid_media_service = PIDMediaCountService()
 
+# One run per sync type across workers and cron (Postgres advisory locks)
+sync_scheduler = SyncScheduler(poll_seconds=settings.SYNC_SCHEDULER_POLL_SECONDS)
+register_default_jobs(sync_scheduler, graphql_sync_service, pid_media_service, s3_sync_service)
 
-@router.post("/s3/trigger")
+
+def busy_response(e: SyncJobBusyError) -> HTTPException:
+    """409 for a job that another process is already running"""
+    return HTTPException(
+        status_code=409,
+        detail={'message': str(e), 'job': e.job, 'running': e.running}
+    )
+
+
+async def start_s3_run(triggered_by: str, **options) -> str:
+    """
+    Start an S3 sync through the scheduler and return its job id once it holds the lock
+    
+    If an S3 sync is already running in this process the trigger joins it and
+    that run's job id is returned. Coalescing is per process: a run held by
+    another worker raises SyncJobBusyError instead.
+    
+    Raises:
+        SyncJobBusyError: Another process is running an S3 sync
+    """
+    job_started = asyncio.get_running_loop().create_future()
+    task, coalesced = sync_scheduler.submit('s3', triggered_by=triggered_by, on_job=job_started.set_result, **options)
+    if coalesced:
+        # on_job belongs to the trigger that started the joined run; wait for its job instead
+        job_started = asyncio.ensure_future(s3_sync_service.wait_for_active_job())
+    
+    try:
+        await asyncio.wait({task, job_started}, return_when=asyncio.FIRST_COMPLETED)
+        if job_started.done():
+            return job_started.result()
+    finally:
+        if coalesced:
+            job_started.cancel()
+    
+    run = task.result()  # re-raises SyncJobBusyError
+    if coalesced and run['result'] is not None:
+        return run['result']['job_id']
+    raise RuntimeError(run['error'] or 'S3 sync run ended before starting a job')
+
+
+async def resume_interrupted_s3_jobs():
+    """Resume S3 jobs a previous process left unfinished, one at a time under the S3 sync lock"""
+    for job_id in await asyncio.to_thread(s3_sync_service.get_interrupted_job_ids):
+        try:
+            logger.info(f"Resuming interrupted S3 sync job {job_id}")
+            await sync_scheduler.trigger('s3', triggered_by='startup', job_id=job_id)
+        except SyncJobBusyError as e:
+            logger.info(f"Not resuming S3 sync jobs now: {e}")
+            return
+        except Exception as e:
+            logger.error(f"Resuming S3 sync job {job_id} failed: {e}")
+
+
+def s3_job_response(job_id: str, status: str = 'accepted') -> Dict:
+    return {
+        'status': status,
+        'job_id': job_id,
+        'poll_url': f"/api/sync/s3/jobs/{job_id}"
+    }
+
+
+@router.post("/s3/trigger", status_code=202)
 async def trigger_s3_sync(max_docs: Optional[int] = None):
     """
     Trigger S3 sync to pull PDFs from DigitalOcean Spaces
     
+    The sync runs as a persisted, checkpointed job under the sync scheduler's
+    S3 lock. This endpoint returns the job id as soon as the run has started;
+    poll /s3/jobs/{job_id} for progress. A trigger while this worker is
+    already running an S3 sync joins that run and returns its job id;
+    coalescing is per process, so if another worker or process holds the
+    S3 lock the response is 409.
+    
     Args:
         max_docs: Maximum number of documents to process (None = all)
     
     Returns:
-        Sync operation summary
+        Job id and polling URL
     """
+    if not s3_sync_service.s3_client:
+        raise HTTPException(status_code=500, detail='S3 not configured')
+    
     try:
-        logger.info(f"Triggering S3 sync (max_docs={max_docs})...")
-        
-        result = await s3_sync_service.sync_from_s3(max_docs=max_docs)
+        logger.info(f"Triggering S3 sync job (max_docs={max_docs})...")
         
-        if 'error' in result:
-            raise HTTPException(status_code=500, detail=result['error'])
-        
-        return {
-            'status': 'success',
-            'message': f"Processed {result['processed']} documents",
-            'details': result
-        }
+        job_id = await start_s3_run('api', max_docs=max_docs)
+        return s3_job_response(job_id)
         
+    except SyncJobBusyError as e:
+        raise busy_response(e)
     except Exception as e:
-        logger.error(f"Error during S3 sync: {e}")
+        logger.error(f"Error starting S3 sync job: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/s3/jobs/{job_id}")
+async def get_s3_sync_job(job_id: str):
+    """
+    Get progress of an S3 sync job
+    
+    Returns:
+        Job status with total/completed/failed object counts
+    """
+    job = s3_sync_service.get_sync_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"S3 sync job {job_id} not found")
+    return job
+
+
+@router.post("/s3/jobs/{job_id}/resume", status_code=202)
+async def resume_s3_sync_job(job_id: str):
+    """
+    Resume an interrupted or partially failed S3 sync job
+    
+    Objects already completed by the job are skipped; failed ones are retried.
+    Only one S3 sync runs at a time: while another job is running the
+    response is 409.
+    """
+    job = s3_sync_service.get_sync_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"S3 sync job {job_id} not found")
+    
+    if job['active']:
+        return s3_job_response(job_id, status='running')
+    
+    try:
+        running_id = await start_s3_run('api', job_id=job_id)
+    except SyncJobBusyError as e:
+        raise busy_response(e)
+    
+    if running_id != job_id:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                'message': f"S3 sync job {running_id} is running; resume {job_id} once it finishes",
+                'job': 's3',
+                'running': {'job_id': running_id}
+            }
+        )
+    return s3_job_response(job_id)
+
+
 @router.post("/authorities/scheduled")
 async def scheduled_authority_sync(
     background_tasks: BackgroundTasks,
@@ -69,17 +187,16 @@ async def scheduled_authority_sync(
     logger.info("Starting scheduled authority sync...")
     
     try:
-        result = await graphql_sync_service.sync_all_authorities(
-            incremental=True,
-            triggered_by='cron'
-        )
+        run = await sync_scheduler.trigger('authorities', triggered_by='cron', sync_type='scheduled')
         
         return {
-            'status': 'success',
-            'message': f"Synced {result.get('new_authorities', 0)} new authorities",
-            'details': result
+            'status': 'success' if run['status'] == 'completed' else run['status'],
+            'message': f"Synced {run['result']['records_synced'] if run['result'] else 0} authority records",
+            'details': run
         }
         
+    except SyncJobBusyError as e:
+        raise busy_response(e)
     except Exception as e:
         logger.error(f"Scheduled sync error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -94,7 +211,9 @@ async def manual_authority_sync(
     Manual sync endpoint for admin use
     
     Args:
-        incremental: If True, only sync new records since last sync
+        incremental: Skip authority types whose payload is unchanged since
+            the last sync; false rewrites every type. A trigger that joins a
+            sync already running gets that run, whatever its mode
     
     Returns:
         Sync operation summary
@@ -102,22 +221,63 @@ async def manual_authority_sync(
     logger.info(f"Starting manual authority sync (incremental={incremental})...")
     
     try:
-        result = await graphql_sync_service.sync_all_authorities(
-            incremental=incremental,
-            triggered_by='manual'
-        )
+        run = await sync_scheduler.trigger('authorities', triggered_by='manual', incremental=incremental)
         
         return {
-            'status': 'success',
-            'message': f"Synced {result.get('new_authorities', 0)} authorities",
-            'details': result
+            'status': 'success' if run['status'] == 'completed' else run['status'],
+            'message': f"Synced {run['result']['records_synced'] if run['result'] else 0} authority records",
+            'details': run
         }
         
+    except SyncJobBusyError as e:
+        raise busy_response(e)
     except Exception as e:
         logger.error(f"Manual sync error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/jobs")
+async def list_sync_jobs():
+    """
+    Status of scheduled sync jobs in this process
+    
+    Returns:
+        Per-job running flag, interval and last run summary
+    """
+    return {
+        'scheduler_enabled': settings.SYNC_SCHEDULER_ENABLED,
+        'jobs': sync_scheduler.status()
+    }
+
+
+@router.post("/jobs/{job}/trigger")
+async def trigger_sync_job(job: str, wait: bool = True):
+    """
+    Run a sync job (graphql, media_counts, authorities, s3)
+    
+    A trigger while the job is already running in this process joins that
+    run; if another process is running it the response is 409.
+    
+    Args:
+        job: Job name
+        wait: If True, wait for the run and return its summary
+    
+    Returns:
+        Run summary (wait=True) or acceptance with the coalesced flag
+    """
+    if job not in sync_scheduler.job_names:
+        raise HTTPException(status_code=404, detail=f"Unknown sync job: {job}")
+    
+    if not wait:
+        _, coalesced = sync_scheduler.submit(job, triggered_by='api')
+        return {'status': 'accepted', 'job': job, 'coalesced': coalesced, 'poll_url': "/api/sync/jobs"}
+    
+    try:
+        return await sync_scheduler.trigger(job, triggered_by='api')
+    except SyncJobBusyError as e:
+        raise busy_response(e)
+
+
 @router.get("/status")
 async def sync_status():
     """
@@ -232,18 +392,23 @@ async def sync_media_counts():
     try:
         logger.info("Syncing media counts for all PIDs...")
         
-        # Use standalone session - let the service create its own
-        stats = pid_media_service.sync_all_pid_media_counts(db=None)
-        
-        if 'error' in stats:
-            raise HTTPException(status_code=500, detail=stats['error'])
+        run = await sync_scheduler.trigger('media_counts', triggered_by='api')
+        if run['error']:
+            raise HTTPException(status_code=500, detail=run['error'])
+        stats = run['result']
         
         return {
             'status': 'success',
             'message': f"Updated media counts for {stats['pids_processed']} PIDs",
-            'stats': stats
+            'stats': stats,
+            'sync_id': run['sync_id'],
+            'coalesced': run['coalesced']
         }
         
+    except SyncJobBusyError as e:
+        raise busy_response(e)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error syncing media counts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -32,7 +32,32 @@ class Settings(BaseSettings):
     # DDR Archive GraphQL API
     DDR_GRAPHQL_ENDPOINT: str = "https://api.ddrarchive.org/graphql"
     DDR_API_TOKEN: str = ""  # Optional authentication token
-    
+    GRAPHQL_SYNC_BATCH_SIZE: int = 500  # Documents per bulk INSERT ... ON CONFLICT
+    DDR_RECORDS_PAGE_SIZE: int = 200  # records_v1 page size for paginated fetches
+    DDR_FETCH_CONCURRENCY: int = 4  # records_v1 pages in flight at once
+    DDR_FETCH_MAX_RETRIES: int = 3  # Retries per page
+    DDR_FETCH_TIMEOUT: float = 30.0  # Per-page request timeout (seconds)
+    DDR_CLIENT_MAX_CONNECTIONS: int = 20  # Keep-alive pool size of the shared DDR client
+    DDR_CLIENT_RATE_LIMIT: float = 20.0  # Max DDR requests per second across callers (0 = unlimited)
+    DDR_CLIENT_BURST: int = 10  # Requests allowed back-to-back before the rate limit applies
+    DDR_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open the DDR circuit
+    DDR_CIRCUIT_RESET_SECONDS: float = 30.0  # Open-circuit cool-down before a trial request
+    DDR_MEDIA_COUNT_BATCH_SIZE: int = 50  # PIDs per aliased media count query
+    DDR_MEDIA_COUNT_CONCURRENCY: int = 8  # Media count batches in flight at once (upper bound)
+    MEDIA_COUNT_UPDATE_BATCH_SIZE: int = 1000  # PIDs per UPDATE ... FROM (VALUES ...)
+    AUTHORITY_CACHE_MAX_ENTRIES: int = 10000  # LRU bound for cached authority lookups
+    AUTHORITY_CACHE_TTL_SECONDS: int = 3600  # How long found authorities stay cached
+    AUTHORITY_CACHE_NEGATIVE_TTL_SECONDS: int = 300  # How long "PID not found" stays cached
+    AUTHORITY_BATCH_SIZE: int = 100  # PIDs per aliased authority query
+
+    # Sync scheduler (one run per sync type across all processes, via advisory locks)
+    SYNC_SCHEDULER_ENABLED: bool = False  # Run syncs on the intervals below inside the API process
+    SYNC_SCHEDULER_POLL_SECONDS: int = 60  # How often the scheduler checks for due jobs
+    SYNC_GRAPHQL_INTERVAL_HOURS: float = 24  # 0 = only when triggered
+    SYNC_MEDIA_COUNTS_INTERVAL_HOURS: float = 24
+    SYNC_AUTHORITIES_INTERVAL_HOURS: float = 24
+    SYNC_S3_INTERVAL_HOURS: float = 0
+
     # DDR Archive Database (read-only queries) - DEPRECATED, use GraphQL instead
     DDR_POSTGRES_USER: str = ""
     DDR_POSTGRES_PASSWORD: str = ""
@@ -49,18 +74,30 @@ class Settings(BaseSettings):
     # Granite Model
     GRANITE_MODEL_PATH: str = "ibm-granite/granite-4.0-h-small-instruct"
     GRANITE_DEVICE: str = "cuda"  # or "cpu"
+    GRANITE_AUTOLOAD: bool = False  # load in the background at startup (API stays responsive)
     MAX_TOKENS: int = 2048
     TEMPERATURE: float = 0.7
     
+    # Model residency (in-process models share RAM with Postgres)
+    MODEL_IDLE_TTL_SECONDS: int = 1800  # unload models unused this long (0 = never)
+    MODEL_RSS_WATERMARK_MB: int = 6144  # refuse loads that would push API RSS past this (0 = no limit)
+    MODEL_MIN_AVAILABLE_MB: int = 1024  # system memory kept available for Postgres (0 = no limit)
+    MODEL_RESIDENCY_CHECK_SECONDS: int = 60
+    
     # Vector DB
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     VECTOR_DIMENSION: int = 384
+    CHUNK_COPY_BATCH_SIZE: int = 1000  # Chunks per COPY statement; a document's chunks commit once
     
     # S3 Storage
     S3_BUCKET: str = "epistemic-drift-research"
     S3_ENDPOINT: str = ""
     S3_ACCESS_KEY: str = ""
     S3_SECRET_KEY: str = ""
+    S3_MAX_POOL_CONNECTIONS: int = 10  # Shared boto3 client connection pool
+    S3_STATS_TTL_SECONDS: int = 900  # Max age of cached bucket statistics
+    S3_SYNC_CHECKPOINT_EVERY: int = 25  # Objects between S3 sync job checkpoints
+    S3_SYNC_CHECKPOINT_SECONDS: float = 30  # Max seconds between checkpoints
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -1,13 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 from strawberry.fastapi import GraphQLRouter
 import logging
 
-from app.api.routes import agent, sessions, experiments, metrics, documents, sync, graphql_sync, provenance, analysis, viz, search
+from app.api.routes import agent, sessions, experiments, metrics, documents, sync, graphql_sync, provenance, analysis, viz, search, admin
 from app.api.graphql.schema import schema
 from app.core.config import settings
 from app.services.granite_service import initialize_granite
+from app.services.model_residency import get_residency_manager
 
 # Configure logging
 logging.basicConfig(
@@ -28,11 +30,25 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Epistemic Drift Research API")
     logger.info(f"Environment: {settings.ENVIRONMENT}")
     
-    # Granite auto-loading disabled to prevent OOM on 8GB RAM
-    # Load manually via: POST /api/granite/load-model
-    logger.info("Granite LLM service: Manual loading required (use /api/granite/load-model endpoint)")
+    # Unload idle in-process models so they share RAM with Postgres
+    get_residency_manager().start()
+    
+    # Granite loads on a background thread; requests get 503 + Retry-After until ready
+    if settings.GRANITE_AUTOLOAD:
+        await initialize_granite()
+    else:
+        logger.info("Granite LLM service: Manual loading required (use /api/granite/load-model endpoint)")
+    
+    # Resume S3 sync jobs interrupted by the previous shutdown/restart
+    resume_task = asyncio.create_task(sync.resume_interrupted_s3_jobs())
+    
+    if settings.SYNC_SCHEDULER_ENABLED:
+        sync.sync_scheduler.start()
     
     yield
+    get_residency_manager().stop()
+    sync.sync_scheduler.stop()
+    resume_task.cancel()
     logger.info("Shutting down Epistemic Drift Research API")
 
 
@@ -64,6 +80,7 @@ app.include_router(provenance.router, prefix="/api/provenance", tags=["provenanc
 app.include_router(analysis.router, prefix="/api/granite", tags=["granite-analysis"])
 app.include_router(viz.router, prefix="/api/viz", tags=["visualizations"])
 app.include_router(search.router, prefix="/api/search", tags=["search"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 # GraphQL endpoint
 graphql_app = GraphQLRouter(schema)
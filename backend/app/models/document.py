@@ -44,6 +44,11 @@ class Document(LocalBase):
     doc_metadata = Column(JSONB)  # Author, journal, keywords, etc.
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Incremental sync tracking
+    content_hash = Column(String(64))  # SHA-256 of GraphQL-derived fields
+    last_synced_at = Column(DateTime, default=datetime.utcnow)
+    sync_version = Column(Integer, default=1)  # Increments on each changed sync
 
 
 class DocumentChunk(LocalBase):
@@ -174,7 +179,7 @@ class InferenceLog(LocalBase):
     
     # Query and response
     query = Column(Text, nullable=False)
-    query_embedding = Vector(384)  # Query vector for similarity tracking
+    query_embedding = Column(Vector(384))  # Query vector for similarity tracking and the semantic cache
     prediction = Column(Text)
     
     # Model used
@@ -188,6 +193,7 @@ class InferenceLog(LocalBase):
     # PROVENANCE CHAIN
     source_pids = Column(JSONB)  # PIDs that influenced prediction
     source_years = Column(JSONB)  # Publication years
+    source_set_hash = Column(String(64))  # Hash of the context chunks given to the model
     
     confidence_score = Column(Float)
     inference_time_ms = Column(Integer)
@@ -2,111 +2,54 @@
 """
 Scheduled PID Authority Sync Script
 
-Fetches all media items from DDR Archive GraphQL and syncs to database.
+Triggers a paginated records_v1 sync from DDR Archive GraphQL into the database.
 Designed to run as a cron job at 1am daily.
+
+The API fetches records_v1 page by page with several pages in flight and
+per-page retry, writing each batch as it arrives (see
+GraphQLSyncService.pull_sync_from_ddr). The run goes through the API's sync
+scheduler, so if a GraphQL sync is already in progress this run joins it, or
+exits cleanly when another worker holds the job's lock.
 """
 
 import sys
 import json
+import urllib.error
 import urllib.request
 from datetime import datetime
 
 
-GRAPHQL_ENDPOINT = "https://api.ddrarchive.org/graphql"
-SYNC_ENDPOINT = "http://localhost:8000/api/v1/sync/graphql"
-
-# GraphQL query to fetch all records with digital assets and ML annotations
-GRAPHQL_QUERY = """
-query {
-  records_v1(status: "published") {
-    id
-    pid
-    title
-    attached_media {
-      id
-      pid
-      title
-      used_for_ml
-      ml_annotation
-      digital_assets {
-        role
-        filename
-        use_for_ml
-        ml_pages
-        ml_annotation
-        mime
-      }
-    }
-  }
-}
-"""
+SYNC_ENDPOINT = "http://localhost:8000/api/v1/sync/graphql/pull"
 
 
-def fetch_from_graphql():
-    """Fetch all media items from DDR Archive GraphQL API"""
+def sync_from_graphql():
+    """Run the paginated GraphQL-to-database sync in the API"""
     try:
-        query_payload = {"query": GRAPHQL_QUERY}
-        print(f"{datetime.now()} - Sending GraphQL query: {json.dumps(query_payload)[:500]}...")
-        request_data = json.dumps(query_payload).encode()
-        req = urllib.request.Request(
-            GRAPHQL_ENDPOINT,
-            data=request_data,
-            headers={"Content-Type": "application/json"},
-            method="POST"
-        )
-        
-        print(f"{datetime.now()} - Fetching from GraphQL API...")
-        with urllib.request.urlopen(req, timeout=60) as response:
-            data = json.loads(response.read().decode())
-            
-            # Check for GraphQL errors
-            if 'errors' in data:
-                print(f"{datetime.now()} - GraphQL query errors:", file=sys.stderr)
-                for error in data['errors']:
-                    print(f"  - {error.get('message')}", file=sys.stderr)
-                print(f"{datetime.now()} - Continuing with partial data...", file=sys.stderr)
-            
-            # Debug: log what we got
-            if 'data' in data:
-                print(f"{datetime.now()} - Data keys: {list(data['data'].keys() if data['data'] else [])}")
-            
-            print(f"{datetime.now()} - GraphQL fetch successful")
-            return data
-            
-    except Exception as e:
-        print(f"{datetime.now()} - GraphQL fetch failed: {e}", file=sys.stderr)
-        sys.exit(1)
-
-
-def sync_to_database(graphql_data):
-    """Sync GraphQL data to local database"""
-    try:
-        # Debug: check what we're sending
-        print(f"{datetime.now()} - GraphQL data keys before sync: {list(graphql_data.keys())}")
-        if 'data' in graphql_data:
-            print(f"{datetime.now()} - graphql_data['data'] is None: {graphql_data['data'] is None}")
-        if 'errors' in graphql_data:
-            print(f"{datetime.now()} - graphql_data has 'errors' key: {graphql_data['errors']}")
-        
-        payload = {
-            "graphql_response": graphql_data
-        }
-        request_data = json.dumps(payload).encode()
-        
         # dry_run=false as query parameter
         req = urllib.request.Request(
             f"{SYNC_ENDPOINT}?dry_run=false",
-            data=request_data,
+            data=b"",
             headers={"Content-Type": "application/json"},
             method="POST"
         )
         
-        print(f"{datetime.now()} - Syncing to database...")
-        with urllib.request.urlopen(req, timeout=300) as response:
+        print(f"{datetime.now()} - Syncing records_v1 pages to database...")
+        with urllib.request.urlopen(req, timeout=900) as response:
             result = json.loads(response.read().decode())
             print(f"{datetime.now()} - Sync complete: {json.dumps(result, indent=2)}")
+            
+            if result.get('graphql_errors'):
+                print(f"{datetime.now()} - GraphQL responses contained {result['graphql_errors']} errors "
+                      f"(partial data was synced)", file=sys.stderr)
             return result
             
+    except urllib.error.HTTPError as e:
+        if e.code == 409:
+            print(f"{datetime.now()} - GraphQL sync already running elsewhere, skipping: "
+                  f"{e.read().decode()}")
+            sys.exit(0)
+        print(f"{datetime.now()} - Database sync failed: {e}", file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
         print(f"{datetime.now()} - Database sync failed: {e}", file=sys.stderr)
         sys.exit(1)
@@ -115,16 +58,13 @@ def sync_to_database(graphql_data):
 def main():
     print(f"{datetime.now()} - Starting scheduled PID authority sync")
     
-    # Fetch from GraphQL
-    graphql_data = fetch_from_graphql()
-    
-    # Sync to database
-    result = sync_to_database(graphql_data)
+    result = sync_from_graphql()
     
     print(f"{datetime.now()} - Scheduled sync completed successfully")
-    print(f"  - New PIDs: {result.get('new_count', 0)}")
-    print(f"  - Updated PIDs: {result.get('updated_count', 0)}")
-    print(f"  - Total processed: {result.get('total_count', 0)}")
+    print(f"  - New PIDs: {result.get('new', 0)}")
+    print(f"  - Updated PIDs: {result.get('updated', 0)}")
+    print(f"  - Unchanged PIDs: {result.get('unchanged', 0)}")
+    print(f"  - Total records: {result.get('total_items', 0)}")
 
 
 if __name__ == "__main__":
@@ -3,12 +3,48 @@ Authority Service - Fetch and validate PIDs from DDR Archive GraphQL
 Ensures only authority-linked assets enter the training corpus
 """
 import logging
-import requests
 from typing import Optional, Dict, List
 from app.core.config import settings
+from app.services.ddr_client import DDRClientError, get_ddr_client
+from app.services.lookup_cache import TTLLRUCache
 
 logger = logging.getLogger(__name__)
 
+# Authority fields cached per PID (also used to validate PIDs)
+AUTHORITY_FIELDS = """
+    pid
+    id
+    title
+    description
+    caption
+    creator
+    date
+    subject
+    type
+    format
+    language
+    coverage
+    rights
+    digitalAssets {
+        s3Key
+        fileType
+        fileSize
+        caption
+    }
+"""
+
+
+class AuthorityLookupError(Exception):
+    """DDR Archive could not be reached or answered with errors; the lookup result is unknown"""
+
+
+# Shared by every AuthorityService instance; None values mean "PID not found"
+authority_cache = TTLLRUCache(
+    max_entries=settings.AUTHORITY_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTHORITY_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.AUTHORITY_CACHE_NEGATIVE_TTL_SECONDS
+)
+
 
 class AuthorityService:
     """
@@ -19,66 +55,118 @@ class AuthorityService:
     
     def __init__(self):
         self.graphql_endpoint = settings.DDR_GRAPHQL_ENDPOINT
-        self.api_token = settings.DDR_API_TOKEN
+        self.client = get_ddr_client()
+        self.cache = authority_cache
     
     def _make_graphql_request(self, query: str, variables: Optional[Dict] = None) -> Optional[Dict]:
         """Make GraphQL request to DDR Archive API"""
         try:
-            headers = {
-                'Content-Type': 'application/json',
-            }
-            
-            if self.api_token:
-                headers['Authorization'] = f'Bearer {self.api_token}'
-            
-            payload = {
-                'query': query,
-                'variables': variables or {}
-            }
-            
-            response = requests.post(
-                self.graphql_endpoint,
-                json=payload,
-                headers=headers,
-                timeout=10
+            return self.client.execute(query, variables)
+        except DDRClientError as e:
+            logger.error(f"GraphQL request failed: {e}")
+            return None
+    
+    @staticmethod
+    def _response_data(result: Optional[Dict], what: str) -> Dict:
+        """
+        Data of a GraphQL response, if it is complete enough to trust a null as "not found"
+        
+        Raises:
+            AuthorityLookupError: If the request failed, returned errors or carried no data
+        """
+        if not result:
+            raise AuthorityLookupError(f"GraphQL unavailable for {what}")
+        if result.get('errors'):
+            raise AuthorityLookupError(f"GraphQL errors for {what}: {result['errors']}")
+        data = result.get('data')
+        if data is None:
+            raise AuthorityLookupError(f"GraphQL returned no data for {what}")
+        return data
+    
+    def _fetch_authority(self, pid: str) -> Optional[Dict]:
+        """
+        Fetch one authority from DDR Archive (cache loader)
+        
+        Returns:
+            Authority metadata dict, or None if the PID does not exist
+        
+        Raises:
+            AuthorityLookupError: If GraphQL is unavailable or the response
+                has errors or no authority field (nothing is cached)
+        """
+        query = f"""
+        query GetAuthority($pid: String!) {{
+            authority(pid: $pid) {{
+                {AUTHORITY_FIELDS}
+            }}
+        }}
+        """
+        
+        result = self._make_graphql_request(query, {'pid': pid})
+        data = self._response_data(result, f"PID {pid}")
+        if 'authority' not in data:
+            raise AuthorityLookupError(f"GraphQL response for PID {pid} has no authority field")
+        
+        # Present but null: the PID does not exist
+        return data['authority'] or None
+    
+    def _fetch_authorities(self, pids: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch many authorities with aliased queries (batch cache loader)
+        
+        Returns:
+            Dict mapping PID -> metadata for the PIDs that exist
+        
+        Raises:
+            AuthorityLookupError: If GraphQL is unavailable or a batch response
+                has errors or is missing an alias (nothing is cached)
+        """
+        found = {}
+        batch_size = settings.AUTHORITY_BATCH_SIZE
+        
+        for start in range(0, len(pids), batch_size):
+            batch = pids[start:start + batch_size]
+            variable_defs = ', '.join(f'$a{i}: String!' for i in range(len(batch)))
+            selections = '\n'.join(
+                f'a{i}: authority(pid: $a{i}) {{ {AUTHORITY_FIELDS} }}' for i in range(len(batch))
             )
+            query = f"""
+            query GetAuthorities({variable_defs}) {{
+                {selections}
+            }}
+            """
             
-            response.raise_for_status()
-            return response.json()
+            result = self._make_graphql_request(query, {f'a{i}': pid for i, pid in enumerate(batch)})
+            data = self._response_data(result, f"{len(batch)} PIDs")
             
-        except requests.RequestException as e:
-            logger.error(f"GraphQL request failed: {e}")
-            return None
+            for i, pid in enumerate(batch):
+                if f'a{i}' not in data:
+                    raise AuthorityLookupError(f"GraphQL response is missing PID {pid}")
+                # A present-but-null alias is a PID that does not exist
+                authority = data[f'a{i}']
+                if authority:
+                    found[pid] = authority
+        
+        return found
     
     def validate_pid(self, pid: str) -> bool:
         """
         Validate that a PID exists in DDR Archive authorities
         
+        Shares the cached authority lookup with get_authority_metadata().
+        
         Args:
             pid: Postgres authority PID to validate
         
         Returns:
             True if PID is valid and exists in authorities
         """
-        query = """
-        query ValidatePID($pid: String!) {
-            authority(pid: $pid) {
-                pid
-                id
-            }
-        }
-        """
-        
-        result = self._make_graphql_request(query, {'pid': pid})
-        
-        if not result:
-            logger.warning(f"Could not validate PID {pid} - GraphQL unavailable")
+        try:
+            authority = self.cache.get_or_load(pid, self._fetch_authority)
+        except AuthorityLookupError:
+            logger.warning(f"Could not validate PID {pid} - GraphQL lookup failed")
             return False
         
-        # Check if authority exists
-        data = result.get('data', {})
-        authority = data.get('authority')
-        
         if authority and authority.get('pid') == pid:
             logger.info(f"PID {pid} validated successfully")
             return True
@@ -91,7 +179,8 @@ class AuthorityService:
         Fetch full authority metadata for a PID from DDR Archive
         
         This enriches document records with captions, descriptive metadata,
-        and contextual information from the authorities database
+        and contextual information from the authorities database.
+        Results (including "not found") are served from the authority cache.
         
         Args:
             pid: Postgres authority PID
@@ -99,40 +188,11 @@ class AuthorityService:
         Returns:
             Authority metadata dict or None if not found
         """
-        query = """
-        query GetAuthority($pid: String!) {
-            authority(pid: $pid) {
-                pid
-                id
-                title
-                description
-                caption
-                creator
-                date
-                subject
-                type
-                format
-                language
-                coverage
-                rights
-                digitalAssets {
-                    s3Key
-                    fileType
-                    fileSize
-                    caption
-                }
-            }
-        }
-        """
-        
-        result = self._make_graphql_request(query, {'pid': pid})
-        
-        if not result:
+        try:
+            authority = self.cache.get_or_load(pid, self._fetch_authority)
+        except AuthorityLookupError:
             return None
         
-        data = result.get('data', {})
-        authority = data.get('authority')
-        
         if authority:
             logger.info(f"Fetched authority metadata for PID {pid}")
             return authority
@@ -140,6 +200,26 @@ class AuthorityService:
         logger.warning(f"No authority metadata found for PID {pid}")
         return None
     
+    def get_authority_metadata_many(self, pids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Fetch authority metadata for many PIDs
+        
+        Cached PIDs are served from the authority cache; only the misses are
+        fetched, with one aliased GraphQL query per AUTHORITY_BATCH_SIZE PIDs.
+        
+        Args:
+            pids: Postgres authority PIDs
+        
+        Returns:
+            Dict mapping PID -> metadata dict, or None if not found
+            (empty dict if the lookup failed)
+        """
+        try:
+            return self.cache.get_many_or_load(pids, self._fetch_authorities)
+        except AuthorityLookupError as e:
+            logger.error(f"Could not fetch authority metadata: {e}")
+            return {}
+    
     def get_all_valid_pids(self, limit: int = 10000) -> List[str]:
         """
         Fetch all valid PIDs from DDR Archive authorities
@@ -0,0 +1,102 @@
+"""
+Context packer - fit retrieved chunks into the Granite prompt's token budget
+
+Chunks arrive ranked best-first, as retrieval returns them. They are taken
+in that order while their formatted text fits the budget (model window minus
+max_new_tokens minus the rest of the prompt), counted with the model's own
+tokenizer. The first chunk that does not fit is cut back to whole sentences;
+everything after it is dropped. Citation numbers therefore stay aligned with
+the ranked list, and no prefill is spent on text the model could not attend
+to within its window anyway.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+SENTENCE_END = re.compile(r'(?<=[.!?])["\')\]]*\s+')
+
+# Tokenizing pieces separately can differ slightly from tokenizing the joined prompt
+SAFETY_TOKENS = 8
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in SENTENCE_END.split(text.strip()) if s]
+
+
+@dataclass
+class PackedContext:
+    """Chunks that made it into the prompt and what the budget cost"""
+    chunks: List[Dict[str, Any]]
+    budget_tokens: int
+    used_tokens: int = 0
+    truncated_ids: List[Any] = field(default_factory=list)
+    dropped_ids: List[Any] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'budget_tokens': self.budget_tokens,
+            'used_tokens': self.used_tokens,
+            'packed_chunks': len(self.chunks),
+            'truncated_chunk_ids': self.truncated_ids,
+            'dropped_chunk_ids': self.dropped_ids
+        }
+
+
+def pack_context(
+    chunks: List[Dict[str, Any]],
+    budget_tokens: int,
+    count_tokens: Callable[[str], int],
+    format_chunk: Callable[[int, Dict[str, Any]], str],
+    separator_tokens: int = 1
+) -> PackedContext:
+    """
+    Pack ranked chunks into a token budget, truncating at sentence boundaries
+
+    Args:
+        chunks: Context chunks, best first
+        budget_tokens: Tokens available for the whole context block
+        count_tokens: Token count of a piece of text (no special tokens)
+        format_chunk: Renders chunk i (1-based) as it appears in the prompt
+        separator_tokens: Cost of the separator between formatted chunks
+
+    Returns:
+        PackedContext; truncated chunks are copies with shortened 'text'
+    """
+    budget = max(0, budget_tokens - SAFETY_TOKENS)
+    packed = PackedContext(chunks=[], budget_tokens=budget_tokens)
+    used = 0
+
+    for position, chunk in enumerate(chunks):
+        number = len(packed.chunks) + 1
+        cost = count_tokens(format_chunk(number, chunk)) + (separator_tokens if packed.chunks else 0)
+        if used + cost <= budget:
+            packed.chunks.append(chunk)
+            used += cost
+            continue
+
+        # Keep the longest run of leading sentences that still fits
+        sentences = split_sentences(chunk.get('text') or '')
+        remaining = budget - used - (separator_tokens if packed.chunks else 0)
+        low, high = 0, len(sentences) - 1  # sentences kept; a chunk cut to nothing is dropped
+        best = None
+        while low < high:
+            mid = (low + high + 1) // 2
+            candidate = {**chunk, 'text': ' '.join(sentences[:mid])}
+            candidate_cost = count_tokens(format_chunk(number, candidate))
+            if candidate_cost <= remaining:
+                low, best = mid, (candidate, candidate_cost)
+            else:
+                high = mid - 1
+
+        if best is not None:
+            candidate, candidate_cost = best
+            packed.chunks.append(candidate)
+            packed.truncated_ids.append(chunk.get('id'))
+            used += candidate_cost + (separator_tokens if len(packed.chunks) > 1 else 0)
+            packed.dropped_ids.extend(c.get('id') for c in chunks[position + 1:])
+        else:
+            packed.dropped_ids.extend(c.get('id') for c in chunks[position:])
+        break
+
+    packed.used_tokens = used
+    return packed
@@ -18,17 +18,37 @@ Syncs controlled vocabulary authorities from DDR Archive GraphQL API.
   - ref_beneficiary_audience: Intended audiences
   - ref_project_outcome: Project outcome types
 
+All types are fetched concurrently. Each type is written with one multi-row
+upsert, and skipped entirely when its payload hash matches the last sync
+(unless a full, non-incremental sync is requested).
+
 Usage:
     python -m app.services.database_authorities_sync
 """
 
-import requests
+import hashlib
 import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from psycopg2.extras import execute_values
 from sqlalchemy import text
 from app.core.database import LocalSessionLocal
 from app.core.logging import logger
+from app.services.ddr_client import get_ddr_client
 
-DDR_GRAPHQL_URL = "https://api.ddrarchive.org/graphql"
+UPSERT_SQL = """
+    INSERT INTO database_authorities 
+        (authority_type, authority_id, code, label, description, category, metadata, synced_at)
+    VALUES %s
+    ON CONFLICT (authority_type, authority_id) 
+    DO UPDATE SET
+        code = EXCLUDED.code,
+        label = EXCLUDED.label,
+        description = EXCLUDED.description,
+        metadata = EXCLUDED.metadata,
+        synced_at = NOW()
+"""
+UPSERT_TEMPLATE = "(%s, %s, %s, %s, %s, %s, CAST(%s AS jsonb), NOW())"
 
 # Define all 11 authority types with their queries and mappings
 AUTHORITY_DEFINITIONS = {
@@ -223,9 +243,7 @@ AUTHORITY_DEFINITIONS = {
 def fetch_authority_data(authority_type: str, query: str) -> list:
     """Fetch authority data from DDR GraphQL API."""
     try:
-        response = requests.post(DDR_GRAPHQL_URL, json={"query": query}, timeout=30)
-        response.raise_for_status()
-        result = response.json()
+        result = get_ddr_client().execute(query, operation=authority_type)
         
         if "errors" in result:
             logger.error(f"GraphQL errors for {authority_type}: {result['errors']}")
@@ -244,16 +262,24 @@ def fetch_authority_data(authority_type: str, query: str) -> list:
         return []
 
 
-def sync_authority(db, authority_type: str, config: dict):
-    """Sync a single authority type to the database."""
-    logger.info(f"Syncing {authority_type}...")
-    
-    # Fetch data from GraphQL
-    data = fetch_authority_data(authority_type, config["query"])
-    if not data:
-        logger.warning(f"No data to sync for {authority_type}")
-        return 0
-    
+def fetch_all_authority_data() -> Dict[str, list]:
+    """Fetch every authority type concurrently over the shared DDR client pool."""
+    with ThreadPoolExecutor(max_workers=len(AUTHORITY_DEFINITIONS)) as executor:
+        futures = {
+            authority_type: executor.submit(fetch_authority_data, authority_type, config["query"])
+            for authority_type, config in AUTHORITY_DEFINITIONS.items()
+        }
+        return {authority_type: future.result() for authority_type, future in futures.items()}
+
+
+def payload_hash(data: list) -> str:
+    """Stable SHA-256 of an authority type's GraphQL payload."""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def build_authority_rows(authority_type: str, config: dict, data: list) -> list:
+    """Map GraphQL items to database_authorities row tuples (last duplicate wins)."""
     category = config["category"]
     id_field = config["id_field"]
     label_field = config["label_field"]
@@ -261,14 +287,15 @@ def sync_authority(db, authority_type: str, config: dict):
     description_field = config.get("description_field")
     metadata_fields = config.get("metadata_fields", [])
     
-    synced_count = 0
+    # A multi-row ON CONFLICT cannot touch the same key twice
+    rows = {}
     
     for item in data:
-        authority_id = str(item.get(id_field))
-        if not authority_id:
+        if item.get(id_field) is None:
             continue
+        authority_id = str(item[id_field])
         
-        label = item.get(label_field, "")
+        label = item.get(label_field) or ""
         code = item.get(code_field) if code_field else None
         description = item.get(description_field) if description_field else None
         
@@ -278,44 +305,85 @@ def sync_authority(db, authority_type: str, config: dict):
             if field in item:
                 metadata[field] = item[field]
         
-        # Upsert the authority record
-        try:
-            db.execute(
-                text("""
-                    INSERT INTO database_authorities 
-                        (authority_type, authority_id, code, label, description, category, metadata, synced_at)
-                    VALUES 
-                        (:type, :id, :code, :label, :desc, :cat, CAST(:meta AS jsonb), NOW())
-                    ON CONFLICT (authority_type, authority_id) 
-                    DO UPDATE SET
-                        code = EXCLUDED.code,
-                        label = EXCLUDED.label,
-                        description = EXCLUDED.description,
-                        metadata = EXCLUDED.metadata,
-                        synced_at = NOW()
-                """),
-                {
-                    "type": authority_type,
-                    "id": authority_id,
-                    "code": code,
-                    "label": label,
-                    "desc": description,
-                    "cat": category,
-                    "meta": json.dumps(metadata) if metadata else "{}"
-                }
-            )
-            synced_count += 1
-        except Exception as e:
-            logger.error(f"Failed to insert {authority_type}/{authority_id}: {e}")
-            continue
+        rows[authority_id] = (
+            authority_type,
+            authority_id,
+            code,
+            label,
+            description,
+            category,
+            json.dumps(metadata) if metadata else "{}"
+        )
     
-    db.commit()
-    logger.info(f"✓ Synced {synced_count} {authority_type} records")
-    return synced_count
+    return list(rows.values())
 
 
-def sync_all_authorities():
-    """Sync all 11 database authority types."""
+def sync_authority(
+    db,
+    authority_type: str,
+    config: dict,
+    data: Optional[list] = None,
+    incremental: bool = True
+) -> Optional[int]:
+    """
+    Sync a single authority type to the database.
+    
+    Returns the number of records written, or None if the payload was
+    unchanged since the last sync and the upsert was skipped. With
+    incremental=False the upsert always runs.
+    """
+    logger.info(f"Syncing {authority_type}...")
+    
+    # Fetch data from GraphQL
+    if data is None:
+        data = fetch_authority_data(authority_type, config["query"])
+    if not data:
+        logger.warning(f"No data to sync for {authority_type}")
+        return 0
+    
+    digest = payload_hash(data)
+    previous = db.execute(
+        text("SELECT payload_hash FROM database_authority_sync_state WHERE authority_type = :type"),
+        {"type": authority_type}
+    ).scalar()
+    
+    if incremental and previous == digest:
+        logger.info(f"✓ {authority_type} unchanged since last sync - skipped")
+        return None
+    
+    rows = build_authority_rows(authority_type, config, data)
+    
+    try:
+        # One multi-row upsert per type, in the same transaction as the new hash
+        cursor = db.connection().connection.cursor()
+        execute_values(cursor, UPSERT_SQL, rows, template=UPSERT_TEMPLATE, page_size=1000)
+        cursor.close()
+        
+        db.execute(
+            text("""
+                INSERT INTO database_authority_sync_state 
+                    (authority_type, payload_hash, record_count, synced_at)
+                VALUES (:type, :hash, :count, NOW())
+                ON CONFLICT (authority_type)
+                DO UPDATE SET
+                    payload_hash = EXCLUDED.payload_hash,
+                    record_count = EXCLUDED.record_count,
+                    synced_at = NOW()
+            """),
+            {"type": authority_type, "hash": digest, "count": len(rows)}
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to upsert {authority_type}: {e}")
+        return 0
+    
+    logger.info(f"✓ Synced {len(rows)} {authority_type} records")
+    return len(rows)
+
+
+def sync_all_authorities(incremental: bool = True):
+    """Sync all 11 database authority types (incremental=False rewrites unchanged types too)."""
     logger.info("=" * 70)
     logger.info("DATABASE AUTHORITIES SYNC - Starting")
     logger.info("=" * 70)
@@ -326,9 +394,17 @@ def sync_all_authorities():
         total_synced = 0
         core_count = 0
         critical_count = 0
+        unchanged_types = []
+        
+        all_data = fetch_all_authority_data()
         
         for authority_type, config in AUTHORITY_DEFINITIONS.items():
-            count = sync_authority(db, authority_type, config)
+            count = sync_authority(
+                db, authority_type, config, data=all_data[authority_type], incremental=incremental
+            )
+            if count is None:
+                unchanged_types.append(authority_type)
+                continue
             total_synced += count
             
             if config["category"] == "core":
@@ -340,6 +416,7 @@ def sync_all_authorities():
         logger.info(f"SYNC COMPLETE: {total_synced} total records")
         logger.info(f"  Core authorities: {core_count} records (5 types)")
         logger.info(f"  Critical authorities: {critical_count} records (6 types)")
+        logger.info(f"  Unchanged (skipped): {len(unchanged_types)} types")
         logger.info("=" * 70)
         
         return total_synced
@@ -0,0 +1,454 @@
+"""
+Shared DDR Archive GraphQL client
+
+One keep-alive connection pool per process (sync) or per event loop (async),
+so TLS handshakes are paid once rather than per request. Every request goes
+through the same resilience layer:
+
+- retry with jittered exponential backoff (honouring Retry-After)
+- a circuit breaker that fails fast while DDR is down
+- a token-bucket rate limit shared by all callers
+- per-query latency metrics (count, errors, mean, p95, max)
+
+The client classes are free of app settings so the standalone sync scripts
+can build their own; services use get_ddr_client() / get_async_ddr_client().
+"""
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENDPOINT = "https://api.ddrarchive.org/graphql"
+
+# Statuses worth retrying: throttling and transient upstream failures
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_OPERATION_RE = re.compile(r'\b(?:query|mutation)\s+(\w+)')
+_FIRST_FIELD_RE = re.compile(r'\{\s*(\w+)')
+
+
+class DDRClientError(Exception):
+    """A DDR GraphQL request failed after all retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(DDRClientError):
+    """The circuit breaker is open; DDR is treated as down and not called"""
+
+
+def operation_name(query: str) -> str:
+    """Metrics label for a query: its operation name, else its first field"""
+    match = _OPERATION_RE.search(query) or _FIRST_FIELD_RE.search(query)
+    return match.group(1) if match else 'anonymous'
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Opens after failure_threshold consecutive failures. While open, calls
+    fail immediately; after reset_timeout one trial call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may proceed"""
+        with self._lock:
+            if self.state == 'closed':
+                return
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            raise CircuitOpenError(f"DDR circuit open; retry in {retry_in:.0f}s", retry_after=retry_in)
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info("DDR circuit closed")
+            self.state = 'closed'
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == 'half_open' or self._failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.warning(f"DDR circuit opened after {self._failures} consecutive failures")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """Token bucket shared by sync and async callers (rate <= 0 disables it)"""
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait for it"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class QueryMetrics:
+    """Per-operation request latency metrics"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, elapsed_ms: float, ok: bool):
+        with self._lock:
+            stats = self._stats.get(operation)
+            if stats is None:
+                stats = self._stats[operation] = {
+                    'count': 0,
+                    'errors': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'recent_ms': deque(maxlen=self.window)
+                }
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['recent_ms'].append(elapsed_ms)
+            if not ok:
+                stats['errors'] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            result = {}
+            for operation, stats in self._stats.items():
+                recent = sorted(stats['recent_ms'])
+                p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+                result[operation] = {
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'mean_ms': round(stats['total_ms'] / stats['count'], 1),
+                    'p95_ms': round(p95, 1),
+                    'max_ms': round(stats['max_ms'], 1)
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+class _DDRClientBase:
+    """Request policy shared by the sync and async clients"""
+
+    def __init__(
+        self,
+        endpoint: str = DEFAULT_ENDPOINT,
+        api_token: Optional[str] = None,
+        timeout: float = 30.0,
+        max_connections: int = 20,
+        max_retries: int = 3,
+        rate_limit_per_second: float = 0.0,
+        burst: int = 10,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0
+    ):
+        """
+        Args:
+            endpoint: DDR GraphQL endpoint
+            api_token: Optional bearer token
+            timeout: Per-request timeout in seconds
+            max_connections: Keep-alive pool size
+            max_retries: Retries per request after the first attempt
+            rate_limit_per_second: Sustained request rate (0 disables limiting)
+            burst: Requests allowed back-to-back before the rate applies
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds before an open circuit allows a trial call
+        """
+        self.endpoint = endpoint
+        self.api_token = api_token
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.rate_limiter = RateLimiter(rate_limit_per_second, burst)
+        self.metrics = QueryMetrics()
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {'Content-Type': 'application/json'}
+        if self.api_token:
+            headers['Authorization'] = f'Bearer {self.api_token}'
+        return headers
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections
+        )
+
+    def _check_response(self, response: httpx.Response) -> Dict:
+        """Return the JSON body or raise DDRClientError carrying the status"""
+        if response.status_code >= 400:
+            retry_after = response.headers.get('Retry-After')
+            raise DDRClientError(
+                f"DDR returned HTTP {response.status_code}",
+                status_code=response.status_code,
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None
+            )
+        return response.json()
+
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, DDRClientError):
+            return error.status_code in RETRY_STATUSES
+        return isinstance(error, (httpx.TransportError, ValueError))
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return retry_after
+        return min(2 ** attempt, 30) * (0.5 + random.random())
+
+    def _payload(self, query: str, variables: Optional[Dict]) -> Dict:
+        return {'query': query, 'variables': variables or {}}
+
+
+class DDRClient(_DDRClientBase):
+    """Blocking DDR GraphQL client over a shared keep-alive httpx.Client"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._client: Optional[httpx.Client] = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        timeout=self.timeout,
+                        limits=self._limits(),
+                        headers=self._headers()
+                    )
+        return self._client
+
+    def execute(
+        self,
+        query: str,
+        variables: Optional[Dict] = None,
+        operation: Optional[str] = None,
+        max_retries: Optional[int] = None
+    ) -> Dict:
+        """
+        POST a GraphQL query and return the decoded response body
+
+        The body may still contain GraphQL "errors"; callers decide how to
+        treat partial data.
+
+        Raises:
+            CircuitOpenError: If DDR is currently considered down
+            DDRClientError: If the request still fails after all retries
+        """
+        operation = operation or operation_name(query)
+        payload = self._payload(query, variables)
+        retries = self.max_retries if max_retries is None else max_retries
+
+        for attempt in range(retries + 1):
+            self.breaker.before_call()
+            delay = self.rate_limiter.reserve()
+            if delay:
+                time.sleep(delay)
+
+            started = time.perf_counter()
+            try:
+                result = self._check_response(self.client.post(self.endpoint, json=payload))
+            except (httpx.TransportError, DDRClientError, ValueError) as e:
+                self.metrics.record(operation, (time.perf_counter() - started) * 1000, ok=False)
+                retryable = self._is_retryable(e)
+                # Only outage-like failures count against the circuit; a 4xx means DDR is up
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if attempt >= retries or not retryable:
+                    raise e if isinstance(e, DDRClientError) else DDRClientError(f"{operation} failed: {e}") from e
+                wait = self._backoff(attempt, e)
+                logger.warning(f"DDR {operation} failed ({e}); retry {attempt + 1} in {wait:.1f}s")
+                time.sleep(wait)
+                continue
+
+            self.metrics.record(operation, (time.perf_counter() - started) * 1000, ok=True)
+            self.breaker.record_success()
+            return result
+
+    def close(self):
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+class AsyncDDRClient(_DDRClientBase):
+    """
+    Async DDR GraphQL client
+
+    httpx.AsyncClient pools are bound to an event loop, so one pool is kept
+    per running loop; the breaker, rate limit and metrics are shared.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self._limits(),
+                headers=self._headers()
+            )
+        return client
+
+    async def execute(
+        self,
+        query: str,
+        variables: Optional[Dict] = None,
+        operation: Optional[str] = None,
+        max_retries: Optional[int] = None
+    ) -> Dict:
+        """Async counterpart of DDRClient.execute()"""
+        operation = operation or operation_name(query)
+        payload = self._payload(query, variables)
+        retries = self.max_retries if max_retries is None else max_retries
+
+        for attempt in range(retries + 1):
+            self.breaker.before_call()
+            delay = self.rate_limiter.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+
+            started = time.perf_counter()
+            try:
+                result = self._check_response(await self.client.post(self.endpoint, json=payload))
+            except (httpx.TransportError, DDRClientError, ValueError) as e:
+                self.metrics.record(operation, (time.perf_counter() - started) * 1000, ok=False)
+                retryable = self._is_retryable(e)
+                # Only outage-like failures count against the circuit; a 4xx means DDR is up
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if attempt >= retries or not retryable:
+                    raise e if isinstance(e, DDRClientError) else DDRClientError(f"{operation} failed: {e}") from e
+                wait = self._backoff(attempt, e)
+                logger.warning(f"DDR {operation} failed ({e}); retry {attempt + 1} in {wait:.1f}s")
+                await asyncio.sleep(wait)
+                continue
+
+            self.metrics.record(operation, (time.perf_counter() - started) * 1000, ok=True)
+            self.breaker.record_success()
+            return result
+
+    async def aclose(self):
+        """Close the pool belonging to the running event loop"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_ddr_client: Optional[DDRClient] = None
+_async_ddr_client: Optional[AsyncDDRClient] = None
+_factory_lock = threading.Lock()
+
+
+def _client_kwargs() -> Dict[str, Any]:
+    from app.core.config import settings
+
+    return {
+        'endpoint': settings.DDR_GRAPHQL_ENDPOINT,
+        'api_token': settings.DDR_API_TOKEN or None,
+        'timeout': settings.DDR_FETCH_TIMEOUT,
+        'max_connections': settings.DDR_CLIENT_MAX_CONNECTIONS,
+        'max_retries': settings.DDR_FETCH_MAX_RETRIES,
+        'rate_limit_per_second': settings.DDR_CLIENT_RATE_LIMIT,
+        'burst': settings.DDR_CLIENT_BURST,
+        'failure_threshold': settings.DDR_CIRCUIT_FAILURE_THRESHOLD,
+        'reset_timeout': settings.DDR_CIRCUIT_RESET_SECONDS
+    }
+
+
+def get_ddr_client() -> DDRClient:
+    """Get the process-wide blocking DDR client configured from settings"""
+    global _ddr_client
+    if _ddr_client is None:
+        with _factory_lock:
+            if _ddr_client is None:
+                _ddr_client = DDRClient(**_client_kwargs())
+    return _ddr_client
+
+
+def get_async_ddr_client() -> AsyncDDRClient:
+    """Get the process-wide async DDR client configured from settings"""
+    global _async_ddr_client
+    if _async_ddr_client is None:
+        with _factory_lock:
+            if _async_ddr_client is None:
+                _async_ddr_client = AsyncDDRClient(**_client_kwargs())
+    return _async_ddr_client
+
+
+def get_ddr_metrics() -> Dict[str, Dict]:
+    """Latency metrics and circuit state for both shared clients"""
+    result = {}
+    for name, client in (('sync', _ddr_client), ('async', _async_ddr_client)):
+        if client is not None:
+            result[name] = {
+                'circuit': client.breaker.state,
+                'queries': client.metrics.snapshot()
+            }
+    return result
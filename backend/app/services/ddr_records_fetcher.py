@@ -0,0 +1,266 @@
+"""
+Paginated, concurrent fetcher for DDR Archive records_v1
+
+Pages through records_v1 by offset with several pages in flight over the
+shared async DDR client (keep-alive pool, retry, circuit breaker). Each page
+is retried independently, so a slow or failed page no longer stalls or
+restarts the whole sync. Pages are handed to the consumer in order as soon as
+they arrive.
+
+Offsets are only stable under a fixed ordering, so pages are requested
+ordered by id, and paging ends at the first empty page rather than the first
+short one. If the server rejects the paging arguments the whole result is
+fetched in a single request instead.
+
+Deliberately free of app settings so the standalone sync scripts can import
+it; services pass the shared client or configured values in.
+"""
+import asyncio
+import logging
+import queue
+import threading
+from collections import deque
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from app.services.ddr_client import AsyncDDRClient, DDRClientError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENDPOINT = "https://api.ddrarchive.org/graphql"
+DEFAULT_PAGE_SIZE = 200
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_TIMEOUT = 30.0
+
+# End-of-stream marker for the blocking bridge
+_DONE = object()
+
+
+class PageFetchError(Exception):
+    """A records_v1 page could not be fetched after all retries"""
+
+
+class PaginationRejected(PageFetchError):
+    """records_v1 answered the paged query with errors and no data"""
+
+
+class DDRRecordsFetcher:
+    """Fetch records_v1 page by page with bounded concurrency and per-page retry"""
+
+    def __init__(
+        self,
+        fields: str,
+        status: str = "published",
+        order_by: Optional[str] = "id",
+        endpoint: str = DEFAULT_ENDPOINT,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        timeout: float = DEFAULT_TIMEOUT,
+        api_token: Optional[str] = None,
+        client: Optional[AsyncDDRClient] = None
+    ):
+        """
+        Args:
+            fields: GraphQL selection set for each record (without braces)
+            status: records_v1 status filter
+            order_by: Field records_v1 is ordered by while paging (None = server order)
+            endpoint: DDR GraphQL endpoint
+            page_size: Records per page (limit)
+            concurrency: Pages in flight at once
+            max_retries: Retries per page after the first attempt
+            timeout: Per-request timeout in seconds
+            api_token: Optional bearer token
+            client: Shared AsyncDDRClient; when omitted a private one is built
+                from endpoint/timeout/max_retries/api_token and closed after use
+        """
+        self.status = status
+        self.page_size = page_size
+        self.concurrency = max(1, concurrency)
+        self._owns_client = client is None
+        self.client = client or AsyncDDRClient(
+            endpoint=endpoint,
+            api_token=api_token,
+            timeout=timeout,
+            max_connections=self.concurrency,
+            max_retries=max_retries
+        )
+        ordering = f", order_by: {order_by}" if order_by else ""
+        self.query = f"""
+        query RecordsPage($status: String, $limit: Int!, $offset: Int!) {{
+          records_v1(status: $status, limit: $limit, offset: $offset{ordering}) {{
+            {fields}
+          }}
+        }}
+        """
+        # Fallback when the paging arguments are not accepted
+        self.single_query = f"""
+        query Records($status: String) {{
+          records_v1(status: $status) {{
+            {fields}
+          }}
+        }}
+        """
+        self.graphql_errors: List[Dict] = []
+
+    async def _fetch_page(self, offset: int) -> List[Dict]:
+        """
+        Fetch one page; transport errors and 5xx are retried by the client
+
+        Returns the page as served, including null entries, so its length can
+        be compared with page_size.
+        """
+        variables = {'status': self.status, 'limit': self.page_size, 'offset': offset}
+        
+        try:
+            result = await self.client.execute(self.query, variables, operation='records_v1')
+        except DDRClientError as e:
+            raise PageFetchError(f"records_v1 page at offset {offset} failed: {e}") from e
+
+        data = result.get('data') or {}
+        records = data.get('records_v1')
+        if records is None and result.get('errors'):
+            raise PaginationRejected(f"records_v1 page at offset {offset} rejected: {result['errors']}")
+
+        if result.get('errors'):
+            logger.error(f"GraphQL errors for records_v1 page at offset {offset}: {result['errors']}")
+            self.graphql_errors.extend(result['errors'])
+
+        if records is None:
+            raise PageFetchError(f"No records_v1 data in page at offset {offset}")
+        return records
+
+    async def _fetch_all(self) -> List[Dict]:
+        """Fetch every record in one unpaged request"""
+        try:
+            result = await self.client.execute(self.single_query, {'status': self.status}, operation='records_v1')
+        except DDRClientError as e:
+            raise PageFetchError(f"records_v1 fetch failed: {e}") from e
+
+        if result.get('errors'):
+            logger.error(f"GraphQL errors for records_v1: {result['errors']}")
+            self.graphql_errors.extend(result['errors'])
+
+        records = (result.get('data') or {}).get('records_v1')
+        if records is None:
+            raise PageFetchError("No records_v1 data in response")
+        return records
+
+    async def iter_pages(self) -> AsyncIterator[List[Dict]]:
+        """
+        Yield record pages in offset order, keeping up to `concurrency` in flight
+
+        Paging stops at the first empty page. A short page is not taken as
+        the end, since the server may serve fewer than `limit` records per
+        page. If the first page is rejected (e.g. the paging arguments are
+        unknown), all records are fetched in one request and yielded as a
+        single page.
+        """
+        in_flight = deque()
+        next_offset = 0
+        exhausted = False
+        short_page_offset = None
+
+        try:
+            while True:
+                while not exhausted and len(in_flight) < self.concurrency:
+                    in_flight.append(asyncio.create_task(self._fetch_page(next_offset)))
+                    next_offset += self.page_size
+
+                if not in_flight:
+                    break
+
+                offset = next_offset - len(in_flight) * self.page_size
+                try:
+                    records = await in_flight.popleft()
+                except PaginationRejected as e:
+                    if offset != 0:
+                        raise
+                    logger.warning(f"{e}; fetching records_v1 in a single request")
+                    for task in in_flight:
+                        task.cancel()
+                    in_flight.clear()
+                    records = [r for r in await self._fetch_all() if r]
+                    if records:
+                        yield records
+                    return
+
+                if not records:
+                    # Past the end - anything further out is empty too
+                    exhausted = True
+                    for task in in_flight:
+                        task.cancel()
+                    in_flight.clear()
+                    continue
+
+                if short_page_offset is not None:
+                    logger.warning(
+                        f"records_v1 returned a short page at offset {short_page_offset} but more records "
+                        f"after it; the server may cap limit below page_size={self.page_size}"
+                    )
+                    short_page_offset = None
+                if len(records) < self.page_size:
+                    short_page_offset = offset
+
+                records = [r for r in records if r]
+                if records:
+                    yield records
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if self._owns_client:
+                await self.client.aclose()
+
+    async def iter_records(self) -> AsyncIterator[Dict]:
+        """Yield records one at a time as their pages arrive"""
+        async for page in self.iter_pages():
+            for record in page:
+                yield record
+
+    def iter_pages_blocking(self, max_buffered_pages: Optional[int] = None) -> Iterator[List[Dict]]:
+        """
+        Synchronous view of iter_pages() for scripts and threadpool code
+
+        Pages are fetched on a background event loop and passed through a
+        bounded queue, so a slow consumer applies backpressure to the fetch.
+        """
+        pages: queue.Queue = queue.Queue(maxsize=max_buffered_pages or self.concurrency * 2)
+        stop = threading.Event()
+
+        async def hand_off(item) -> bool:
+            # Never block the event loop: other pages are still downloading
+            while not stop.is_set():
+                try:
+                    pages.put_nowait(item)
+                    return True
+                except queue.Full:
+                    await asyncio.sleep(0.05)
+            return False
+
+        async def produce():
+            try:
+                async for page in self.iter_pages():
+                    if not await hand_off(page):
+                        return
+                await hand_off(_DONE)
+            except Exception as e:
+                await hand_off(e)
+
+        thread = threading.Thread(target=asyncio.run, args=(produce(),), daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                item = pages.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+    def iter_records_blocking(self) -> Iterator[Dict]:
+        """Synchronous record-at-a-time view of the paged fetch"""
+        for page in self.iter_pages_blocking():
+            yield from page
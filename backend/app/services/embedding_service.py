@@ -3,27 +3,63 @@ Embedding generation service using sentence-transformers
 Fast CPU-friendly embeddings for temporal drift analysis
 """
 import logging
-from typing import List, Optional
+import threading
+from typing import Any, Dict, List, Optional
 import numpy as np
 
+from app.services.model_residency import MB, PeakRSSMonitor, get_residency_manager, process_rss_bytes
+
 logger = logging.getLogger(__name__)
 
+# One resident copy per model name, shared by every EmbeddingService instance
+_shared_models: Dict[str, Any] = {}
+_shared_lock = threading.Lock()
+
+
+def _unload_shared(model_name: str):
+    with _shared_lock:
+        _shared_models.pop(model_name, None)
+
 
 class EmbeddingService:
     """Generate embeddings using sentence-transformers"""
     
     def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
         self.model_name = model_name
-        self.model = None
         self.embedding_dim = 384  # MiniLM dimension
+        self.residency_name = f"embedding:{model_name}"
+        get_residency_manager().register(
+            self.residency_name,
+            lambda: _unload_shared(model_name),
+            estimated_bytes=300 * MB
+        )
+    
+    @property
+    def model(self):
+        return _shared_models.get(self.model_name)
     
     def load_model(self):
-        """Lazy load the embedding model"""
-        if self.model is None:
+        """Lazy load the embedding model (shared across instances, unloaded when idle)"""
+        residency = get_residency_manager()
+        residency.touch(self.residency_name)
+        if self.model is not None:
+            return
+        
+        with _shared_lock:
+            if self.model_name in _shared_models:
+                return
             try:
                 from sentence_transformers import SentenceTransformer
+                residency.admit(self.residency_name)
                 logger.info(f"Loading embedding model: {self.model_name}")
-                self.model = SentenceTransformer(self.model_name)
+                with PeakRSSMonitor() as monitor:
+                    _shared_models[self.model_name] = SentenceTransformer(self.model_name)
+                rss_after = process_rss_bytes()
+                residency.loaded(
+                    self.residency_name,
+                    rss_after - monitor.baseline if monitor.baseline is not None and rss_after is not None else None,
+                    peak_bytes=monitor.growth_bytes
+                )
                 logger.info("Embedding model loaded successfully")
             except Exception as e:
                 logger.error(f"Error loading embedding model: {e}")
@@ -44,7 +80,8 @@ class EmbeddingService:
                 return None
             
             self.load_model()
-            embedding = self.model.encode(text, convert_to_numpy=True)
+            with get_residency_manager().use(self.residency_name):
+                embedding = self.model.encode(text, convert_to_numpy=True)
             return embedding.tolist()
             
         except Exception as e:
@@ -78,12 +115,13 @@ class EmbeddingService:
                 return [None] * len(texts)
             
             # Generate embeddings in batches
-            embeddings = self.model.encode(
-                valid_texts,
-                batch_size=batch_size,
-                show_progress_bar=True,
-                convert_to_numpy=True
-            )
+            with get_residency_manager().use(self.residency_name):
+                embeddings = self.model.encode(
+                    valid_texts,
+                    batch_size=batch_size,
+                    show_progress_bar=True,
+                    convert_to_numpy=True
+                )
             
             return [emb.tolist() for emb in embeddings]
             
@@ -0,0 +1,149 @@
+"""
+Granite response cache - exact-match cache for deterministic analyses
+
+A response is only reusable when generation is deterministic: greedy decoding
+(temperature 0) or an explicit seed. The key covers everything that shapes
+the output: model, normalized query, the ordered context chunks (id and text
+hash), max_tokens, temperature and seed. Entries live in Postgres
+(granite_response_cache) so they survive restarts and are shared by workers;
+the least recently used entries are evicted beyond max_entries.
+"""
+import hashlib
+import json
+import logging
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.core.database import LocalSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Unicode-normalize and collapse whitespace (case is kept: it reaches the model)"""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', query)).strip()
+
+
+def is_cacheable(temperature: float, seed: Optional[int]) -> bool:
+    return temperature == 0 or seed is not None
+
+
+def make_cache_key(
+    model_name: str,
+    query: str,
+    context_chunks: List[Dict[str, Any]],
+    max_tokens: int,
+    temperature: float,
+    seed: Optional[int]
+) -> str:
+    """SHA-256 over every input that determines a deterministic generation"""
+    payload = {
+        'model': model_name,
+        'query': normalize_query(query),
+        'chunks': [
+            [str(chunk.get('id')), hashlib.sha256((chunk.get('text') or '').encode()).hexdigest()]
+            for chunk in context_chunks
+        ],
+        'max_tokens': max_tokens,
+        'temperature': temperature,
+        'seed': seed
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class GraniteResponseCache:
+    """Postgres-backed, size-bounded LRU cache of analysis results"""
+
+    def __init__(self, max_entries: int = 5000, enabled: bool = True):
+        self.max_entries = max(1, max_entries)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result and mark it recently used
+
+        Returns:
+            Dict with the stored 'response' and 'created_at', or None on a miss
+        """
+        db = LocalSessionLocal()
+        try:
+            row = db.execute(text("""
+                UPDATE granite_response_cache
+                SET hit_count = hit_count + 1, last_hit_at = NOW()
+                WHERE cache_key = :cache_key
+                RETURNING response, created_at
+            """), {'cache_key': cache_key}).fetchone()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Granite response cache lookup failed: {e}")
+            return None
+        finally:
+            db.close()
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {'response': row.response, 'created_at': row.created_at}
+
+    def put(self, cache_key: str, model_name: str, response: Dict[str, Any]):
+        """Store a result and evict least recently used entries beyond max_entries"""
+        payload = json.dumps(response, default=str)
+        db = LocalSessionLocal()
+        try:
+            db.execute(text("""
+                INSERT INTO granite_response_cache (cache_key, model_name, response, size_bytes)
+                VALUES (:cache_key, :model_name, CAST(:response AS jsonb), :size_bytes)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    response = EXCLUDED.response,
+                    size_bytes = EXCLUDED.size_bytes,
+                    last_hit_at = NOW()
+            """), {
+                'cache_key': cache_key,
+                'model_name': model_name,
+                'response': payload,
+                'size_bytes': len(payload)
+            })
+            db.execute(text("""
+                DELETE FROM granite_response_cache
+                WHERE cache_key IN (
+                    SELECT cache_key FROM granite_response_cache
+                    ORDER BY last_hit_at DESC
+                    OFFSET :max_entries
+                )
+            """), {'max_entries': self.max_entries})
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Granite response cache store failed: {e}")
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        db = LocalSessionLocal()
+        try:
+            row = db.execute(text("""
+                SELECT COUNT(*) AS entries, COALESCE(SUM(size_bytes), 0) AS size_bytes
+                FROM granite_response_cache
+            """)).fetchone()
+            entries, size_bytes = row.entries, row.size_bytes
+        except Exception as e:
+            logger.warning(f"Granite response cache stats failed: {e}")
+            entries, size_bytes = None, None
+        finally:
+            db.close()
+
+        return {
+            'enabled': self.enabled,
+            'entries': entries,
+            'size_bytes': size_bytes,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses
+        }
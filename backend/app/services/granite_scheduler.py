@@ -0,0 +1,222 @@
+"""
+Batching inference scheduler for the Granite model
+
+Requests are queued and picked up by one dedicated worker thread, which
+groups compatible requests (same generation parameters, similar prompt
+length so left-padding stays cheap) into a single model.generate call and
+resolves each caller's future. While the model is busy new requests keep
+queueing, so under load every generate call carries a full batch instead of
+requests serializing one by one or running concurrently and competing for
+memory.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Generation callback: (prompts, max_new_tokens, temperature, **options) -> one
+# result per prompt, each a dict with at least 'text' and 'new_tokens'
+BatchGenerator = Callable[..., List[Dict[str, Any]]]
+
+
+@dataclass
+class InferenceRequest:
+    """One queued generation request"""
+    prompt: str
+    prompt_tokens: int
+    max_new_tokens: int
+    temperature: float
+    options: Dict[str, Any] = field(default_factory=dict)  # extra generate kwargs (streamer, stopping criteria)
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def batch_key(self) -> Tuple[int, float]:
+        return (self.max_new_tokens, self.temperature)
+
+
+class GraniteBatchScheduler:
+    """Queue + worker thread that runs compatible requests as one batch"""
+
+    def __init__(
+        self,
+        generate_batch: BatchGenerator,
+        max_batch_size: int = 4,
+        max_wait_ms: float = 20.0,
+        max_padding_ratio: float = 0.3,
+        metrics_window: int = 50
+    ):
+        """
+        Args:
+            generate_batch: Runs one batched generate call
+            max_batch_size: Most requests per generate call
+            max_wait_ms: How long a lone request waits for batch partners
+            max_padding_ratio: Largest share of a batch's prompt width that
+                may be padding ((longest - shortest) / longest)
+            metrics_window: Batches kept for recent throughput figures
+        """
+        self.generate_batch = generate_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.max_padding_ratio = max_padding_ratio
+
+        self._pending: deque = deque()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._batches = 0
+        self._requests = 0
+        self._failed = 0
+        self._tokens = 0
+        self._generation_seconds = 0.0
+        self._last_batch_size = 0
+        self._recent: deque = deque(maxlen=metrics_window)  # (batch_size, tokens, seconds)
+        self._metrics_lock = threading.Lock()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._worker, name='granite-batch-worker', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def submit(
+        self,
+        prompt: str,
+        prompt_tokens: int,
+        max_new_tokens: int,
+        temperature: float,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Future:
+        """
+        Queue a prompt for generation
+
+        Requests with options (e.g. a streamer) are per-request by nature and
+        always run as a batch of one.
+
+        Returns:
+            Future resolving to the generate_batch result for this prompt,
+            plus 'batch_size' and 'queue_wait_seconds'
+        """
+        request = InferenceRequest(prompt, prompt_tokens, max_new_tokens, temperature, options or {})
+        with self._cond:
+            self._pending.append(request)
+            self._cond.notify()
+        self.start()
+        return request.future
+
+    # Worker
+
+    def _fits(self, batch: List[InferenceRequest], candidate: InferenceRequest) -> bool:
+        if candidate.options or batch[0].options or candidate.batch_key != batch[0].batch_key:
+            return False
+        lengths = [r.prompt_tokens for r in batch] + [candidate.prompt_tokens]
+        longest = max(lengths)
+        return longest == 0 or (longest - min(lengths)) / longest <= self.max_padding_ratio
+
+    def _take_compatible(self, batch: List[InferenceRequest]):
+        """Move queued requests that fit the batch out of the queue (oldest first)"""
+        remaining = deque()
+        while self._pending:
+            request = self._pending.popleft()
+            if len(batch) < self.max_batch_size and self._fits(batch, request):
+                batch.append(request)
+            else:
+                remaining.append(request)
+        self._pending = remaining
+
+    def _next_batch(self) -> List[InferenceRequest]:
+        with self._cond:
+            while not self._pending and not self._stop.is_set():
+                self._cond.wait(timeout=0.5)
+            if self._stop.is_set():
+                return []
+
+            batch = [self._pending.popleft()]
+            self._take_compatible(batch)
+
+            # Give a short window for partners to arrive before starting
+            deadline = batch[0].enqueued_at + self.max_wait
+            while len(batch) < self.max_batch_size and not batch[0].options and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+                self._take_compatible(batch)
+
+        # Drop requests whose callers already gave up
+        return [r for r in batch if r.future.set_running_or_notify_cancel()]
+
+    def _run_batch(self, batch: List[InferenceRequest]):
+        prompts = [r.prompt for r in batch]
+        max_new_tokens, temperature = batch[0].batch_key
+        started = time.monotonic()
+
+        try:
+            results = self.generate_batch(prompts, max_new_tokens, temperature, **batch[0].options)
+        except Exception as e:
+            logger.error(f"Granite batch of {len(batch)} failed: {e}")
+            with self._metrics_lock:
+                self._failed += len(batch)
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        elapsed = time.monotonic() - started
+        tokens = sum(r.get('new_tokens', 0) for r in results)
+        with self._metrics_lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._tokens += tokens
+            self._generation_seconds += elapsed
+            self._last_batch_size = len(batch)
+            self._recent.append((len(batch), tokens, elapsed))
+
+        logger.info(
+            f"Granite batch: {len(batch)} requests, {tokens} tokens in {elapsed:.2f}s "
+            f"({tokens / elapsed if elapsed else 0:.1f} tokens/s)"
+        )
+        for request, result in zip(batch, results):
+            request.future.set_result({
+                **result,
+                'batch_size': len(batch),
+                'queue_wait_seconds': round(started - request.enqueued_at, 3)
+            })
+
+    def _worker(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._run_batch(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queue_depth = len(self._pending)
+        with self._metrics_lock:
+            recent_batches = len(self._recent)
+            recent_tokens = sum(t for _, t, _ in self._recent)
+            recent_seconds = sum(s for _, _, s in self._recent)
+            return {
+                'queue_depth': queue_depth,
+                'worker_alive': self._thread is not None and self._thread.is_alive(),
+                'max_batch_size': self.max_batch_size,
+                'batches': self._batches,
+                'requests': self._requests,
+                'failed': self._failed,
+                'last_batch_size': self._last_batch_size,
+                'mean_batch_size': round(self._requests / self._batches, 2) if self._batches else 0.0,
+                'recent_mean_batch_size': round(sum(b for b, _, _ in self._recent) / recent_batches, 2) if recent_batches else 0.0,
+                'tokens_generated': self._tokens,
+                'tokens_per_second': round(self._tokens / self._generation_seconds, 2) if self._generation_seconds else 0.0,
+                'recent_tokens_per_second': round(recent_tokens / recent_seconds, 2) if recent_seconds else 0.0
+            }
@@ -0,0 +1,135 @@
+"""
+Granite semantic cache - reuse answers to near-duplicate questions
+
+Every generated analysis is logged to inference_logs with its query
+embedding (all-MiniLM-L6-v2, 384 dims) and a hash of the context it was
+given. A new query is embedded and compared against recent generated
+answers from the same model over the same source set; when the closest one
+is similar enough its prediction is returned instead of running Granite.
+
+Only rows that were actually generated (inference_time_ms > 0) are
+candidates, so a cached answer is never re-served for a query that is only
+similar to an earlier cache hit.
+"""
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.core.database import LocalSessionLocal
+from app.services.embedding_service import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+
+def source_set_hash(context_chunks: List[Dict[str, Any]]) -> str:
+    """SHA-256 of the context chunks (ids and text), independent of their order"""
+    sources = sorted(
+        [str(chunk.get('id')), hashlib.sha256((chunk.get('text') or '').encode()).hexdigest()]
+        for chunk in context_chunks
+    )
+    return hashlib.sha256(json.dumps(sources).encode()).hexdigest()
+
+
+def to_pgvector(embedding: List[float]) -> str:
+    return '[' + ','.join(f'{x:.7g}' for x in embedding) + ']'
+
+
+class GraniteSemanticCache:
+    """Nearest-neighbour lookup over logged query embeddings"""
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_age_hours: float = 168,
+        enabled: bool = True,
+        embedding_service: Optional[EmbeddingService] = None
+    ):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a cached answer to be reused
+            max_age_hours: Only answers logged within this window are candidates
+            enabled: Whether lookups run at all
+            embedding_service: Query embedder (all-MiniLM-L6-v2 by default)
+        """
+        self.threshold = threshold
+        self.max_age_hours = max_age_hours
+        self.enabled = enabled
+        self.embeddings = embedding_service or EmbeddingService()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0  # failed lookups, also counted as misses
+
+    def embed(self, query: str) -> Optional[List[float]]:
+        embedding = self.embeddings.generate_embedding(query)
+        if embedding is None:
+            # No embedding means no lookup; count it like a failed one
+            self.misses += 1
+            self.errors += 1
+        return embedding
+
+    def lookup(
+        self,
+        embedding: List[float],
+        model_version: str,
+        sources_hash: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find the most similar generated answer for the same model and sources
+
+        Returns:
+            Dict with inference_id, query, prediction, created_at and
+            similarity, or None when nothing passes the threshold
+        """
+        db = LocalSessionLocal()
+        try:
+            # The btree filter leaves a handful of rows, so distances are exact
+            row = db.execute(text("""
+                SELECT inference_id, query, prediction, created_at,
+                       1 - (query_embedding <=> CAST(:embedding AS vector)) AS similarity
+                FROM inference_logs
+                WHERE model_version = :model_version
+                  AND source_set_hash = :sources_hash
+                  AND query_embedding IS NOT NULL
+                  AND prediction IS NOT NULL
+                  AND inference_time_ms > 0
+                  AND created_at > NOW() - (:max_age_hours * INTERVAL '1 hour')
+                ORDER BY query_embedding <=> CAST(:embedding AS vector)
+                LIMIT 1
+            """), {
+                'embedding': to_pgvector(embedding),
+                'model_version': model_version,
+                'sources_hash': sources_hash,
+                'max_age_hours': self.max_age_hours
+            }).fetchone()
+        except Exception as e:
+            logger.warning(f"Granite semantic cache lookup failed: {e}")
+            self.misses += 1
+            self.errors += 1
+            return None
+        finally:
+            db.close()
+
+        if row is None or row.similarity < self.threshold:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {
+            'inference_id': row.inference_id,
+            'query': row.query,
+            'prediction': row.prediction,
+            'created_at': row.created_at,
+            'similarity': round(float(row.similarity), 4)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'threshold': self.threshold,
+            'max_age_hours': self.max_age_hours,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors
+        }
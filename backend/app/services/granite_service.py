@@ -5,15 +5,101 @@ This service manages IBM Granite model loading, inference, and integration
 with the provenance system for academically rigorous AI outputs.
 """
 
+import asyncio
+import copy
 import logging
-from typing import Optional, Dict, Any, List
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, AsyncIterator, Tuple
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+from transformers import (
+    AutoModelForCausalLM,
+    AutoTokenizer,
+    BitsAndBytesConfig,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextStreamer,
+)
 from datetime import datetime
 import os
 
+from app.services.context_packer import PackedContext, pack_context
+from app.services.granite_scheduler import GraniteBatchScheduler
+from app.services.granite_response_cache import GraniteResponseCache, is_cacheable, make_cache_key
+from app.services.granite_semantic_cache import GraniteSemanticCache, source_set_hash
+from app.services.granite_speculative import (
+    DraftProposalCounter,
+    SpeculativeMetrics,
+    request_metrics,
+    vocab_compatible,
+)
+from app.services.model_residency import (
+    MB,
+    ModelMemoryError,
+    PeakRSSMonitor,
+    available_memory_bytes,
+    checkpoint_parameter_count,
+    get_residency_manager,
+    process_rss_bytes,
+)
+
 logger = logging.getLogger(__name__)
 
+# Fixed instruction block that starts every analysis prompt; its KV cache is
+# computed once and reused so only sources and question are prefilled
+PROMPT_PREAMBLE = """You are an expert in design methods research, analyzing historical literature from 1965-1985.
+
+Your task is to analyze the following archival sources to answer a research question about epistemic drift in design theory.
+
+IMPORTANT GUIDELINES:
+1. Base your analysis ONLY on the provided sources
+2. Cite specific sources using [1], [2], etc. when making claims
+3. If sources don't contain enough information, say so explicitly
+4. Focus on epistemological assumptions and theoretical frameworks
+5. Note any shifts in terminology, concepts, or methodological approaches
+
+SOURCES:
+"""
+
+
+@dataclass
+class _CacheContext:
+    """What a request's result is cached and logged under"""
+    sources_hash: str
+    key: Optional[str] = None  # exact response cache key (deterministic requests only)
+    embedding: Optional[List[float]] = None  # query embedding for the semantic cache
+
+
+class _AsyncTextStreamer(TextStreamer):
+    """TextStreamer that hands decoded text to an asyncio queue from the generate thread"""
+    
+    def __init__(self, tokenizer, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        self.loop = loop
+        self.queue = queue
+    
+    def on_finalized_text(self, text: str, stream_end: bool = False):
+        if text:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, text)
+
+
+class _CancelledCriteria(StoppingCriteria):
+    """Stop generation as soon as the cancel event is set (client went away)"""
+    
+    def __init__(self, cancel: threading.Event):
+        self.cancel = cancel
+    
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.cancel.is_set(), dtype=torch.bool, device=input_ids.device)
+
+
+# Model lifecycle states reported by /api/granite/health
+STATE_UNLOADED = "unloaded"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
 
 class GraniteService:
     """Service for managing Granite LLM inference with provenance tracking."""
@@ -21,126 +107,881 @@ class GraniteService:
     def __init__(self):
         self.model = None
         self.tokenizer = None
+        self.state = STATE_UNLOADED
+        self.load_stage = None
+        self.load_progress = 0.0
+        self.load_error = None
+        self.load_started_at = None
+        self.load_seconds = None
+        self._load_thread = None
+        self._load_lock = threading.Lock()
+        self.load_retry_after = int(os.getenv("GRANITE_LOAD_RETRY_AFTER_SECONDS", "30"))
+        self.evicted = False
         self.model_name = os.getenv("GRANITE_MODEL_PATH", "ibm-granite/granite-3.1-8b-instruct")
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # auto: bitsandbytes 8-bit on CUDA, torch dynamic int8 on CPU; or bnb8bit, int8, none
+        self.quantization = os.getenv("GRANITE_QUANTIZATION", "auto").lower()
+        # From the safetensors headers when the checkpoint is on disk; sizes the first load
+        self.checkpoint_parameters = checkpoint_parameter_count(self.model_name)
+        self.residency = get_residency_manager()
+        self.residency.register(
+            "granite",
+            self.unload_model,
+            estimated_bytes=self._estimate_load_bytes(self._quantization_mode(check_memory=False))
+        )
+        self.quantized = "none"
+        self.model_load_rss_bytes = None
+        self.model_load_peak_bytes = None
         self.max_new_tokens = int(os.getenv("GRANITE_MAX_TOKENS", "512"))
         self.temperature = float(os.getenv("GRANITE_TEMPERATURE", "0.7"))
+        self.max_batch_size = int(os.getenv("GRANITE_MAX_BATCH_SIZE", "4"))
+        self.batch_wait_ms = float(os.getenv("GRANITE_BATCH_WAIT_MS", "20"))
+        self.max_padding_ratio = float(os.getenv("GRANITE_MAX_PADDING_RATIO", "0.3"))
+        self.scheduler = GraniteBatchScheduler(
+            self._generate_batch,
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=self.batch_wait_ms,
+            max_padding_ratio=self.max_padding_ratio
+        )
+        self.prefix_cache_enabled = os.getenv("GRANITE_PREFIX_CACHE", "true").lower() == "true"
+        # Speculative decoding: small same-tokenizer draft model, e.g. ibm-granite/granite-3.1-1b-a400m-instruct
+        self.draft_model_name = os.getenv("GRANITE_DRAFT_MODEL", "")
+        self.draft_tokens = int(os.getenv("GRANITE_DRAFT_TOKENS", "5"))
+        self.speculative_enabled = os.getenv("GRANITE_SPECULATIVE", "true").lower() == "true"
+        self.draft_model = None
+        self._draft_counter = None
+        self.speculative_metrics = SpeculativeMetrics()
+        self._prefix_ids = None
+        self._prefix_cache = None
+        self._prefix_lock = threading.Lock()
+        self.response_cache = GraniteResponseCache(
+            max_entries=int(os.getenv("GRANITE_RESPONSE_CACHE_MAX_ENTRIES", "5000")),
+            enabled=os.getenv("GRANITE_RESPONSE_CACHE", "true").lower() == "true"
+        )
+        self.semantic_cache = GraniteSemanticCache(
+            threshold=float(os.getenv("GRANITE_SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            max_age_hours=float(os.getenv("GRANITE_SEMANTIC_CACHE_MAX_AGE_HOURS", "168")),
+            enabled=os.getenv("GRANITE_SEMANTIC_CACHE", "true").lower() == "true"
+        )
         
     def load_model(self) -> bool:
         """
-        Load Granite model with 8-bit quantization for memory efficiency.
+        Load Granite model, quantized according to GRANITE_QUANTIZATION.
+        
+        Blocks for minutes; the API uses start_loading to run this on a
+        background thread. State moves to loading, then ready or failed.
+        
+        On CUDA the default is bitsandbytes 8-bit; on CPU it is torch dynamic
+        int8, which stores Linear weights as int8 so the model stays resident
+        in a fraction of its fp32 footprint. For int8 the checkpoint is loaded
+        in bf16 and quantized layer by layer, so the full fp32 model is never
+        materialized.
         
         Returns:
             bool: True if model loaded successfully, False otherwise
         """
+        self.state = STATE_LOADING
+        self.load_error = None
+        self.load_started_at = self.load_started_at or datetime.now()
+        self._set_stage("starting", 0.0)
+        monitor = PeakRSSMonitor()
         try:
             logger.info(f"Loading Granite model: {self.model_name}")
             logger.info(f"Device: {self.device}")
             
+            if self.checkpoint_parameters is None:
+                # Not on disk yet: size it from the Hub's safetensors metadata
+                self.checkpoint_parameters = checkpoint_parameter_count(self.model_name, allow_network=True)
+            
+            mode = self._quantization_mode()
+            logger.info(f"Quantization: {mode}")
+            self.residency.register("granite", self.unload_model, estimated_bytes=self._estimate_load_bytes(mode))
+            self.residency.admit("granite")
+            monitor.start()
+            
             # Configure 8-bit quantization for memory efficiency
             quantization_config = BitsAndBytesConfig(
                 load_in_8bit=True,
                 llm_int8_threshold=6.0,
                 llm_int8_has_fp16_weight=False,
-            ) if self.device == "cuda" else None
+            ) if mode == "bnb8bit" else None
             
             # Load tokenizer
+            self._set_stage("tokenizer", 0.05)
             logger.info("Loading tokenizer...")
             self.tokenizer = AutoTokenizer.from_pretrained(
                 self.model_name,
                 trust_remote_code=True
             )
+            # Batched prompts are left-padded so every row's new tokens start at the same index
+            self.tokenizer.padding_side = "left"
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
             
             # Load model
+            self._set_stage("weights", 0.1)
             logger.info("Loading model (this may take a few minutes)...")
             model_kwargs = {
                 "trust_remote_code": True,
-                "torch_dtype": torch.float16 if self.device == "cuda" else torch.float32,
+                "torch_dtype": self._load_dtype(mode),
+                # Stream weights in instead of materializing a random-init copy first
+                "low_cpu_mem_usage": True,
             }
             
             if quantization_config:
                 model_kwargs["quantization_config"] = quantization_config
                 model_kwargs["device_map"] = "auto"
             
-            self.model = AutoModelForCausalLM.from_pretrained(
+            model = AutoModelForCausalLM.from_pretrained(
                 self.model_name,
                 **model_kwargs
             )
             
-            if self.device == "cpu" and quantization_config is None:
-                self.model = self.model.to(self.device)
+            if self.device == "cpu":
+                model = model.to(self.device)
+            
+            if mode == "int8":
+                self._set_stage("quantizing", 0.8)
+                logger.info("Quantizing Linear layers to dynamic int8...")
+                model = self._quantize_int8(model)
+            
+            model.eval()
+            self.model = model
+            self.quantized = {"bnb8bit": "8bit", "int8": "int8-dynamic"}.get(mode, "none")
+            
+            if self.draft_model_name:
+                self._set_stage("draft", 0.9)
+                self._load_draft(model_kwargs, mode)
             
-            logger.info(f"✓ Granite model loaded successfully on {self.device}")
+            monitor.stop()
+            rss_after = process_rss_bytes()
+            if monitor.baseline is not None and rss_after is not None:
+                self.model_load_rss_bytes = rss_after - monitor.baseline
+            self.model_load_peak_bytes = monitor.growth_bytes
+            
+            self.residency.loaded(
+                "granite",
+                self.model_load_rss_bytes,
+                peak_bytes=self.model_load_peak_bytes,
+                quantized=self.quantized
+            )
+            self._set_stage("ready", 1.0)
+            self.state = STATE_READY
+            self.evicted = False
+            logger.info(f"✓ Granite model loaded successfully on {self.device} ({self.quantized})")
             return True
             
         except Exception as e:
             logger.error(f"Failed to load Granite model: {str(e)}")
+            self.load_error = str(e)
+            self.state = STATE_FAILED
             return False
+        finally:
+            monitor.stop()
+            self.load_seconds = round((datetime.now() - self.load_started_at).total_seconds(), 1)
+            self.load_started_at = None
+    
+    def _load_dtype(self, mode: str):
+        """dtype the checkpoint is materialized in, before any quantization"""
+        if self.device == "cuda":
+            return torch.float16
+        return torch.bfloat16 if mode == "int8" else torch.float32
+    
+    def _estimate_load_bytes(self, mode: str) -> int:
+        """
+        Admission estimate for the first load, before its peak has been measured.
+        
+        GRANITE_ESTIMATED_MB if set; otherwise the checkpoint's size in the
+        dtype it is loaded in (fp32 unless quantizing), or 0 when the
+        parameter count is not known yet.
+        """
+        override = os.getenv("GRANITE_ESTIMATED_MB")
+        if override:
+            return int(override) * MB
+        if not self.checkpoint_parameters:
+            return 0
+        return self.checkpoint_parameters * (4 if self._load_dtype(mode) == torch.float32 else 2)
+    
+    @staticmethod
+    def _quantize_int8(model):
+        """
+        Replace every Linear layer with a dynamic int8 one, a layer at a time.
+        
+        Each bf16 layer is upcast to fp32 only while it is quantized, so memory
+        stays near the bf16 footprint. Weights become int8 (about 4x smaller
+        than fp32) and matmuls run through int8 kernels. The remaining
+        embeddings and norms are cast to fp32, the activation dtype the int8
+        kernels produce.
+        """
+        names = [name for name, module in model.named_modules() if isinstance(module, torch.nn.Linear)]
+        for name in names:
+            parent_name, _, child = name.rpartition(".")
+            parent = model.get_submodule(parent_name) if parent_name else model
+            layer = getattr(parent, child).float()
+            layer.qconfig = torch.ao.quantization.default_dynamic_qconfig
+            setattr(parent, child, torch.ao.nn.quantized.dynamic.Linear.from_float(layer))
+            del layer
+        return model.float()
+    
+    
+    def _load_draft(self, model_kwargs: Dict[str, Any], mode: str):
+        """
+        Load the speculative decoding draft model; on any problem carry on without it.
+        
+        Args:
+            model_kwargs: from_pretrained arguments used for the target
+            mode: Resolved quantization mode, applied to the draft as well
+        """
+        try:
+            logger.info(f"Loading draft model: {self.draft_model_name}")
+            draft_tokenizer = AutoTokenizer.from_pretrained(self.draft_model_name, trust_remote_code=True)
+            if not vocab_compatible(self.tokenizer, draft_tokenizer):
+                logger.warning(f"Draft model {self.draft_model_name} uses a different vocabulary; speculative decoding off")
+                return
+            
+            draft = AutoModelForCausalLM.from_pretrained(self.draft_model_name, **model_kwargs)
+            if self.device == "cpu":
+                draft = draft.to(self.device)
+            if mode == "int8":
+                draft = self._quantize_int8(draft)
+            draft.eval()
+            draft.generation_config.num_assistant_tokens = self.draft_tokens
+            
+            self._draft_counter = DraftProposalCounter(draft)
+            self.draft_model = draft
+            self.set_speculative(self.speculative_enabled)
+            logger.info(f"✓ Draft model loaded; speculative decoding {'on' if self.speculative_enabled else 'off'}")
+        except Exception as e:
+            logger.warning(f"Failed to load draft model {self.draft_model_name}, continuing without it: {e}")
+            self.draft_model = None
+            self._draft_counter = None
+    
+    @property
+    def _assisted(self) -> bool:
+        return self.speculative_enabled and self.draft_model is not None
+    
+    def set_speculative(self, enabled: bool):
+        """
+        Turn assisted generation on or off (when a draft model is loaded).
+        
+        Assisted generation runs one sequence at a time, so the scheduler's
+        batches shrink to one while it is on.
+        """
+        self.speculative_enabled = enabled
+        self.scheduler.max_batch_size = 1 if self._assisted else max(1, self.max_batch_size)
+    
+    def _set_stage(self, stage: str, progress: float):
+        self.load_stage = stage
+        self.load_progress = progress
+    
+    def start_loading(self) -> bool:
+        """
+        Load the model on a background thread so the event loop stays free.
+        
+        Moves the service to loading, then ready or failed. A no-op while a
+        load is running or the model is already loaded.
+        
+        Returns:
+            bool: True if a new load was started
+        """
+        with self._load_lock:
+            if self.state in (STATE_LOADING, STATE_READY):
+                return False
+            self.state = STATE_LOADING
+            self.load_error = None
+            self.load_started_at = datetime.now()
+            self.load_stage, self.load_progress = "queued", 0.0
+            self._load_thread = threading.Thread(target=self._load_in_background, name="granite-loader", daemon=True)
+            self._load_thread.start()
+            return True
+    
+    def _load_in_background(self):
+        self.load_model()
+        logger.info(f"Granite load finished in {self.load_seconds}s: {self.state}")
+    
+    def unload_model(self):
+        """
+        Drop the model, tokenizer and prefix KV cache to free their memory.
+        
+        Called by the residency manager (idle TTL, memory pressure, admin);
+        the next request starts a background reload.
+        """
+        with self._load_lock:
+            if self.state == STATE_LOADING:
+                raise RuntimeError("Granite is loading; not unloading")
+            self.model = None
+            self.tokenizer = None
+            self.draft_model = None
+            self._draft_counter = None
+            self.set_speculative(self.speculative_enabled)
+            with self._prefix_lock:
+                self._prefix_ids = None
+                self._prefix_cache = None
+            self.state = STATE_UNLOADED
+            self.load_stage = None
+            self.load_progress = 0.0
+            self.evicted = True
+    
+    @property
+    def ready(self) -> bool:
+        return self.state == STATE_READY and self.model is not None
+    
+    def load_status(self) -> Dict[str, Any]:
+        """Lifecycle state, loading stage/progress and the last load error"""
+        status = {
+            "state": self.state,
+            "model_name": self.model_name,
+            "stage": self.load_stage,
+            "progress": self.load_progress,
+            "error": self.load_error,
+            "load_seconds": self.load_seconds
+        }
+        if self.state == STATE_LOADING and self.load_started_at:
+            status["elapsed_seconds"] = round((datetime.now() - self.load_started_at).total_seconds(), 1)
+            # Previous load time as an estimate for clients polling readiness
+            status["expected_seconds"] = self.load_seconds
+        return status
+    
+    def retry_after_seconds(self) -> int:
+        """Seconds a client should wait before retrying while the model loads"""
+        if self.load_seconds and self.load_started_at:
+            remaining = self.load_seconds - (datetime.now() - self.load_started_at).total_seconds()
+            return int(min(max(remaining, 5), 300))
+        return self.load_retry_after
+    
+    def _quantization_mode(self, check_memory: bool = True) -> str:
+        """
+        Resolve GRANITE_QUANTIZATION against the available device.
+        
+        Raises:
+            ModelMemoryError: If int8 is chosen but the bf16 checkpoint it is
+                quantized from would not fit in available memory
+        """
+        mode = self.quantization
+        if mode == "auto":
+            mode = "bnb8bit" if self.device == "cuda" else "int8"
+        elif mode == "bnb8bit" and self.device != "cuda":
+            logger.warning("bitsandbytes 8-bit needs CUDA; using dynamic int8 on CPU")
+            mode = "int8"
+        elif mode == "int8" and self.device != "cpu":
+            logger.warning("Dynamic int8 quantization is CPU-only; loading unquantized")
+            mode = "none"
+        elif mode not in ("bnb8bit", "int8", "none"):
+            logger.warning(f"Unknown GRANITE_QUANTIZATION '{mode}'; loading unquantized")
+            mode = "none"
+        
+        if mode == "int8" and check_memory:
+            needed = self._estimate_load_bytes(mode)
+            available = available_memory_bytes()
+            if needed and available is not None and needed > available:
+                raise ModelMemoryError(
+                    "granite",
+                    f"int8 quantization loads the checkpoint in bf16 first (~{needed // MB} MB) "
+                    f"but only {available // MB} MB is available"
+                )
+        return mode
+    
+    def _get_prefix_cache(self):
+        """Token ids and KV cache of PROMPT_PREAMBLE, computed on first use."""
+        with self._prefix_lock:
+            if self._prefix_cache is None:
+                ids = self.tokenizer(PROMPT_PREAMBLE, return_tensors="pt")["input_ids"]
+                if self.device == "cuda":
+                    ids = ids.to(self.device)
+                with torch.no_grad():
+                    self._prefix_cache = self.model(input_ids=ids, use_cache=True).past_key_values
+                self._prefix_ids = ids[0]
+                logger.info(f"Cached KV for the {ids.shape[1]}-token prompt preamble")
+            return self._prefix_ids, self._prefix_cache
+    
+    def _uses_prefix_cache(self, prompts: List[str]) -> bool:
+        # The draft model would have no matching cache for the preamble
+        return self.prefix_cache_enabled and not self._assisted and all(p.startswith(PROMPT_PREAMBLE) for p in prompts)
+    
+    def _encode(self, prompts: List[str]):
+        """
+        Tokenize a batch, reusing the preamble KV cache when every prompt starts with it.
+        
+        Each prompt is tokenized in full and the cached preamble's ids are
+        sliced off the front, so the ids match an uncached run exactly; if a
+        prompt's leading ids differ from the cached preamble (a token merged
+        across the join) the batch is encoded without the cache. The preamble
+        ids come first in every row and the left-padded suffixes follow, so
+        the padding sits between preamble and suffix (masked out) and the
+        cached preamble lines up with every row.
+        
+        Returns:
+            Tuple of (model inputs, past_key_values or None)
+        """
+        def uncached():
+            inputs = self.tokenizer(prompts, return_tensors="pt", padding=True)
+            return {k: v.to(self.device) for k, v in inputs.items()} if self.device == "cuda" else dict(inputs), None
+        
+        if not self._uses_prefix_cache(prompts):
+            return uncached()
+        
+        prefix_ids, prefix_cache = self._get_prefix_cache()
+        prefix_list = prefix_ids.tolist()
+        prefix_len = len(prefix_list)
+        
+        suffix_ids = []
+        for ids in self.tokenizer(prompts)["input_ids"]:
+            if ids[:prefix_len] != prefix_list:
+                logger.debug("Prompt tokens diverge from the cached preamble; encoding without the prefix cache")
+                return uncached()
+            suffix_ids.append(ids[prefix_len:])
+        
+        suffixes = self.tokenizer.pad({"input_ids": suffix_ids}, return_tensors="pt")
+        suffix_ids = suffixes["input_ids"].to(prefix_ids.device)
+        suffix_mask = suffixes["attention_mask"].to(prefix_ids.device)
+        
+        prefix = prefix_ids.unsqueeze(0).expand(len(prompts), -1)
+        inputs = {
+            "input_ids": torch.cat([prefix, suffix_ids], dim=1),
+            "attention_mask": torch.cat([torch.ones_like(prefix), suffix_mask], dim=1)
+        }
+        
+        # generate() extends the cache in place, so each call gets its own copy
+        cache = copy.deepcopy(prefix_cache)
+        if len(prompts) > 1:
+            cache.batch_repeat_interleave(len(prompts))
+        return inputs, cache
+    
+    def _generate_batch(
+        self,
+        prompts: List[str],
+        max_new_tokens: int,
+        temperature: float,
+        **generate_kwargs
+    ) -> List[Dict[str, Any]]:
+        """
+        Run one model.generate call over a batch of prompts.
+        
+        Args:
+            prompts: Fully built prompts (left-padded together)
+            max_new_tokens: Maximum tokens to generate per prompt
+            temperature: Sampling temperature (0 = greedy)
+            **generate_kwargs: Extra model.generate arguments (streamer,
+                stopping_criteria) and optionally seed for reproducible sampling
+            
+        Returns:
+            One dict per prompt with the generated text and new token count
+        """
+        with self.residency.use("granite"):
+            if self.model is None:
+                raise RuntimeError("Granite model was unloaded; retry once it is loaded again")
+            
+            seed = generate_kwargs.pop("seed", None)
+            if seed is not None:
+                torch.manual_seed(seed)
+            
+            sampling = {"do_sample": True, "temperature": temperature, "top_p": 0.95} if temperature > 0 else {"do_sample": False}
+            
+            assisted = self._assisted and len(prompts) == 1
+            if assisted:
+                generate_kwargs["assistant_model"] = self.draft_model
+                self._draft_counter.reset()
+            
+            def generate(inputs, past_key_values):
+                with torch.no_grad():
+                    return self.model.generate(
+                        **inputs,
+                        past_key_values=past_key_values,
+                        max_new_tokens=max_new_tokens,
+                        pad_token_id=self.tokenizer.pad_token_id,
+                        **sampling,
+                        **generate_kwargs
+                    )
+            
+            used_prefix_cache = self._uses_prefix_cache(prompts)
+            started = time.perf_counter()
+            try:
+                inputs, prefix_cache = self._encode(prompts)
+                outputs = generate(inputs, prefix_cache)
+            except Exception as e:
+                if not used_prefix_cache:
+                    raise
+                # Some architectures/cache types cannot resume from a copied cache
+                logger.warning(f"Prompt prefix cache unusable with this model, disabling it: {e}")
+                self.prefix_cache_enabled = False
+                inputs, _ = self._encode(prompts)
+                outputs = generate(inputs, None)
+            elapsed = time.perf_counter() - started
+            
+            # Everything after the (padded) prompt width is newly generated
+            prompt_width = inputs["input_ids"].shape[1]
+            results = []
+            for row in outputs:
+                new_ids = row[prompt_width:]
+                results.append({
+                    "text": self.tokenizer.decode(new_ids, skip_special_tokens=True).strip(),
+                    "new_tokens": int((new_ids != self.tokenizer.pad_token_id).sum())
+                })
+            
+            new_tokens = sum(r["new_tokens"] for r in results)
+            if assisted:
+                proposed, rounds = self._draft_counter.proposed, self._draft_counter.rounds
+                results[0]["speculative"] = request_metrics(new_tokens, proposed, rounds, elapsed)
+                self.speculative_metrics.record(True, new_tokens, elapsed, proposed, rounds)
+            else:
+                self.speculative_metrics.record(False, new_tokens, elapsed)
+            return results
+    
+    def _resolve_params(self, max_tokens: Optional[int], temperature: Optional[float]):
+        return (
+            max_tokens or self.max_new_tokens,
+            self.temperature if temperature is None else temperature
+        )
+    
+    def _build_result(
+        self,
+        query: str,
+        packed: PackedContext,
+        generation: Dict[str, Any],
+        inference_time: float,
+        end_time: datetime
+    ) -> Dict[str, Any]:
+        return {
+            "analysis": generation["text"],
+            "query": query,
+            "num_context_chunks": len(packed.chunks),
+            "inference_time_seconds": inference_time,
+            "model": self.model_name,
+            "timestamp": end_time.isoformat(),
+            "context_chunk_ids": [chunk.get("id") for chunk in packed.chunks],
+            "context_packing": packed.summary(),
+            "generated_tokens": generation["new_tokens"],
+            "batch_size": generation.get("batch_size", 1),
+            "queue_wait_seconds": generation.get("queue_wait_seconds", 0.0),
+            "speculative": generation.get("speculative"),
+            "cache": None
+        }
+    
+    async def _check_caches(
+        self,
+        query: str,
+        context_chunks: List[Dict[str, Any]],
+        max_new_tokens: int,
+        temperature: float,
+        seed: Optional[int],
+        use_cache: bool
+    ) -> Tuple[Optional[Dict[str, Any]], _CacheContext]:
+        """
+        Look the request up in the exact response cache, then the semantic cache
+        
+        Returns:
+            (cached result or None, cache context to store and log a fresh result with)
+        """
+        ctx = _CacheContext(sources_hash=source_set_hash(context_chunks))
+        if not use_cache:
+            return None, ctx
+        
+        if self.response_cache.enabled and is_cacheable(temperature, seed):
+            ctx.key = make_cache_key(self.model_name, query, context_chunks, max_new_tokens, temperature, seed)
+            entry = await asyncio.to_thread(self.response_cache.get, ctx.key)
+            if entry is not None:
+                result = dict(entry["response"])
+                result["cache"] = {
+                    "type": "exact",
+                    "key": ctx.key,
+                    "created_at": entry["created_at"].isoformat() if entry["created_at"] else None
+                }
+                logger.info(f"✓ Granite response cache hit {ctx.key[:12]} for query: {query[:100]}")
+                return await self._serve_cached(result, query, context_chunks, ctx), ctx
+        
+        if self.semantic_cache.enabled:
+            ctx.embedding = await asyncio.to_thread(self.semantic_cache.embed, query)
+            if ctx.embedding is not None:
+                match = await asyncio.to_thread(
+                    self.semantic_cache.lookup, ctx.embedding, self.model_name, ctx.sources_hash
+                )
+                if match is not None:
+                    result = {
+                        "analysis": match["prediction"],
+                        "model": self.model_name,
+                        "num_context_chunks": len(context_chunks),
+                        "context_chunk_ids": [chunk.get("id") for chunk in context_chunks],
+                        "generated_tokens": None,
+                        "cache": {
+                            "type": "semantic",
+                            "inference_id": match["inference_id"],
+                            "matched_query": match["query"],
+                            "similarity": match["similarity"],
+                            "created_at": match["created_at"].isoformat() if match["created_at"] else None
+                        }
+                    }
+                    logger.info(
+                        f"✓ Granite semantic cache hit {match['inference_id']} "
+                        f"(similarity {match['similarity']}) for query: {query[:100]}"
+                    )
+                    return await self._serve_cached(result, query, context_chunks, ctx), ctx
+        
+        return None, ctx
+    
+    async def _serve_cached(
+        self,
+        result: Dict[str, Any],
+        query: str,
+        context_chunks: List[Dict[str, Any]],
+        ctx: _CacheContext
+    ) -> Dict[str, Any]:
+        """Stamp a cached result for this request and log it with 0 ms generation time"""
+        result.update({
+            "query": query,
+            "inference_time_seconds": 0.0,
+            "timestamp": datetime.now().isoformat(),
+            "batch_size": 0,
+            "queue_wait_seconds": 0.0
+        })
+        result["inference_id"] = await asyncio.to_thread(self._log_inference, result, context_chunks, 0, ctx)
+        return result
+    
+    def _log_inference(
+        self,
+        result: Dict[str, Any],
+        context_chunks: List[Dict[str, Any]],
+        inference_time_ms: int,
+        ctx: _CacheContext
+    ) -> Optional[str]:
+        """Record the analysis in InferenceLog; logging failures never fail the request"""
+        from app.services.provenance_service import ProvenanceService
+        
+        try:
+            return ProvenanceService().log_inference(
+                query=result["query"],
+                prediction=result["analysis"],
+                model_version=self.model_name,
+                top_k_chunks=[
+                    {"chunk_id": str(chunk.get("id")), "excerpt": (chunk.get("text") or "")[:200]}
+                    for chunk in context_chunks
+                ],
+                inference_time_ms=inference_time_ms,
+                query_embedding=ctx.embedding,
+                source_set_hash=ctx.sources_hash
+            )
+        except Exception as e:
+            logger.warning(f"Could not log Granite inference: {e}")
+            return None
+    
+    async def _store_and_log(
+        self,
+        ctx: _CacheContext,
+        result: Dict[str, Any],
+        context_chunks: List[Dict[str, Any]],
+        cacheable: bool = True
+    ):
+        """Store a freshly generated result in the response cache and log it"""
+        if ctx.key is not None and cacheable:
+            await asyncio.to_thread(self.response_cache.put, ctx.key, self.model_name, result)
+        if not cacheable:
+            # Truncated output must not become a semantic cache candidate either
+            ctx.embedding = None
+        # Milliseconds, at least 1 so generated rows stay distinguishable from cache hits
+        inference_time_ms = max(1, int(result["inference_time_seconds"] * 1000))
+        result["inference_id"] = await asyncio.to_thread(
+            self._log_inference, result, context_chunks, inference_time_ms, ctx
+        )
     
     def generate_analysis(
         self,
         query: str,
         context_chunks: List[Dict[str, Any]],
         max_tokens: Optional[int] = None,
-        temperature: Optional[float] = None
+        temperature: Optional[float] = None,
+        seed: Optional[int] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Generate analysis using Granite model with retrieved context.
         
+        Blocking counterpart of generate_analysis_async for scripts and
+        worker threads: it runs the same cache lookups, batching scheduler
+        and InferenceLog path on a private event loop while this thread
+        waits. Never call it from the event loop.
+        
         Args:
             query: Research question or analytical query
             context_chunks: List of retrieved document chunks with metadata
             max_tokens: Maximum tokens to generate (default from config)
-            temperature: Sampling temperature (default from config)
+            temperature: Sampling temperature (default from config, 0 = greedy)
+            seed: Sampling seed for reproducible output (runs unbatched)
+            use_cache: Whether cached answers may be returned
+            
+        Returns:
+            Dict containing analysis text, metadata, and timing info
+        """
+        return asyncio.run(self.generate_analysis_async(
+            query,
+            context_chunks,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            seed=seed,
+            use_cache=use_cache
+        ))
+    
+    async def generate_analysis_async(
+        self,
+        query: str,
+        context_chunks: List[Dict[str, Any]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        seed: Optional[int] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Generate analysis through the batching scheduler.
+        
+        The request is queued and generated on the scheduler's worker thread,
+        batched with concurrent requests that share its parameters, so the
+        event loop is never blocked. Deterministic requests (greedy or seeded)
+        are answered from the response cache when an identical one was seen,
+        and near-duplicate questions over the same sources from the semantic
+        cache; the result's cache field says which answered.
+        
+        Args:
+            query: Research question or analytical query
+            context_chunks: List of retrieved document chunks with metadata
+            max_tokens: Maximum tokens to generate (default from config)
+            temperature: Sampling temperature (default from config, 0 = greedy)
+            seed: Sampling seed for reproducible output (runs unbatched)
+            use_cache: Whether cached answers may be returned
             
         Returns:
             Dict containing analysis text, metadata, and timing info
         """
         if self.model is None or self.tokenizer is None:
             raise RuntimeError("Granite model not loaded. Call load_model() first.")
+        # Counts as use from arrival, so an idle unload cannot race the cache lookups
+        self.residency.touch("granite")
         
         start_time = datetime.now()
+        max_new_tokens, temperature = self._resolve_params(max_tokens, temperature)
+        cached, cache_ctx = await self._check_caches(
+            query, context_chunks, max_new_tokens, temperature, seed, use_cache
+        )
+        if cached is not None:
+            return cached
         
-        # Build prompt with context
-        prompt = self._build_prompt(query, context_chunks)
+        packed = self._pack_context(query, context_chunks, max_new_tokens)
+        prompt = self._build_prompt(query, packed.chunks)
+        prompt_tokens = len(self.tokenizer(prompt)["input_ids"])
         
-        # Tokenize
-        inputs = self.tokenizer(prompt, return_tensors="pt")
-        if self.device == "cuda":
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-        
-        # Generate
-        logger.info(f"Generating response for query: {query[:100]}...")
-        with torch.no_grad():
-            outputs = self.model.generate(
-                **inputs,
-                max_new_tokens=max_tokens or self.max_new_tokens,
-                temperature=temperature or self.temperature,
-                do_sample=True,
-                top_p=0.95,
-                pad_token_id=self.tokenizer.eos_token_id
-            )
+        future = self.scheduler.submit(
+            prompt,
+            prompt_tokens,
+            max_new_tokens,
+            temperature,
+            options={"seed": seed} if seed is not None else None
+        )
+        generation = await asyncio.wrap_future(future)
+        
+        end_time = datetime.now()
+        inference_time = (end_time - start_time).total_seconds()
         
-        # Decode
-        response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        logger.info(
+            f"✓ Generated {generation['new_tokens']} tokens in {inference_time:.2f}s "
+            f"(batch of {generation['batch_size']}, queued {generation['queue_wait_seconds']:.2f}s)"
+        )
         
-        # Extract only the generated portion (remove prompt)
-        generated_text = response[len(prompt):].strip()
+        result = self._build_result(query, packed, generation, inference_time, end_time)
+        await self._store_and_log(cache_ctx, result, packed.chunks)
+        return result
+    
+    async def stream_analysis(
+        self,
+        query: str,
+        context_chunks: List[Dict[str, Any]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        seed: Optional[int] = None,
+        use_cache: bool = True,
+        cancel: Optional[threading.Event] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate analysis and yield text as tokens are produced.
+        
+        Yields {"type": "token", "text": ...} frames, then one {"type": "done"}
+        frame with the usual result metadata plus time to first token. Setting
+        cancel (or closing this generator) stops generation at the next token.
+        A cache hit is sent as a single token frame.
+        
+        Args:
+            query: Research question or analytical query
+            context_chunks: List of retrieved document chunks with metadata
+            max_tokens: Maximum tokens to generate (default from config)
+            temperature: Sampling temperature (default from config, 0 = greedy)
+            seed: Sampling seed for reproducible output
+            use_cache: Whether cached answers may be returned
+            cancel: Event that aborts generation when set
+        """
+        if self.model is None or self.tokenizer is None:
+            raise RuntimeError("Granite model not loaded. Call load_model() first.")
+        self.residency.touch("granite")
+        
+        start_time = datetime.now()
+        max_new_tokens, temperature = self._resolve_params(max_tokens, temperature)
+        cached, cache_ctx = await self._check_caches(
+            query, context_chunks, max_new_tokens, temperature, seed, use_cache
+        )
+        if cached is not None:
+            yield {"type": "token", "text": cached["analysis"]}
+            yield {"type": "done", **cached, "time_to_first_token_seconds": 0.0, "tokens_per_second": None}
+            return
+        
+        packed = self._pack_context(query, context_chunks, max_new_tokens)
+        prompt = self._build_prompt(query, packed.chunks)
+        prompt_tokens = len(self.tokenizer(prompt)["input_ids"])
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancel = cancel or threading.Event()
+        
+        future = self.scheduler.submit(
+            prompt,
+            prompt_tokens,
+            max_new_tokens,
+            temperature,
+            options={
+                "streamer": _AsyncTextStreamer(self.tokenizer, loop, queue),
+                "stopping_criteria": StoppingCriteriaList([_CancelledCriteria(cancel)]),
+                "seed": seed
+            }
+        )
+        # End of stream, including when generation fails or never starts
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(queue.put_nowait, None))
+        
+        first_token_time = None
+        try:
+            while True:
+                text = await queue.get()
+                if text is None:
+                    break
+                if first_token_time is None:
+                    first_token_time = datetime.now()
+                yield {"type": "token", "text": text}
+            
+            generation = await asyncio.wrap_future(future)
+            # A cancelled (truncated) stream must not be cached as the full answer
+            completed = not cancel.is_set()
+        finally:
+            # Consumer finished or went away: stop decoding, or drop the queued request
+            cancel.set()
+            future.cancel()
         
         end_time = datetime.now()
         inference_time = (end_time - start_time).total_seconds()
+        result = self._build_result(query, packed, generation, inference_time, end_time)
+        result["time_to_first_token_seconds"] = (
+            (first_token_time - start_time).total_seconds() if first_token_time else None
+        )
+        result["tokens_per_second"] = round(generation["new_tokens"] / inference_time, 2) if inference_time else 0.0
+        await self._store_and_log(cache_ctx, result, packed.chunks, cacheable=completed)
         
-        logger.info(f"✓ Generated {len(generated_text)} chars in {inference_time:.2f}s")
-        
-        return {
-            "analysis": generated_text,
-            "query": query,
-            "num_context_chunks": len(context_chunks),
-            "inference_time_seconds": inference_time,
-            "model": self.model_name,
-            "timestamp": end_time.isoformat(),
-            "context_chunk_ids": [chunk.get("id") for chunk in context_chunks]
-        }
+        logger.info(
+            f"✓ Streamed {generation['new_tokens']} tokens in {inference_time:.2f}s "
+            f"(first token after {result['time_to_first_token_seconds']}s)"
+        )
+        yield {"type": "done", **result}
     
     def _build_prompt(self, query: str, context_chunks: List[Dict[str, Any]]) -> str:
         """
@@ -154,28 +995,12 @@ class GraniteService:
             Formatted prompt string
         """
         # Format context with citations
-        context_parts = []
-        for i, chunk in enumerate(context_chunks, 1):
-            text = chunk.get("text", "")
-            citation = chunk.get("citation", f"Source {i}")
-            context_parts.append(f"[{i}] {text}\n   Citation: {citation}")
-        
-        context_text = "\n\n".join(context_parts)
+        context_text = "\n\n".join(
+            self._format_chunk(i, chunk) for i, chunk in enumerate(context_chunks, 1)
+        )
         
         # Build prompt following Granite instruction format
-        prompt = f"""You are an expert in design methods research, analyzing historical literature from 1965-1985.
-
-Your task is to analyze the following archival sources to answer a research question about epistemic drift in design theory.
-
-IMPORTANT GUIDELINES:
-1. Base your analysis ONLY on the provided sources
-2. Cite specific sources using [1], [2], etc. when making claims
-3. If sources don't contain enough information, say so explicitly
-4. Focus on epistemological assumptions and theoretical frameworks
-5. Note any shifts in terminology, concepts, or methodological approaches
-
-SOURCES:
-{context_text}
+        prompt = f"""{PROMPT_PREAMBLE}{context_text}
 
 RESEARCH QUESTION:
 {query}
@@ -185,20 +1010,90 @@ ANALYSIS:
         
         return prompt
     
+    @staticmethod
+    def _format_chunk(i: int, chunk: Dict[str, Any]) -> str:
+        citation = chunk.get("citation", f"Source {i}")
+        return f"[{i}] {chunk.get('text', '')}\n   Citation: {citation}"
+    
+    def _count_tokens(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+    
+    def _context_window(self) -> int:
+        """Prompt + generation token limit: GRANITE_CONTEXT_WINDOW, else the model's own"""
+        configured = os.getenv("GRANITE_CONTEXT_WINDOW")
+        if configured:
+            return int(configured)
+        # Tokenizers without a limit report a huge sentinel for model_max_length
+        limits = [
+            getattr(getattr(self.model, "config", None), "max_position_embeddings", None),
+            getattr(self.tokenizer, "model_max_length", None)
+        ]
+        limits = [limit for limit in limits if isinstance(limit, int) and 0 < limit < 1_000_000]
+        return min(limits) if limits else 4096
+    
+    def _pack_context(
+        self,
+        query: str,
+        context_chunks: List[Dict[str, Any]],
+        max_new_tokens: int
+    ) -> PackedContext:
+        """
+        Keep the highest-ranked chunks that fit the window after max_new_tokens.
+        
+        Args:
+            query: Research question (its tokens come out of the budget too)
+            context_chunks: Retrieved chunks, best first
+            max_new_tokens: Tokens reserved for generation
+            
+        Returns:
+            PackedContext with the chunks to put in the prompt
+        """
+        skeleton_tokens = len(self.tokenizer(self._build_prompt(query, []))["input_ids"])
+        budget = self._context_window() - max_new_tokens - skeleton_tokens
+        packed = pack_context(
+            context_chunks,
+            budget,
+            self._count_tokens,
+            self._format_chunk,
+            separator_tokens=self._count_tokens("\n\n")
+        )
+        if packed.truncated_ids or packed.dropped_ids:
+            logger.info(
+                f"Context packed to {packed.used_tokens}/{budget} tokens: "
+                f"truncated {packed.truncated_ids}, dropped {packed.dropped_ids}"
+            )
+        return packed
+    
     def get_model_info(self) -> Dict[str, Any]:
         """
         Get information about the loaded model.
         
         Returns:
-            Dict with model metadata
+            Dict with model metadata, memory use and generation throughput
         """
+        scheduler_stats = self.scheduler.stats()
         return {
             "model_name": self.model_name,
             "device": self.device,
             "loaded": self.model is not None,
+            "state": self.state,
             "max_tokens": self.max_new_tokens,
             "temperature": self.temperature,
-            "quantized": "8bit" if self.device == "cuda" else "none"
+            "quantized": self.quantized,
+            "prefix_cache_enabled": self.prefix_cache_enabled,
+            "prefix_cache_tokens": len(self._prefix_ids) if self._prefix_ids is not None else 0,
+            "memory": {
+                "process_rss_bytes": process_rss_bytes(),
+                "model_load_rss_bytes": self.model_load_rss_bytes,
+                "model_load_peak_bytes": self.model_load_peak_bytes,
+                "cuda_allocated_bytes": torch.cuda.memory_allocated() if self.device == "cuda" else None
+            },
+            "speculative": self.speculative_metrics.stats(
+                self.draft_model_name if self.draft_model is not None else None,
+                self._assisted
+            ),
+            "tokens_per_second": scheduler_stats["tokens_per_second"],
+            "recent_tokens_per_second": scheduler_stats["recent_tokens_per_second"]
         }
 
 
@@ -215,12 +1110,11 @@ def get_granite_service() -> GraniteService:
 
 
 async def initialize_granite():
-    """Initialize Granite service on application startup."""
-    logger.info("Initializing Granite service...")
-    service = get_granite_service()
-    success = service.load_model()
-    if success:
-        logger.info("✓ Granite service ready")
-    else:
-        logger.warning("⚠ Granite service failed to initialize - inference will not be available")
-    return success
+    """
+    Start loading Granite on application startup without blocking it.
+    
+    Returns:
+        bool: True if a background load was started
+    """
+    logger.info("Initializing Granite service in the background...")
+    return get_granite_service().start_loading()
@@ -0,0 +1,111 @@
+"""
+Speculative (assisted) decoding support for Granite
+
+A small draft model from the same tokenizer family proposes a few tokens at
+a time and the target model verifies them in one forward pass, via
+transformers' assisted generation (model.generate(assistant_model=...)).
+Greedy decoding yields exactly the target's output; with sampling,
+transformers applies speculative sampling (accept with min(1, p/q), resample
+rejections from the residual), so the output distribution is the target's.
+
+transformers does not report acceptance, so the draft's generate is wrapped
+to count proposed tokens and verification rounds. Each round contributes the
+accepted draft tokens plus one token from the target, which gives
+accepted = new_tokens - rounds.
+"""
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def vocab_compatible(target_tokenizer, draft_tokenizer) -> bool:
+    """Assisted generation passes token ids between models, so vocabularies must match"""
+    try:
+        return target_tokenizer.get_vocab() == draft_tokenizer.get_vocab()
+    except Exception as e:
+        logger.warning(f"Could not compare draft and target vocabularies: {e}")
+        return False
+
+
+class DraftProposalCounter:
+    """Counts tokens the draft proposes and the rounds the target verifies"""
+
+    def __init__(self, draft_model):
+        self.proposed = 0
+        self.rounds = 0
+        original_generate = draft_model.generate
+
+        def counting_generate(*args, **kwargs):
+            output = original_generate(*args, **kwargs)
+            input_ids = kwargs.get('input_ids', args[0] if args else None)
+            sequences = getattr(output, 'sequences', output)
+            if input_ids is not None:
+                self.proposed += int(sequences.shape[-1] - input_ids.shape[-1])
+            self.rounds += 1
+            return output
+
+        draft_model.generate = counting_generate
+
+    def reset(self):
+        self.proposed = 0
+        self.rounds = 0
+
+
+def request_metrics(new_tokens: int, proposed: int, rounds: int, seconds: float) -> Dict[str, Any]:
+    """Per-request acceptance and speedup figures"""
+    accepted = max(0, min(proposed, new_tokens - rounds))
+    return {
+        'proposed_tokens': proposed,
+        'accepted_tokens': accepted,
+        'acceptance_rate': round(accepted / proposed, 3) if proposed else None,
+        'target_passes': rounds,
+        # Tokens per target forward pass: the speedup over plain decoding if drafting were free
+        'tokens_per_target_pass': round(new_tokens / rounds, 2) if rounds else None,
+        'tokens_per_second': round(new_tokens / seconds, 2) if seconds else None
+    }
+
+
+class SpeculativeMetrics:
+    """Running totals for assisted and plain generation, for the measured speedup"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.assisted_tokens = 0
+        self.assisted_seconds = 0.0
+        self.plain_tokens = 0
+        self.plain_seconds = 0.0
+        self.proposed = 0
+        self.accepted = 0
+        self.rounds = 0
+        self.requests = 0
+
+    def record(self, assisted: bool, new_tokens: int, seconds: float, proposed: int = 0, rounds: int = 0):
+        with self._lock:
+            if not assisted:
+                self.plain_tokens += new_tokens
+                self.plain_seconds += seconds
+                return
+            self.requests += 1
+            self.assisted_tokens += new_tokens
+            self.assisted_seconds += seconds
+            self.proposed += proposed
+            self.accepted += max(0, min(proposed, new_tokens - rounds))
+            self.rounds += rounds
+
+    def stats(self, draft_model: Optional[str], enabled: bool) -> Dict[str, Any]:
+        with self._lock:
+            assisted_tps = self.assisted_tokens / self.assisted_seconds if self.assisted_seconds else None
+            plain_tps = self.plain_tokens / self.plain_seconds if self.plain_seconds else None
+            return {
+                'draft_model': draft_model,
+                'enabled': enabled,
+                'requests': self.requests,
+                'acceptance_rate': round(self.accepted / self.proposed, 3) if self.proposed else None,
+                'tokens_per_target_pass': round(self.assisted_tokens / self.rounds, 2) if self.rounds else None,
+                'assisted_tokens_per_second': round(assisted_tps, 2) if assisted_tps else None,
+                'plain_tokens_per_second': round(plain_tps, 2) if plain_tps else None,
+                # Only meaningful once both modes have run on this process (e.g. the benchmark)
+                'measured_speedup': round(assisted_tps / plain_tps, 2) if assisted_tps and plain_tps else None
+            }
@@ -0,0 +1,83 @@
+"""
+Streaming parser for DDR GraphQL record payloads
+
+Yields records_v1 (or legacy all_media_items) entries one at a time from a
+file-like response body, so memory stays flat regardless of payload size.
+"""
+import logging
+from itertools import islice
+from typing import IO, Dict, Iterable, Iterator, List, Optional
+
+import ijson
+
+logger = logging.getLogger(__name__)
+
+RECORD_KEYS = ('records_v1', 'all_media_items')
+
+
+def iter_graphql_records(
+    fp: IO[bytes],
+    errors: Optional[List[Dict]] = None,
+    keys: Iterable[str] = RECORD_KEYS
+) -> Iterator[Dict]:
+    """
+    Stream record objects out of a GraphQL response body
+
+    Accepts both the wrapped ({"data": {"records_v1": [...]}}) and unwrapped
+    ({"records_v1": [...]}) shapes.
+
+    Args:
+        fp: Binary file-like object positioned at the start of the JSON body
+        errors: Optional list that receives GraphQL "errors" entries
+        keys: Top-level record array names to stream
+
+    Yields:
+        One record dict per array element
+    """
+    item_prefixes = set()
+    for key in keys:
+        item_prefixes.add(f'data.{key}.item')
+        item_prefixes.add(f'{key}.item')
+
+    builder = None
+    builder_prefix = None
+    error_builder = None
+
+    for prefix, event, value in ijson.parse(fp, use_float=True):
+        if builder is not None:
+            if prefix == builder_prefix and event in ('end_map', 'end_array'):
+                builder.event(event, value)
+                yield builder.value
+                builder = None
+            else:
+                builder.event(event, value)
+            continue
+
+        if error_builder is not None:
+            if prefix == 'errors.item' and event in ('end_map', 'end_array'):
+                error_builder.event(event, value)
+                logger.error(f"GraphQL response contains error: {error_builder.value}")
+                if errors is not None:
+                    errors.append(error_builder.value)
+                error_builder = None
+            else:
+                error_builder.event(event, value)
+            continue
+
+        if prefix in item_prefixes and event in ('start_map', 'start_array'):
+            builder = ijson.ObjectBuilder()
+            builder_prefix = prefix
+            builder.event(event, value)
+        elif prefix == 'errors.item' and event == 'start_map':
+            error_builder = ijson.ObjectBuilder()
+            error_builder.event(event, value)
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most size items"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
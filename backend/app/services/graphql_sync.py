@@ -2,19 +2,91 @@
 GraphQL-based sync service - Import authority records with media attachments
 This is the PRIMARY ingestion method for the training corpus
 """
+import asyncio
+import hashlib
+import json
 import logging
-import requests
+import re
 import uuid
-from typing import List, Dict, Optional
+from typing import IO, Iterable, Iterator, List, Dict, Optional, Tuple
 from datetime import datetime
-from sqlalchemy import text
+from sqlalchemy import func, literal_column, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.core.config import settings
 from app.core.database import LocalSessionLocal
 from app.models.document import Document
+from app.services.ddr_client import get_async_ddr_client
+from app.services.ddr_records_fetcher import DDRRecordsFetcher
+from app.services.graphql_stream import batched, iter_graphql_records
 
 logger = logging.getLogger(__name__)
 
+# Document columns GraphQL owns outright; rewritten whenever the content hash changes
+GRAPHQL_OWNED_COLUMNS = (
+    'authority_id',
+    'authority_data',
+    'title',
+)
+
+# Columns S3 ingestion may have set first; GraphQL only fills them while empty,
+# so the s3_key process_pdf deduplicates on is never replaced
+GRAPHQL_FILLED_COLUMNS = (
+    'filename',
+    'file_type',
+    's3_key',
+)
+
+# Hashed for change detection. Migration 007 backfills the same hash in SQL, so
+# keep the two in step: sha256 of jsonb_build_object(column, value)::text with
+# scalar columns cast to text.
+HASHED_COLUMNS = GRAPHQL_OWNED_COLUMNS + GRAPHQL_FILLED_COLUMNS
+
+
+def _jsonb_text(value) -> str:
+    """Serialize like Postgres jsonb::text (keys by length then bytes, ', ' and ': ' separators)"""
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda kv: (len(kv[0].encode('utf-8')), kv[0].encode('utf-8')))
+        return '{' + ', '.join(f"{json.dumps(k, ensure_ascii=False)}: {_jsonb_text(v)}" for k, v in items) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(_jsonb_text(v) for v in value) + ']'
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def compute_content_hash(row: Dict) -> str:
+    """Stable SHA-256 of the GraphQL-derived document fields"""
+    payload = {}
+    for column in HASHED_COLUMNS:
+        value = row.get(column)
+        if column != 'authority_data' and value is not None:
+            value = str(value)
+        payload[column] = value
+    return hashlib.sha256(_jsonb_text(payload).encode('utf-8')).hexdigest()
+
+
+# Fields requested per records_v1 record (digital assets carry ML annotations)
+RECORD_FIELDS = """
+    id
+    pid
+    title
+    attached_media {
+      id
+      pid
+      title
+      used_for_ml
+      ml_annotation
+      digital_assets {
+        role
+        filename
+        url
+        use_for_ml
+        ml_pages
+        ml_annotation
+        mime
+      }
+    }
+"""
+
 
 class GraphQLSyncService:
     """
@@ -27,6 +99,9 @@ class GraphQLSyncService:
     4. Validates allowlist (only PID-linked assets)
     """
     
+    # Matches the sync_metadata row read by get_last_sync_timestamp()
+    SYNC_SOURCE = 'ddr_graphql'
+    
     def __init__(self):
         self.graphql_endpoint = settings.DDR_GRAPHQL_ENDPOINT
         self.api_token = settings.DDR_API_TOKEN
@@ -36,8 +111,8 @@ class GraphQLSyncService:
         db = LocalSessionLocal()
         try:
             result = db.execute(text(
-                "SELECT get_last_sync_time('ddr_graphql')"
-            ))
+                "SELECT get_last_sync_time(:source)"
+            ), {'source': self.SYNC_SOURCE})
             timestamp = result.scalar()
             return timestamp
         except Exception as e:
@@ -49,7 +124,8 @@ class GraphQLSyncService:
     def start_sync_log(
         self, 
         sync_type: str = 'manual',
-        triggered_by: str = 'api'
+        triggered_by: str = 'api',
+        config: Optional[Dict] = None
     ) -> str:
         """
         Create sync log entry and return sync_id
@@ -57,6 +133,7 @@ class GraphQLSyncService:
         Args:
             sync_type: 'scheduled', 'manual', 'incremental', 'full'
             triggered_by: Who/what triggered the sync
+            config: Stored in sync_log.config (e.g. the sync scheduler's job)
         
         Returns:
             sync_id for tracking this sync operation
@@ -67,14 +144,17 @@ class GraphQLSyncService:
             
             db.execute(text("""
                 INSERT INTO sync_log (
-                    sync_id, sync_type, sync_source, status, triggered_by
+                    sync_id, sync_type, sync_source, status, triggered_by, config
                 ) VALUES (
-                    :sync_id, :sync_type, 'graphql_ddr_archive', 'running', :triggered_by
+                    :sync_id, :sync_type, :sync_source, 'running', :triggered_by,
+                    CAST(:config AS jsonb)
                 )
             """), {
                 'sync_id': sync_id,
                 'sync_type': sync_type,
-                'triggered_by': triggered_by
+                'sync_source': self.SYNC_SOURCE,
+                'triggered_by': triggered_by,
+                'config': json.dumps(config) if config is not None else None
             })
             db.commit()
             
@@ -95,7 +175,9 @@ class GraphQLSyncService:
         records_updated: int = 0,
         records_failed: int = 0,
         status: str = 'completed',
-        error_log: Optional[str] = None
+        error_log: Optional[str] = None,
+        records_fetched: int = 0,
+        records_skipped: int = 0
     ):
         """Mark sync as complete and update statistics"""
         db = LocalSessionLocal()
@@ -112,18 +194,24 @@ class GraphQLSyncService:
                 'status': status
             })
             
-            if error_log:
-                db.execute(text("""
-                    UPDATE sync_log 
-                    SET error_log = :error_log
-                    WHERE sync_id = :sync_id
-                """), {
-                    'sync_id': sync_id,
-                    'error_log': error_log
-                })
+            db.execute(text("""
+                UPDATE sync_log 
+                SET records_fetched = :records_fetched,
+                    records_skipped = :records_skipped,
+                    error_log = COALESCE(:error_log, error_log)
+                WHERE sync_id = :sync_id
+            """), {
+                'sync_id': sync_id,
+                'records_fetched': records_fetched,
+                'records_skipped': records_skipped,
+                'error_log': error_log
+            })
             
             db.commit()
-            logger.info(f"Completed sync {sync_id}: new={records_new}, updated={records_updated}, failed={records_failed}")
+            logger.info(
+                f"Completed sync {sync_id}: new={records_new}, updated={records_updated}, "
+                f"unchanged={records_skipped}, failed={records_failed}"
+            )
             
         except Exception as e:
             db.rollback()
@@ -175,60 +263,15 @@ class GraphQLSyncService:
         training_eligible = []  # Has PDF or TIFF master
         jpg_only = []  # Has only JPG derivatives (masters should be in DO Spaces)
         no_media = []  # Has no attachments
+        categories = {
+            'training_eligible': training_eligible,
+            'jpg_only': jpg_only,
+            'no_media': no_media
+        }
         
         for item in all_items:
-            pid = item.get('pid')
-            
-            # Check for attached_media (records_v1 format) or direct pdf_files
-            attached_media = item.get('attached_media') or []
-            if attached_media:
-                # records_v1 format - process each attached media item
-                for media in attached_media:
-                    media_pid = media.get('pid') or pid
-                    digital_assets = media.get('digital_assets') or []
-                    
-                    # Find PDF masters in digital_assets
-                    pdf_assets = [a for a in digital_assets if a and a.get('role') == 'pdf_master']
-                    tiff_assets = [a for a in digital_assets if a and a.get('role') == 'tiff_master']
-                    
-                    if pdf_assets:
-                        training_eligible.append({
-                            'type': 'pdf',
-                            'item': {'pid': media_pid, 'title': media.get('title') or item.get('title')},
-                            'master_files': pdf_assets
-                        })
-                    elif tiff_assets:
-                        training_eligible.append({
-                            'type': 'tiff',
-                            'item': {'pid': media_pid, 'title': media.get('title') or item.get('title')},
-                            'master_files': tiff_assets
-                        })
-            else:
-                # Old format fallback
-                has_pdf = len(item.get('pdf_files', [])) > 0
-                has_tiff = len(item.get('tiff_files', [])) > 0
-                has_jpg = len(item.get('jpg_derivatives', [])) > 0
-                
-                if not pid:
-                    logger.warning(f"Item {item.get('id')} has no PID - skipping")
-                    continue
-                
-                if has_pdf:
-                    training_eligible.append({
-                        'type': 'pdf',
-                        'item': item,
-                        'master_files': item.get('pdf_files', [])
-                    })
-                elif has_tiff:
-                    training_eligible.append({
-                        'type': 'tiff',
-                        'item': item,
-                        'master_files': item.get('tiff_files', [])
-                    })
-                elif has_jpg:
-                    jpg_only.append(item)
-                else:
-                    no_media.append(item)
+            for category, entry in self.classify_item(item):
+                categories[category].append(entry)
         
         return {
             'total_items': len(all_items),
@@ -240,6 +283,146 @@ class GraphQLSyncService:
             'no_media': no_media
         }
     
+    def classify_item(self, item: Dict) -> Iterator[Tuple[str, Dict]]:
+        """
+        Decide training eligibility for a single GraphQL record
+        
+        Args:
+            item: One records_v1 record or legacy all_media_items entry
+        
+        Yields:
+            (category, entry) pairs where category is 'training_eligible',
+            'jpg_only' or 'no_media'
+        """
+        pid = item.get('pid')
+        
+        # Check for attached_media (records_v1 format) or direct pdf_files
+        attached_media = item.get('attached_media') or []
+        if attached_media:
+            # records_v1 format - process each attached media item
+            for media in attached_media:
+                media_pid = media.get('pid') or pid
+                digital_assets = media.get('digital_assets') or []
+                
+                # Find PDF masters in digital_assets
+                pdf_assets = [a for a in digital_assets if a and a.get('role') == 'pdf_master']
+                tiff_assets = [a for a in digital_assets if a and a.get('role') == 'tiff_master']
+                
+                if pdf_assets:
+                    yield 'training_eligible', {
+                        'type': 'pdf',
+                        'item': {'pid': media_pid, 'title': media.get('title') or item.get('title')},
+                        'master_files': pdf_assets
+                    }
+                elif tiff_assets:
+                    yield 'training_eligible', {
+                        'type': 'tiff',
+                        'item': {'pid': media_pid, 'title': media.get('title') or item.get('title')},
+                        'master_files': tiff_assets
+                    }
+        else:
+            # Old format fallback
+            has_pdf = len(item.get('pdf_files', [])) > 0
+            has_tiff = len(item.get('tiff_files', [])) > 0
+            has_jpg = len(item.get('jpg_derivatives', [])) > 0
+            
+            if not pid:
+                logger.warning(f"Item {item.get('id')} has no PID - skipping")
+                return
+            
+            if has_pdf:
+                yield 'training_eligible', {
+                    'type': 'pdf',
+                    'item': item,
+                    'master_files': item.get('pdf_files', [])
+                }
+            elif has_tiff:
+                yield 'training_eligible', {
+                    'type': 'tiff',
+                    'item': item,
+                    'master_files': item.get('tiff_files', [])
+                }
+            elif has_jpg:
+                yield 'jpg_only', item
+            else:
+                yield 'no_media', item
+    
+    def build_document_row(
+        self,
+        item: Dict,
+        master_file: Dict,
+        file_type: str = 'pdf'
+    ) -> Optional[Dict]:
+        """
+        Build documents row values from a GraphQL media item
+        
+        Args:
+            item: GraphQL media item
+            master_file: Master file dict (PDF or TIFF)
+            file_type: 'pdf' or 'tiff'
+        
+        Returns:
+            Column values for a new Document, or None if the item has no PID
+        """
+        pid = item.get('pid')
+        if not pid:
+            return None
+        
+        # Extract metadata
+        title = item.get('title', 'Untitled')
+        authority_id = item.get('id')
+        s3_key = master_file.get('url', '')
+        filename = master_file.get('filename', f'unknown.{file_type}')
+        
+        # Determine file type
+        if file_type == 'tiff':
+            mime_type = 'image/tiff'
+        else:
+            mime_type = 'application/pdf'
+        
+        # Extract year from title if possible
+        year_match = re.search(r'(19[6-8][0-9])', title)
+        publication_year = int(year_match.group(1)) if year_match else 1970
+        
+        # Build authority_data from GraphQL response
+        authority_data = {
+            'id': authority_id,
+            'pid': pid,
+            'title': title,
+            'file_type': file_type,
+            'public_uri': item.get('public_uri'),
+            'copyright_holder': item.get('copyright_holder'),
+            'rights_holders': item.get('rights_holders'),
+            'master_label': master_file.get('label'),
+            'master_url': master_file.get('url'),
+            'scope_and_content': item.get('scope_and_content'),
+            'project_title': item.get('project_title'),
+            'creator_agent_label': item.get('creator_agent_label'),
+            # ML annotation metadata (item level)
+            'used_for_ml': item.get('used_for_ml', False),
+            'ml_annotation': item.get('ml_annotation', ''),
+            # ML annotation metadata (digital asset level - has page annotations)
+            'asset_use_for_ml': master_file.get('use_for_ml', False),
+            'ml_pages': master_file.get('ml_pages', ''),
+            'asset_filename': master_file.get('filename', ''),
+        }
+        
+        row = {
+            'document_id': f"doc_{uuid.uuid4().hex[:12]}",
+            'pid': pid,  # CRITICAL: Authority linkage
+            'authority_id': authority_id,
+            'authority_data': authority_data,  # Cached GraphQL metadata
+            'title': title,
+            'publication_year': publication_year,
+            'filename': filename,
+            'file_type': mime_type,  # application/pdf or image/tiff
+            's3_key': s3_key,
+            'file_size_bytes': 0,  # Unknown from GraphQL
+            'processing_status': 'pending'
+        }
+        row['content_hash'] = compute_content_hash(row)
+        return row
+    
     def sync_graphql_item_to_database(
         self,
         item: Dict,
@@ -250,6 +433,8 @@ class GraphQLSyncService:
         """
         Create/update document record from GraphQL media item
         
+        Single-record path; bulk imports go through bulk_upsert_documents().
+        
         Args:
             item: GraphQL media item
             master_file: Master file dict (PDF or TIFF)
@@ -271,79 +456,45 @@ class GraphQLSyncService:
                 Document.pid == pid
             ).first()
             
+            row = self.build_document_row(item, master_file, file_type)
+            
             if existing:
-                logger.info(f"Document with PID {pid} already exists: {existing.document_id}")
+                if existing.content_hash == row['content_hash']:
+                    logger.info(f"Document with PID {pid} unchanged: {existing.document_id}")
+                    return existing.document_id
+                
+                if dry_run:
+                    logger.info(f"[DRY RUN] Would update document: PID={pid}, title={row['title']}")
+                    return existing.document_id
+                
+                # Metadata changed upstream - rewrite the GraphQL fields in place,
+                # keeping file details S3 ingestion already recorded
+                for column in GRAPHQL_OWNED_COLUMNS:
+                    setattr(existing, column, row[column])
+                for column in GRAPHQL_FILLED_COLUMNS:
+                    if not getattr(existing, column):
+                        setattr(existing, column, row[column])
+                existing.content_hash = row['content_hash']
+                existing.last_synced_at = datetime.utcnow()
+                existing.sync_version = (existing.sync_version or 1) + 1
+                db.commit()
+                
+                logger.info(f"Updated document {existing.document_id} with PID {pid}: {existing.title}")
                 return existing.document_id
             
-            # Extract metadata
-            title = item.get('title', 'Untitled')
-            authority_id = item.get('id')
-            s3_key = master_file.get('url', '')
-            filename = master_file.get('filename', f'unknown.{file_type}')
-            
-            # Determine file type
-            if file_type == 'tiff':
-                mime_type = 'image/tiff'
-            else:
-                mime_type = 'application/pdf'
-            
-            # Extract year from title if possible
-            import re
-            year_match = re.search(r'(19[6-8][0-9])', title)
-            publication_year = int(year_match.group(1)) if year_match else 1970
-            
-            # Build authority_data from GraphQL response
-            authority_data = {
-                'id': authority_id,
-                'pid': pid,
-                'title': title,
-                'file_type': file_type,
-                'public_uri': item.get('public_uri'),
-                'copyright_holder': item.get('copyright_holder'),
-                'rights_holders': item.get('rights_holders'),
-                'master_label': master_file.get('label'),
-                'master_url': master_file.get('url'),
-                'scope_and_content': item.get('scope_and_content'),
-                'project_title': item.get('project_title'),
-                'creator_agent_label': item.get('creator_agent_label'),
-                # ML annotation metadata (item level)
-                'used_for_ml': item.get('used_for_ml', False),
-                'ml_annotation': item.get('ml_annotation', ''),
-                # ML annotation metadata (digital asset level - has page annotations)
-                'asset_use_for_ml': master_file.get('use_for_ml', False),
-                'ml_pages': master_file.get('ml_pages', ''),
-                'asset_filename': master_file.get('filename', ''),
-            }
-            
             if dry_run:
-                logger.info(f"[DRY RUN] Would create document: PID={pid}, title={title}")
+                logger.info(f"[DRY RUN] Would create document: PID={pid}, title={row['title']}")
                 return f"dry_run_{pid}"
             
-            # Generate document ID
-            import uuid
-            document_id = f"doc_{uuid.uuid4().hex[:12]}"
-            
             # Create document record
-            doc = Document(
-                document_id=document_id,
-                pid=pid,  # CRITICAL: Authority linkage
-                authority_id=authority_id,
-                authority_data=authority_data,  # Cached GraphQL metadata
-                title=title,
-                publication_year=publication_year,
-                filename=filename,
-                file_type=mime_type,  # application/pdf or image/tiff
-                s3_key=s3_key,
-                file_size_bytes=0,  # Unknown from GraphQL
-                processing_status='pending'
-            )
+            doc = Document(**row)
             
             db.add(doc)
             db.commit()
             db.refresh(doc)
             
-            logger.info(f"Created document {document_id} with PID {pid}: {title}")
-            return document_id
+            logger.info(f"Created document {doc.document_id} with PID {pid}: {doc.title}")
+            return doc.document_id
             
         except Exception as e:
             db.rollback()
@@ -352,6 +503,95 @@ class GraphQLSyncService:
         finally:
             db.close()
     
+    def bulk_upsert_documents(
+        self,
+        rows: List[Dict],
+        batch_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Upsert document rows set-based, rewriting only records whose content changed
+        
+        Existing PIDs and their content hashes are prefetched in one query.
+        Unchanged rows are dropped; new and changed rows are written with one
+        INSERT ... ON CONFLICT (pid) DO UPDATE statement per batch.
+        
+        Args:
+            rows: Row dicts from build_document_row()
+            batch_size: Rows per INSERT statement (default from config)
+        
+        Returns:
+            Dict with new, updated, unchanged and failed counts
+        """
+        batch_size = batch_size or settings.GRAPHQL_SYNC_BATCH_SIZE
+        
+        # First row wins for PIDs that appear more than once in the response
+        rows_by_pid = {}
+        for row in rows:
+            rows_by_pid.setdefault(row['pid'], row)
+        
+        stats = {'new': 0, 'updated': 0, 'unchanged': len(rows) - len(rows_by_pid), 'failed': 0}
+        if not rows_by_pid:
+            return stats
+        
+        db = LocalSessionLocal()
+        try:
+            existing_hashes = dict(db.execute(
+                text("SELECT pid, content_hash FROM documents WHERE pid = ANY(:pids)"),
+                {'pids': list(rows_by_pid)}
+            ).fetchall())
+            
+            changed_rows = [
+                row for pid, row in rows_by_pid.items()
+                if pid not in existing_hashes or existing_hashes[pid] != row['content_hash']
+            ]
+            stats['unchanged'] += len(rows_by_pid) - len(changed_rows)
+            
+            for start in range(0, len(changed_rows), batch_size):
+                batch = changed_rows[start:start + batch_size]
+                try:
+                    now = datetime.utcnow()
+                    stmt = pg_insert(Document).values(batch)
+                    # Only GraphQL-owned columns are overwritten; publication_year keeps
+                    # its stored value and file details are only filled in while empty
+                    set_ = {column: stmt.excluded[column] for column in GRAPHQL_OWNED_COLUMNS}
+                    for column in GRAPHQL_FILLED_COLUMNS:
+                        set_[column] = func.coalesce(
+                            func.nullif(getattr(Document, column), ''), stmt.excluded[column]
+                        )
+                    set_.update({
+                        'content_hash': stmt.excluded.content_hash,
+                        'updated_at': now,
+                        'last_synced_at': now,
+                        'sync_version': Document.sync_version + 1
+                    })
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=['pid'],
+                        set_=set_,
+                        where=Document.content_hash.is_distinct_from(stmt.excluded.content_hash)
+                    ).returning(Document.pid, literal_column('(xmax = 0)').label('inserted'))
+                    
+                    written = db.execute(stmt).fetchall()
+                    db.commit()
+                    
+                    inserted = sum(1 for r in written if r.inserted)
+                    stats['new'] += inserted
+                    stats['updated'] += len(written) - inserted
+                    # Rows that became identical concurrently since the prefetch
+                    stats['unchanged'] += len(batch) - len(written)
+                except Exception as e:
+                    db.rollback()
+                    stats['failed'] += len(batch)
+                    logger.error(f"Bulk upsert of {len(batch)} documents failed: {e}")
+            
+            logger.info(
+                f"Bulk upserted documents: new={stats['new']}, updated={stats['updated']}, "
+                f"unchanged={stats['unchanged']}, failed={stats['failed']}"
+            )
+            return stats
+            
+        finally:
+            db.close()
+    
     def bulk_sync_from_graphql_response(
         self,
         json_data: Dict,
@@ -377,43 +617,239 @@ GraphQL Sync Summary:
   No media: {parsed['no_media_count']}
         """)
         
-        synced_count = 0
         skipped_count = 0
         error_count = 0
+        rows = []
         
         for eligible in parsed['training_eligible']:
-            item = eligible['item']
             file_type = eligible['type']  # 'pdf' or 'tiff'
             master_files = eligible['master_files']
             
             # Sync the first master file (primary)
-            if master_files:
-                master_file = master_files[0]  # Take first master
-                
-                result = self.sync_graphql_item_to_database(
-                    item,
-                    master_file,
-                    file_type=file_type,
-                    dry_run=dry_run
-                )
-                
-                if result:
-                    synced_count += 1
-                    logger.info(f"Synced {file_type.upper()} for PID {item.get('pid')}")
-                elif result is None:
-                    error_count += 1
-            else:
+            if not master_files:
                 skipped_count += 1
+                continue
+            
+            row = self.build_document_row(eligible['item'], master_files[0], file_type=file_type)
+            if row:
+                rows.append(row)
+            else:
+                logger.error("Cannot sync item without PID")
+                error_count += 1
+        
+        if dry_run:
+            logger.info(f"[DRY RUN] Would sync {len(rows)} documents")
+            upsert = {'new': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+            synced_count = len(rows)
+        else:
+            sync_id = self.start_sync_log(sync_type='incremental')
+            upsert = self.bulk_upsert_documents(rows)
+            synced_count = upsert['new'] + upsert['updated'] + upsert['unchanged']
+            error_count += upsert['failed']
+            self.complete_sync_log(
+                sync_id,
+                records_new=upsert['new'],
+                records_updated=upsert['updated'],
+                records_failed=error_count,
+                records_fetched=parsed['total_items'],
+                records_skipped=upsert['unchanged']
+            )
         
         return {
             'total_items': parsed['total_items'],
             'training_eligible': parsed['training_eligible_count'],
             'synced': synced_count,
+            'new': upsert['new'],
+            'updated': upsert['updated'],
+            'unchanged': upsert['unchanged'],
             'skipped': skipped_count,
             'errors': error_count,
             'dry_run': dry_run
         }
     
+    def stream_sync_from_graphql(
+        self,
+        fp: IO[bytes],
+        dry_run: bool = False,
+        batch_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Sync training-eligible items while streaming a GraphQL response body
+        
+        Records are parsed and classified one at a time and handed to
+        bulk_upsert_documents() in batches, so memory stays flat no matter
+        how large the records_v1 payload is.
+        
+        Args:
+            fp: Binary file-like GraphQL response body
+            dry_run: If True, don't actually insert to database
+            batch_size: Documents per bulk insert (default from config)
+        
+        Returns:
+            Sync statistics (same shape as bulk_sync_from_graphql_response)
+        """
+        batch_size = batch_size or settings.GRAPHQL_SYNC_BATCH_SIZE
+        counts = {'total_items': 0, 'training_eligible': 0, 'jpg_only': 0, 'no_media': 0}
+        stats = {'new': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'skipped': 0, 'synced': 0}
+        graphql_errors = []
+        sync_id = None if dry_run else self.start_sync_log(sync_type='incremental')
+        
+        try:
+            records = iter_graphql_records(fp, errors=graphql_errors)
+            for batch in batched(self._eligible_rows(records, counts, stats), batch_size):
+                self._write_row_batch(batch, stats, dry_run)
+        except Exception as e:
+            self._complete_stream_sync_log(sync_id, counts, stats, status='failed', error_log=str(e))
+            raise
+        
+        self._complete_stream_sync_log(sync_id, counts, stats)
+        return self._stream_sync_result(counts, stats, len(graphql_errors), dry_run, sync_id)
+    
+    async def pull_sync_from_ddr(
+        self,
+        dry_run: bool = False,
+        batch_size: Optional[int] = None,
+        sync_type: str = 'incremental',
+        triggered_by: str = 'api',
+        sync_config: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Fetch records_v1 from DDR page by page and sync them as they arrive
+        
+        Pages are fetched concurrently with per-page retry (DDRRecordsFetcher);
+        eligible rows are bulk upserted in batches off the event loop.
+        
+        Args:
+            dry_run: If True, don't actually insert to database
+            batch_size: Documents per bulk insert (default from config)
+            sync_type: sync_log type of the run
+            triggered_by: Who/what triggered the sync
+            sync_config: Stored in the run's sync_log.config
+        
+        Returns:
+            Sync statistics (same shape as stream_sync_from_graphql)
+        """
+        batch_size = batch_size or settings.GRAPHQL_SYNC_BATCH_SIZE
+        counts = {'total_items': 0, 'training_eligible': 0, 'jpg_only': 0, 'no_media': 0}
+        stats = {'new': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'skipped': 0, 'synced': 0}
+        pending_rows = []
+        
+        fetcher = DDRRecordsFetcher(
+            RECORD_FIELDS,
+            page_size=settings.DDR_RECORDS_PAGE_SIZE,
+            concurrency=settings.DDR_FETCH_CONCURRENCY,
+            client=get_async_ddr_client()
+        )
+        
+        sync_id = None if dry_run else await asyncio.to_thread(
+            self.start_sync_log, sync_type=sync_type, triggered_by=triggered_by, config=sync_config
+        )
+        
+        try:
+            async for page in fetcher.iter_pages():
+                pending_rows.extend(self._eligible_rows(page, counts, stats))
+                while len(pending_rows) >= batch_size:
+                    batch, pending_rows = pending_rows[:batch_size], pending_rows[batch_size:]
+                    await asyncio.to_thread(self._write_row_batch, batch, stats, dry_run)
+            
+            if pending_rows:
+                await asyncio.to_thread(self._write_row_batch, pending_rows, stats, dry_run)
+        except Exception as e:
+            await asyncio.to_thread(
+                self._complete_stream_sync_log, sync_id, counts, stats,
+                status='failed', error_log=str(e)
+            )
+            raise
+        
+        await asyncio.to_thread(self._complete_stream_sync_log, sync_id, counts, stats)
+        return self._stream_sync_result(counts, stats, len(fetcher.graphql_errors), dry_run, sync_id)
+    
+    def _eligible_rows(
+        self,
+        records: Iterable[Dict],
+        counts: Dict[str, int],
+        stats: Dict[str, int]
+    ) -> Iterator[Dict]:
+        """Classify records one at a time and yield document rows for eligible ones"""
+        for item in records:
+            counts['total_items'] += 1
+            for category, entry in self.classify_item(item):
+                counts[category] += 1
+                if category != 'training_eligible':
+                    continue
+                if not entry['master_files']:
+                    stats['skipped'] += 1
+                    continue
+                row = self.build_document_row(
+                    entry['item'], entry['master_files'][0], file_type=entry['type']
+                )
+                if row:
+                    yield row
+                else:
+                    stats['failed'] += 1
+    
+    def _write_row_batch(self, batch: List[Dict], stats: Dict[str, int], dry_run: bool):
+        """Bulk upsert one batch of rows and fold the result into stats"""
+        if dry_run:
+            stats['synced'] += len(batch)
+            return
+        
+        upsert = self.bulk_upsert_documents(batch, batch_size=len(batch))
+        for key in ('new', 'updated', 'unchanged', 'failed'):
+            stats[key] += upsert[key]
+        stats['synced'] += upsert['new'] + upsert['updated'] + upsert['unchanged']
+    
+    def _complete_stream_sync_log(
+        self,
+        sync_id: Optional[str],
+        counts: Dict[str, int],
+        stats: Dict[str, int],
+        status: str = 'completed',
+        error_log: Optional[str] = None
+    ):
+        """Record a streamed sync's new/updated/unchanged counts in sync_log"""
+        if sync_id is None:
+            return
+        self.complete_sync_log(
+            sync_id,
+            records_new=stats['new'],
+            records_updated=stats['updated'],
+            records_failed=stats['failed'],
+            status=status,
+            error_log=error_log,
+            records_fetched=counts['total_items'],
+            records_skipped=stats['unchanged']
+        )
+    
+    def _stream_sync_result(
+        self,
+        counts: Dict[str, int],
+        stats: Dict[str, int],
+        graphql_error_count: int,
+        dry_run: bool,
+        sync_id: Optional[str] = None
+    ) -> Dict:
+        logger.info(
+            f"Streamed GraphQL sync: {counts['total_items']} records, "
+            f"{counts['training_eligible']} training-eligible, "
+            f"{stats['new']} new, {stats['updated']} updated, {stats['unchanged']} unchanged, "
+            f"{graphql_error_count} GraphQL errors"
+        )
+        
+        return {
+            'total_items': counts['total_items'],
+            'training_eligible': counts['training_eligible'],
+            'synced': stats['synced'],
+            'new': stats['new'],
+            'updated': stats['updated'],
+            'unchanged': stats['unchanged'],
+            'skipped': stats['skipped'],
+            'errors': stats['failed'],
+            'graphql_errors': graphql_error_count,
+            'dry_run': dry_run,
+            'sync_id': sync_id
+        }
+    
     def get_training_corpus_pids(self) -> List[str]:
         """
         Get list of all PIDs currently in training corpus
@@ -423,7 +859,6 @@ GraphQL Sync Summary:
         """
         db = LocalSessionLocal()
         try:
-            from sqlalchemy import text
             result = db.execute(text(
                 "SELECT pid FROM documents WHERE pid IS NOT NULL ORDER BY pid"
             ))
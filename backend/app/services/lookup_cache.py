@@ -0,0 +1,172 @@
+"""
+Lookup cache - bounded, TTL-based in-process cache for remote lookups
+
+Entries expire after ttl_seconds and the least recently used entry is evicted
+once max_entries is reached. A loader result of None ("not found") is cached
+for the shorter negative_ttl_seconds. Concurrent lookups of the same key are
+coalesced so only one caller hits the remote API; loader exceptions are
+propagated to every waiter and never cached.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+
+class TTLLRUCache:
+    """Thread-safe TTL + LRU cache with negative caching and request coalescing"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, negative_ttl_seconds: float):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()  # key -> (expires_at, value)
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _get_locked(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Look up a key without loading it
+
+        Returns:
+            Tuple of (hit, value); value is None for cached "not found" entries
+        """
+        with self._lock:
+            hit, value = self._get_locked(key)
+            if hit:
+                self.hits += 1
+            return hit, value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value (None is stored with the negative TTL)"""
+        ttl = self.negative_ttl_seconds if value is None else self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[Hashable], Any]) -> Any:
+        """
+        Return the cached value for key, calling loader(key) on a miss
+
+        If another thread is already loading the same key, wait for its result
+        instead of issuing a second request.
+        """
+        with self._lock:
+            hit, value = self._get_locked(key)
+            if hit:
+                self.hits += 1
+                return value
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = loader(key)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get_many_or_load(
+        self,
+        keys: Iterable[Hashable],
+        loader: Callable[[List[Hashable]], Dict[Hashable, Any]]
+    ) -> Dict[Hashable, Any]:
+        """
+        Return values for many keys, loading all misses with one loader call
+
+        loader receives the list of missing keys and returns a dict of the
+        values it found; keys it leaves out are cached as "not found".
+        Keys already being loaded by another thread are awaited, not reloaded.
+        """
+        results: Dict[Hashable, Any] = {}
+        owned: Dict[Hashable, Future] = {}
+        waiting: Dict[Hashable, Future] = {}
+
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                hit, value = self._get_locked(key)
+                if hit:
+                    self.hits += 1
+                    results[key] = value
+                elif key in self._inflight:
+                    self.coalesced += 1
+                    waiting[key] = self._inflight[key]
+                else:
+                    self.misses += 1
+                    owned[key] = self._inflight[key] = Future()
+
+        if owned:
+            try:
+                loaded = loader(list(owned))
+            except BaseException as e:
+                for future in owned.values():
+                    future.set_exception(e)
+                raise
+            else:
+                for key, future in owned.items():
+                    value = loaded.get(key)
+                    self.set(key, value)
+                    future.set_result(value)
+                    results[key] = value
+            finally:
+                with self._lock:
+                    for key in owned:
+                        self._inflight.pop(key, None)
+
+        for key, future in waiting.items():
+            results[key] = future.result()
+
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced
+            }
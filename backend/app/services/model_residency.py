@@ -0,0 +1,441 @@
+"""
+Model residency - keep heavy models in RAM only while they earn their place
+
+The API process shares an 8 GB box with Postgres. Every in-process model
+(Granite, the sentence-transformer) registers here with an unload callback.
+The manager records when each model was last used and how much RSS its load
+added, unloads models idle for longer than their TTL, and refuses a load
+that would push the process past its RSS watermark or leave the machine
+with less available memory than Postgres needs. Before refusing, idle
+models are unloaded to make room.
+
+Admission is judged on the peak a load reaches, not on what stays resident:
+a quantized model is materialized at full precision before it shrinks. The
+peak is measured during each load; until then the estimate is the
+checkpoint's fp32 size.
+"""
+import ctypes
+import gc
+import glob
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux /proc), or None if unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def available_memory_bytes() -> Optional[int]:
+    """MemAvailable from /proc/meminfo (memory the OS can hand out without swapping)"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def release_memory():
+    """Collect garbage and hand freed heap pages back to the OS so RSS drops"""
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _safetensors_parameter_count(path: str) -> int:
+    """Parameters in one safetensors file, read from its JSON header only"""
+    with open(path, 'rb') as f:
+        header_size = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    total = 0
+    for name, tensor in header.items():
+        if name == '__metadata__':
+            continue
+        count = 1
+        for dim in tensor['shape']:
+            count *= dim
+        total += count
+    return total
+
+
+def checkpoint_parameter_count(model_path: str, allow_network: bool = False) -> Optional[int]:
+    """
+    Parameter count of a safetensors checkpoint, without loading it
+
+    Looks at a local directory, then the Hugging Face cache, then (if
+    allow_network) the Hub's safetensors metadata.
+
+    Returns:
+        Number of parameters, or None if it cannot be determined
+    """
+    try:
+        directory = model_path if os.path.isdir(model_path) else None
+        if directory is None:
+            from huggingface_hub import snapshot_download
+            try:
+                directory = snapshot_download(model_path, allow_patterns=['*.safetensors'], local_files_only=True)
+            except Exception:
+                directory = None
+
+        files = glob.glob(os.path.join(directory, '*.safetensors')) if directory else []
+        if files:
+            return sum(_safetensors_parameter_count(path) for path in files)
+
+        if allow_network:
+            from huggingface_hub import get_safetensors_metadata
+            return sum(get_safetensors_metadata(model_path).parameter_count.values())
+    except Exception as e:
+        logger.warning(f"Could not determine parameter count of {model_path}: {e}")
+    return None
+
+
+class PeakRSSMonitor:
+    """Samples process RSS on a background thread to find the peak reached inside a block"""
+
+    def __init__(self, interval_seconds: float = 0.05):
+        self.interval_seconds = interval_seconds
+        self.baseline: Optional[int] = None
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        rss = process_rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self._sample()
+
+    def start(self) -> 'PeakRSSMonitor':
+        self.baseline = process_rss_bytes()
+        self.peak = self.baseline
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='peak-rss', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling (safe to call more than once)"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._sample()
+
+    def __enter__(self) -> 'PeakRSSMonitor':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def growth_bytes(self) -> Optional[int]:
+        """Highest RSS seen above the baseline"""
+        if self.baseline is None or self.peak is None:
+            return None
+        return self.peak - self.baseline
+
+
+class ModelMemoryError(Exception):
+    """A model load was refused because it would cross the memory watermark"""
+
+    def __init__(self, name: str, reason: str):
+        self.name = name
+        self.reason = reason
+        super().__init__(f"Refusing to load {name}: {reason}")
+
+
+@dataclass
+class ResidentModel:
+    """Bookkeeping for one registered model"""
+    name: str
+    unload: Callable[[], None]
+    idle_ttl_seconds: float
+    estimated_bytes: int = 0  # admission estimate until a load's peak has been measured
+    loaded: bool = False
+    loaded_at: Optional[datetime] = None
+    last_used: float = 0.0  # time.monotonic()
+    rss_bytes: Optional[int] = None  # RSS the last load left resident
+    peak_bytes: Optional[int] = None  # highest RSS growth while the last load ran
+    active: int = 0  # requests currently using the model
+    loads: int = 0
+    unloads: int = 0
+    last_unload_reason: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+class ModelResidencyManager:
+    """Tracks resident models, unloads idle ones and gates new loads on memory"""
+
+    def __init__(
+        self,
+        idle_ttl_seconds: float = 1800,
+        rss_watermark_bytes: int = 6144 * MB,
+        min_available_bytes: int = 1024 * MB,
+        check_interval_seconds: float = 60
+    ):
+        """
+        Args:
+            idle_ttl_seconds: Default time a model may sit unused before unloading (0 = never)
+            rss_watermark_bytes: Highest process RSS a load may lead to (0 = no limit)
+            min_available_bytes: System memory that must stay available after a
+                load, left for Postgres and the page cache (0 = no limit)
+            check_interval_seconds: How often idle models are looked for
+        """
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.rss_watermark_bytes = rss_watermark_bytes
+        self.min_available_bytes = min_available_bytes
+        self.check_interval_seconds = check_interval_seconds
+        self.refused = 0
+
+        self._models: Dict[str, ResidentModel] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(
+        self,
+        name: str,
+        unload: Callable[[], None],
+        estimated_bytes: int = 0,
+        idle_ttl_seconds: Optional[float] = None
+    ) -> ResidentModel:
+        """Register a model (idempotent; later calls update the callback and estimate)"""
+        with self._lock:
+            model = self._models.get(name)
+            ttl = self.idle_ttl_seconds if idle_ttl_seconds is None else idle_ttl_seconds
+            if model is None:
+                model = ResidentModel(name, unload, ttl, estimated_bytes)
+                self._models[name] = model
+            else:
+                model.unload = unload
+                model.idle_ttl_seconds = ttl
+                model.estimated_bytes = estimated_bytes or model.estimated_bytes
+            return model
+
+    # Loading
+
+    def admit(self, name: str):
+        """
+        Check a model may be loaded, unloading idle models first if needed
+
+        The load is judged on its peak: measured on an earlier load, or the
+        registered estimate before the first one.
+
+        Raises:
+            ModelMemoryError: If the load would still cross a watermark
+        """
+        with self._lock:
+            model = self._models[name]
+            needed = model.peak_bytes or model.estimated_bytes
+
+            reason = self._over_watermark(needed)
+            if reason is None:
+                return
+
+            # Make room: unload other idle models, least recently used first
+            for other in sorted(self._models.values(), key=lambda m: m.last_used):
+                if other.name != name and other.loaded and other.active == 0:
+                    self._unload_locked(other, f"making room for {name}")
+                    reason = self._over_watermark(needed)
+                    if reason is None:
+                        return
+
+            self.refused += 1
+            logger.warning(f"Refusing to load {name}: {reason}")
+            raise ModelMemoryError(name, reason)
+
+    def _over_watermark(self, needed: int) -> Optional[str]:
+        rss = process_rss_bytes()
+        if self.rss_watermark_bytes and rss is not None and rss + needed > self.rss_watermark_bytes:
+            return (
+                f"process RSS {rss // MB} MB + ~{needed // MB} MB would exceed "
+                f"the {self.rss_watermark_bytes // MB} MB watermark"
+            )
+        available = available_memory_bytes()
+        if self.min_available_bytes and available is not None and available - needed < self.min_available_bytes:
+            return (
+                f"only {available // MB} MB available; loading ~{needed // MB} MB would leave less "
+                f"than the {self.min_available_bytes // MB} MB reserved for Postgres"
+            )
+        return None
+
+    def loaded(self, name: str, rss_bytes: Optional[int] = None, peak_bytes: Optional[int] = None, **extra):
+        """Record a completed load, the RSS it left resident and the peak it reached"""
+        with self._lock:
+            model = self._models[name]
+            model.loaded = True
+            model.loaded_at = datetime.now()
+            model.last_used = time.monotonic()
+            model.loads += 1
+            if rss_bytes is not None and rss_bytes > 0:
+                model.rss_bytes = rss_bytes
+            if peak_bytes is not None and peak_bytes > 0:
+                model.peak_bytes = max(peak_bytes, model.rss_bytes or 0)
+            model.extra.update(extra)
+        logger.info(
+            f"Model resident: {name} (+{(rss_bytes or 0) // MB} MB RSS, "
+            f"peak +{(peak_bytes or 0) // MB} MB while loading)"
+        )
+
+    # Use
+
+    def touch(self, name: str):
+        with self._lock:
+            if name in self._models:
+                self._models[name].last_used = time.monotonic()
+
+    @contextmanager
+    def use(self, name: str):
+        """Mark a model busy for the duration of the block so it is never unloaded mid-request"""
+        with self._lock:
+            model = self._models[name]
+            model.active += 1
+            model.last_used = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                model.active -= 1
+                model.last_used = time.monotonic()
+
+    # Unloading
+
+    def unload(self, name: str, reason: str = "requested") -> bool:
+        """
+        Unload a model now unless it is serving a request
+
+        Returns:
+            bool: True if the model was unloaded
+        """
+        with self._lock:
+            model = self._models[name]
+            if not model.loaded or model.active:
+                return False
+            self._unload_locked(model, reason)
+            return True
+
+    def _unload_locked(self, model: ResidentModel, reason: str):
+        rss_before = process_rss_bytes()
+        try:
+            model.unload()
+        except Exception as e:
+            logger.error(f"Unloading {model.name} failed: {e}")
+            return
+        model.loaded = False
+        model.unloads += 1
+        model.last_unload_reason = reason
+        release_memory()
+
+        rss_after = process_rss_bytes()
+        freed = (rss_before - rss_after) // MB if rss_before and rss_after else None
+        logger.info(f"Unloaded model {model.name} ({reason}); freed {freed} MB RSS")
+
+    def unload_idle(self) -> List[str]:
+        """Unload every model idle for longer than its TTL"""
+        now = time.monotonic()
+        unloaded = []
+        with self._lock:
+            for model in self._models.values():
+                idle = now - model.last_used
+                if model.loaded and model.active == 0 and model.idle_ttl_seconds and idle > model.idle_ttl_seconds:
+                    self._unload_locked(model, f"idle {idle:.0f}s")
+                    unloaded.append(model.name)
+        return unloaded
+
+    def _reaper(self):
+        while not self._stop.wait(self.check_interval_seconds):
+            try:
+                self.unload_idle()
+            except Exception as e:
+                logger.error(f"Model residency check failed: {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._reaper, name='model-residency', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            models = [
+                {
+                    'name': m.name,
+                    'loaded': m.loaded,
+                    'loaded_at': m.loaded_at.isoformat() if m.loaded_at else None,
+                    'idle_seconds': round(now - m.last_used, 1) if m.last_used else None,
+                    'idle_ttl_seconds': m.idle_ttl_seconds,
+                    'active_requests': m.active,
+                    'rss_mb': m.rss_bytes // MB if m.rss_bytes else None,
+                    'load_peak_mb': m.peak_bytes // MB if m.peak_bytes else None,
+                    'estimated_mb': m.estimated_bytes // MB,
+                    'loads': m.loads,
+                    'unloads': m.unloads,
+                    'last_unload_reason': m.last_unload_reason,
+                    **m.extra
+                }
+                for m in self._models.values()
+            ]
+        rss = process_rss_bytes()
+        available = available_memory_bytes()
+        return {
+            'process_rss_mb': rss // MB if rss is not None else None,
+            'available_mb': available // MB if available is not None else None,
+            'rss_watermark_mb': self.rss_watermark_bytes // MB,
+            'min_available_mb': self.min_available_bytes // MB,
+            'refused_loads': self.refused,
+            'reaper_alive': self._thread is not None and self._thread.is_alive(),
+            'models': models
+        }
+
+
+# Global instance
+_residency_manager: Optional[ModelResidencyManager] = None
+
+
+def get_residency_manager() -> ModelResidencyManager:
+    """Get or create the process-wide residency manager"""
+    global _residency_manager
+    if _residency_manager is None:
+        from app.core.config import settings
+        _residency_manager = ModelResidencyManager(
+            idle_ttl_seconds=settings.MODEL_IDLE_TTL_SECONDS,
+            rss_watermark_bytes=settings.MODEL_RSS_WATERMARK_MB * MB,
+            min_available_bytes=settings.MODEL_MIN_AVAILABLE_MB * MB,
+            check_interval_seconds=settings.MODEL_RESIDENCY_CHECK_SECONDS
+        )
+    return _residency_manager
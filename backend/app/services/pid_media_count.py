@@ -4,22 +4,127 @@ PID Media Count Service - Query DDR Archive GraphQL API for media asset counts
 This service queries the DDR Archive GraphQL API to get counts of PDF and TIFF
 files attached to each PID authority. This provides provenance tracking for
 what will be ingested by Docling.
+
+Bulk lookups pack many PIDs into one aliased GraphQL query and dispatch the
+batches concurrently over the shared DDR client's keep-alive connection pool.
 """
+import asyncio
 import logging
-import requests
-from typing import Dict, List, Optional
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
 from sqlalchemy import text
 
+from app.core.config import settings
 from app.core.database import LocalSessionLocal
+from app.services.ddr_client import (
+    AsyncDDRClient,
+    CircuitOpenError,
+    DDRClient,
+    DDRClientError,
+    get_async_ddr_client,
+    get_ddr_client,
+)
 
 logger = logging.getLogger(__name__)
 
+# Selection set shared by the single-PID and aliased batch queries
+MEDIA_COUNT_FIELDS = """
+    pid
+    title
+    attached_media {
+        id
+        pid
+        title
+        used_for_ml
+        ml_annotation
+        digital_assets {
+            role
+            filename
+            use_for_ml
+            ml_pages
+            ml_annotation
+        }
+        pdf_files {
+            filename
+        }
+        jpg_derivatives {
+            filename
+            role
+        }
+    }
+"""
+
+# HTTP statuses that mean "slow down" rather than "this batch is broken"
+THROTTLE_STATUSES = (429, 502, 503, 504)
+
+
+def _empty_counts() -> Dict[str, int]:
+    return {'pdf_count': 0, 'tiff_count': 0, 'total_count': 0}
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit that backs off under throttling (AIMD)
+    
+    The limit is halved whenever a batch is throttled and grows by one after
+    a full window of successful batches, up to max_limit.
+    """
+    
+    def __init__(self, max_limit: int):
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+    
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+    
+    async def release(self, throttled: bool = False):
+        async with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+                logger.warning(f"DDR throttling detected; media count concurrency lowered to {self.limit}")
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
 
 class PIDMediaCountService:
     """Query DDR Archive GraphQL API for media asset counts per PID"""
     
-    def __init__(self, graphql_endpoint: str = "https://api.ddrarchive.org/graphql"):
-        self.graphql_endpoint = graphql_endpoint
+    def __init__(
+        self,
+        graphql_endpoint: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None
+    ):
+        """
+        Args:
+            graphql_endpoint: Override endpoint (default: the shared DDR clients)
+            batch_size: PIDs per aliased query (default from config)
+            concurrency: Upper bound on batches in flight (default from config)
+        """
+        if graphql_endpoint:
+            self.client = DDRClient(endpoint=graphql_endpoint, timeout=settings.DDR_FETCH_TIMEOUT)
+            self.async_client = AsyncDDRClient(endpoint=graphql_endpoint, timeout=settings.DDR_FETCH_TIMEOUT)
+        else:
+            self.client = get_ddr_client()
+            self.async_client = get_async_ddr_client()
+        self.graphql_endpoint = self.client.endpoint
+        self.batch_size = batch_size or settings.DDR_MEDIA_COUNT_BATCH_SIZE
+        self.update_batch_size = settings.MEDIA_COUNT_UPDATE_BATCH_SIZE
+        self.concurrency = concurrency or settings.DDR_MEDIA_COUNT_CONCURRENCY
+        self.max_retries = settings.DDR_FETCH_MAX_RETRIES
     
     def get_media_counts_for_pid(self, pid: str) -> Dict[str, int]:
         """
@@ -31,49 +136,16 @@ class PIDMediaCountService:
         Returns:
             Dict with pdf_count, tiff_count, total_count
         """
-        query = """
-        query GetMediaForPID($pid: ID!) {
-            record_v1(id: $pid) {
-                pid
-                title
-                attached_media {
-                    id
-                    pid
-                    title
-                    used_for_ml
-                    ml_annotation
-                    digital_assets {
-                        role
-                        filename
-                        use_for_ml
-                        ml_pages
-                        ml_annotation
-                    }
-                    pdf_files {
-                        filename
-                    }
-                    jpg_derivatives {
-                        filename
-                        role
-                    }
-                }
-            }
-        }
+        query = f"""
+        query GetMediaForPID($pid: ID!) {{
+            record_v1(id: $pid) {{
+                {MEDIA_COUNT_FIELDS}
+            }}
+        }}
         """
         
         try:
-            response = requests.post(
-                self.graphql_endpoint,
-                json={
-                    'query': query,
-                    'variables': {'pid': pid}
-                },
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self.client.execute(query, {'pid': pid}, operation='GetMediaForPID')
             
             # Handle errors in GraphQL response
             if 'errors' in data:
@@ -82,62 +154,189 @@ class PIDMediaCountService:
             
             # Parse response
             record = data.get('data', {}).get('record_v1')
+            return self.count_media(pid, record)
             
-            if not record:
-                logger.warning(f"No record found for PID {pid}")
-                return {'pdf_count': 0, 'tiff_count': 0, 'total_count': 0}
-            
-            attached_media = record.get('attached_media')
-            
-            if not attached_media:
-                logger.info(f"No attached media found for PID {pid}")
-                return {'pdf_count': 0, 'tiff_count': 0, 'total_count': 0}
-            
-            # Count PDF files and JPG derivatives (which may include TIFFs as source)
-            # PERMANENT FILTER: ONLY include media items marked as used_for_ml: true
-            # This ensures we exclude hi-res TIFFs of photographs and other non-relevant
-            # assets that have been manually flagged in DDR Archive admin.
-            # This filter is critical for Docling ingestion quality control.
-            pdf_count = 0
-            tiff_count = 0
-            ml_filtered_count = 0
-            
-            for media_item in attached_media:
-                # Skip items not marked for ML use (permanent gate)
-                if not media_item.get('used_for_ml', False):
-                    ml_filtered_count += 1
-                    logger.debug(f"Skipping media item {media_item.get('id')} '{media_item.get('title')}' - not marked for ML (used_for_ml=false)")
-                    continue
-                
-                pdf_files = media_item.get('pdf_files') or []
-                jpg_derivatives = media_item.get('jpg_derivatives') or []
-                
-                pdf_count += len(pdf_files)
-                # JPG derivatives are generated from source images (often TIFFs)
-                # Count master/preservation derivatives as potential TIFF sources
-                for deriv in jpg_derivatives:
-                    if deriv.get('role') in ['master', 'preservation', 'access-master']:
-                        tiff_count += 1
-            
-            result = {
-                'pdf_count': pdf_count,
-                'tiff_count': tiff_count,
-                'total_count': pdf_count + tiff_count
-            }
-            
-            ml_included = len(attached_media) - ml_filtered_count
-            logger.info(f"PID {pid}: {result['pdf_count']} PDFs, {result['tiff_count']} TIFF-source derivatives from {ml_included}/{len(attached_media)} attached media items (used_for_ml filter applied)")
-            if ml_filtered_count > 0:
-                logger.info(f"PID {pid}: Filtered out {ml_filtered_count} media items not marked for ML use")
-            return result
-            
-        except requests.exceptions.RequestException as e:
+        except DDRClientError as e:
             logger.error(f"HTTP error querying DDR Archive for PID {pid}: {e}")
             return {'pdf_count': 0, 'tiff_count': 0, 'total_count': 0}
         except Exception as e:
             logger.error(f"Unexpected error querying media counts for PID {pid}: {e}")
             return {'pdf_count': 0, 'tiff_count': 0, 'total_count': 0}
     
+    def count_media(self, pid: str, record: Optional[Dict]) -> Dict[str, int]:
+        """
+        Count ML-eligible PDFs and TIFF-source derivatives in a record_v1 result
+        
+        Args:
+            pid: The PID the record was requested for
+            record: record_v1 result (None if the PID was not found)
+        
+        Returns:
+            Dict with pdf_count, tiff_count, total_count
+        """
+        if not record:
+            logger.warning(f"No record found for PID {pid}")
+            return _empty_counts()
+        
+        attached_media = record.get('attached_media')
+        
+        if not attached_media:
+            logger.info(f"No attached media found for PID {pid}")
+            return _empty_counts()
+        
+        # Count PDF files and JPG derivatives (which may include TIFFs as source)
+        # PERMANENT FILTER: ONLY include media items marked as used_for_ml: true
+        # This ensures we exclude hi-res TIFFs of photographs and other non-relevant
+        # assets that have been manually flagged in DDR Archive admin.
+        # This filter is critical for Docling ingestion quality control.
+        pdf_count = 0
+        tiff_count = 0
+        ml_filtered_count = 0
+        
+        for media_item in attached_media:
+            # Skip items not marked for ML use (permanent gate)
+            if not media_item.get('used_for_ml', False):
+                ml_filtered_count += 1
+                logger.debug(f"Skipping media item {media_item.get('id')} '{media_item.get('title')}' - not marked for ML (used_for_ml=false)")
+                continue
+            
+            pdf_files = media_item.get('pdf_files') or []
+            jpg_derivatives = media_item.get('jpg_derivatives') or []
+            
+            pdf_count += len(pdf_files)
+            # JPG derivatives are generated from source images (often TIFFs)
+            # Count master/preservation derivatives as potential TIFF sources
+            for deriv in jpg_derivatives:
+                if deriv.get('role') in ['master', 'preservation', 'access-master']:
+                    tiff_count += 1
+        
+        result = {
+            'pdf_count': pdf_count,
+            'tiff_count': tiff_count,
+            'total_count': pdf_count + tiff_count
+        }
+        
+        ml_included = len(attached_media) - ml_filtered_count
+        logger.info(f"PID {pid}: {result['pdf_count']} PDFs, {result['tiff_count']} TIFF-source derivatives from {ml_included}/{len(attached_media)} attached media items (used_for_ml filter applied)")
+        if ml_filtered_count > 0:
+            logger.info(f"PID {pid}: Filtered out {ml_filtered_count} media items not marked for ML use")
+        return result
+    
+    def _build_batch_query(self, pids: List[str]) -> Tuple[str, Dict[str, str]]:
+        """Build one aliased record_v1 query (p0, p1, ...) for a batch of PIDs"""
+        variable_defs = ', '.join(f'$p{i}: ID!' for i in range(len(pids)))
+        selections = '\n'.join(
+            f'p{i}: record_v1(id: $p{i}) {{ {MEDIA_COUNT_FIELDS} }}' for i in range(len(pids))
+        )
+        query = f"""
+        query GetMediaForPIDs({variable_defs}) {{
+            {selections}
+        }}
+        """
+        variables = {f'p{i}': pid for i, pid in enumerate(pids)}
+        return query, variables
+    
+    async def _fetch_batch(
+        self,
+        limiter: AdaptiveConcurrencyLimiter,
+        pids: List[str]
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Fetch media counts for one batch of PIDs, retrying with adaptive backoff
+        
+        Throttling responses (429/5xx) lower the shared concurrency limit and
+        honour Retry-After; other failures are retried with jittered backoff.
+        An open DDR circuit fails the batch immediately.
+        
+        Raises:
+            DDRClientError: If the batch still fails after all retries
+        """
+        query, variables = self._build_batch_query(pids)
+        
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            throttled = False
+            error = None
+            try:
+                # Retries happen here so throttling can feed the limiter
+                data = await self.async_client.execute(
+                    query, variables, operation='GetMediaForPIDs', max_retries=0
+                )
+            except DDRClientError as e:
+                error = e
+                throttled = e.status_code in THROTTLE_STATUSES
+            finally:
+                await limiter.release(throttled=throttled)
+            
+            if error is None:
+                break
+            if attempt >= self.max_retries or isinstance(error, CircuitOpenError):
+                raise error
+            
+            delay = (
+                error.retry_after if error.retry_after is not None
+                else min(2 ** attempt, 30) * (0.5 + random.random())
+            )
+            logger.warning(
+                f"Media count batch of {len(pids)} PIDs failed ({error}); "
+                f"retry {attempt + 1} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+        
+        if data.get('errors'):
+            # Aliased queries return partial data; failed aliases come back null
+            logger.error(f"GraphQL errors in media count batch of {len(pids)} PIDs: {data['errors']}")
+        
+        records = data.get('data') or {}
+        return {
+            pid: self.count_media(pid, records.get(f'p{i}'))
+            for i, pid in enumerate(pids)
+        }
+    
+    async def fetch_media_counts(self, pids: List[str]) -> Tuple[Dict[str, Dict[str, int]], List[str]]:
+        """
+        Fetch media counts for many PIDs using batched, concurrent aliased queries
+        
+        Args:
+            pids: List of PID strings
+        
+        Returns:
+            Tuple of (PID -> counts for every PID fetched, PIDs whose batch failed)
+        """
+        batches = [pids[i:i + self.batch_size] for i in range(0, len(pids), self.batch_size)]
+        limiter = AdaptiveConcurrencyLimiter(self.concurrency)
+        
+        results: Dict[str, Dict[str, int]] = {}
+        failed: List[str] = []
+        
+        outcomes = await asyncio.gather(
+            *(self._fetch_batch(limiter, batch) for batch in batches),
+            return_exceptions=True
+        )
+        
+        for batch, outcome in zip(batches, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Media count batch of {len(batch)} PIDs failed after retries: {outcome}")
+                failed.extend(batch)
+            else:
+                results.update(outcome)
+        
+        logger.info(
+            f"Fetched media counts for {len(results)}/{len(pids)} PIDs in {len(batches)} batches "
+            f"(batch_size={self.batch_size}, final concurrency={limiter.limit})"
+        )
+        return results, failed
+    
+    def _fetch_media_counts_blocking(self, pids: List[str]) -> Tuple[Dict[str, Dict[str, int]], List[str]]:
+        """Run fetch_media_counts() on a private event loop and close its pool afterwards"""
+        async def run():
+            try:
+                return await self.fetch_media_counts(pids)
+            finally:
+                await self.async_client.aclose()
+        
+        return asyncio.run(run())
+    
     def get_media_counts_bulk(self, pids: List[str]) -> Dict[str, Dict[str, int]]:
         """
         Get media counts for multiple PIDs
@@ -147,12 +346,11 @@ class PIDMediaCountService:
         
         Returns:
             Dict mapping PID -> {pdf_count, tiff_count, total_count}
+            (zero counts for PIDs whose batch failed)
         """
-        results = {}
-        
-        for pid in pids:
-            results[pid] = self.get_media_counts_for_pid(pid)
-        
+        results, failed = self._fetch_media_counts_blocking(pids)
+        for pid in failed:
+            results[pid] = _empty_counts()
         return results
     
     def update_database_media_counts(self, pid: str, pdf_count: int, tiff_count: int, db=None):
@@ -198,6 +396,78 @@ class PIDMediaCountService:
             if close_session:
                 db.close()
     
+    def update_database_media_counts_bulk(
+        self,
+        counts_by_pid: Dict[str, Dict[str, int]],
+        db=None,
+        batch_size: Optional[int] = None
+    ) -> int:
+        """
+        Write media counts for many PIDs with one UPDATE ... FROM (VALUES ...) per batch
+        
+        All batches run in a single transaction; per-batch timing is logged.
+        
+        Args:
+            counts_by_pid: Dict mapping PID -> {pdf_count, tiff_count, ...}
+            db: Optional database session (if None, creates new one)
+            batch_size: PIDs per UPDATE statement (default from config)
+        
+        Returns:
+            Number of document rows updated
+        """
+        batch_size = batch_size or self.update_batch_size
+        items = list(counts_by_pid.items())
+        if not items:
+            return 0
+        
+        close_session = False
+        if db is None:
+            db = LocalSessionLocal()
+            close_session = True
+        
+        rows_updated = 0
+        try:
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                values_sql = ', '.join(
+                    f"(:pid_{i}, CAST(:pdf_{i} AS INTEGER), CAST(:tiff_{i} AS INTEGER))"
+                    for i in range(len(batch))
+                )
+                params = {}
+                for i, (pid, counts) in enumerate(batch):
+                    params[f'pid_{i}'] = pid
+                    params[f'pdf_{i}'] = counts['pdf_count']
+                    params[f'tiff_{i}'] = counts['tiff_count']
+                
+                started = time.perf_counter()
+                result = db.execute(
+                    text(f"""
+                        UPDATE documents AS d
+                        SET pdf_count = v.pdf_count,
+                            tiff_count = v.tiff_count
+                        FROM (VALUES {values_sql}) AS v(pid, pdf_count, tiff_count)
+                        WHERE d.pid = v.pid
+                    """),
+                    params
+                )
+                rows_updated += result.rowcount
+                logger.info(
+                    f"Media count batch {start // batch_size + 1}: {len(batch)} PIDs, "
+                    f"{result.rowcount} documents updated in {(time.perf_counter() - started) * 1000:.1f} ms"
+                )
+            
+            db.commit()
+            logger.info(f"Updated {rows_updated} documents with media counts for {len(items)} PIDs")
+            return rows_updated
+            
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error bulk updating media counts: {e}")
+            raise
+        finally:
+            if close_session:
+                db.close()
+    
     def sync_all_pid_media_counts(self, db=None) -> Dict[str, any]:
         """
         Query all PIDs in database and update their media counts
@@ -229,23 +499,21 @@ class PIDMediaCountService:
                 'errors': 0
             }
             
-            for pid in pids:
-                counts = self.get_media_counts_for_pid(pid)
-                
+            all_counts, failed = self._fetch_media_counts_blocking(pids)
+            stats['errors'] += len(failed)
+            
+            to_update = {}
+            for pid, counts in all_counts.items():
                 if counts['total_count'] > 0:
-                    self.update_database_media_counts(
-                        pid, 
-                        counts['pdf_count'], 
-                        counts['tiff_count'],
-                        db=db
-                    )
-                    
+                    to_update[pid] = counts
                     stats['pids_processed'] += 1
                     stats['total_pdfs'] += counts['pdf_count']
                     stats['total_tiffs'] += counts['tiff_count']
                 else:
                     stats['errors'] += 1
             
+            self.update_database_media_counts_bulk(to_update, db=db)
+            
             logger.info(f"Media count sync complete: {stats}")
             return stats
             
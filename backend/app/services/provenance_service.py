@@ -175,7 +175,10 @@ class ProvenanceService:
         model_version: str,
         top_k_chunks: List[Dict],
         training_run_id: Optional[str] = None,
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        inference_time_ms: Optional[int] = None,
+        query_embedding: Optional[List[float]] = None,
+        source_set_hash: Optional[str] = None
     ) -> str:
         """
         Log an inference with provenance back to source documents
@@ -188,6 +191,9 @@ class ProvenanceService:
                 [{"chunk_id": "...", "similarity": 0.87, ...}]
             training_run_id: Links to training run
             session_id: Research session ID
+            inference_time_ms: Generation time (0 for cached responses)
+            query_embedding: Query vector, used by the semantic cache
+            source_set_hash: Hash of the context chunks given to the model
         
         Returns:
             inference_id
@@ -234,6 +240,9 @@ class ProvenanceService:
                 top_k_chunks=enriched_chunks,
                 source_pids=source_pids,
                 source_years=sorted(source_years),
+                inference_time_ms=inference_time_ms,
+                query_embedding=query_embedding,
+                source_set_hash=source_set_hash,
                 session_id=session_id
             )
             
@@ -0,0 +1,175 @@
+"""
+S3 inventory cache - shared S3 client and cached bucket statistics
+
+Bucket listings are expensive (one request per 1,000 objects), so statistics
+are served from an in-process inventory summary. The summary is refreshed in
+a background thread once it is older than S3_STATS_TTL_SECONDS, and is also
+updated for free whenever S3SyncService lists the whole bucket.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+PDF_EXTENSIONS = ('.pdf',)
+TIFF_EXTENSIONS = ('.tiff', '.tif')
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    Get the process-wide S3 client for DigitalOcean Spaces
+
+    boto3 clients are thread-safe and keep a connection pool, so one client
+    is shared by every caller instead of being rebuilt per request.
+
+    Returns:
+        boto3 S3 client, or None if S3 credentials are not configured
+    """
+    global _s3_client
+    if not settings.S3_ENDPOINT or not settings.S3_ACCESS_KEY:
+        return None
+
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = boto3.client(
+                    's3',
+                    endpoint_url=settings.S3_ENDPOINT,
+                    aws_access_key_id=settings.S3_ACCESS_KEY,
+                    aws_secret_access_key=settings.S3_SECRET_KEY,
+                    region_name='nyc3',
+                    config=Config(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS)
+                )
+                logger.info("S3 client initialized successfully")
+
+    return _s3_client
+
+
+class InventoryAccumulator:
+    """Accumulate bucket statistics while iterating over list_objects_v2 entries"""
+
+    def __init__(self):
+        self.total_assets = 0
+        self.total_size_bytes = 0
+        self.images = 0
+        self.pdfs = 0
+        self.tiffs = 0
+
+    def add(self, obj: Dict):
+        key = obj['Key'].lower()
+        self.total_assets += 1
+        self.total_size_bytes += obj.get('Size', 0)
+
+        if key.endswith(PDF_EXTENSIONS):
+            self.pdfs += 1
+        elif key.endswith(TIFF_EXTENSIONS):
+            self.tiffs += 1
+        elif key.endswith(IMAGE_EXTENSIONS):
+            self.images += 1
+
+    def add_many(self, objects: Iterable[Dict]):
+        for obj in objects:
+            self.add(obj)
+
+    def summary(self) -> Dict:
+        return {
+            'total_assets': self.total_assets,
+            'total_size_bytes': self.total_size_bytes,
+            'images': self.images,
+            'pdfs': self.pdfs,
+            'tiffs': self.tiffs,
+            'refreshed_at': datetime.utcnow()
+        }
+
+
+class S3InventoryCache:
+    """Cached bucket statistics with TTL-driven background refresh"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.S3_STATS_TTL_SECONDS
+        self._summary: Optional[Dict] = None
+        self._recorded_at: Optional[float] = None  # time.monotonic() of last update
+        self._last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def is_stale(self) -> bool:
+        return (
+            self._recorded_at is None
+            or time.monotonic() - self._recorded_at > self.ttl_seconds
+        )
+
+    def record(self, summary: Dict):
+        """Store a fresh inventory summary (from a refresh or a sync listing)"""
+        with self._lock:
+            self._summary = summary
+            self._recorded_at = time.monotonic()
+            self._last_error = None
+
+    def refresh(self):
+        """List the whole bucket and record its summary (blocking)"""
+        s3_client = get_s3_client()
+        if not s3_client:
+            return
+
+        try:
+            accumulator = InventoryAccumulator()
+            paginator = s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=settings.S3_BUCKET):
+                accumulator.add_many(page.get('Contents', []))
+
+            self.record(accumulator.summary())
+            logger.info(
+                f"Refreshed S3 inventory: {accumulator.total_assets} objects, "
+                f"{accumulator.total_size_bytes} bytes"
+            )
+        except ClientError as e:
+            logger.error(f"S3 error refreshing inventory: {e}")
+            self._last_error = str(e)
+        except Exception as e:
+            logger.error(f"Unexpected error refreshing S3 inventory: {e}")
+            self._last_error = str(e)
+
+    def refresh_async(self):
+        """Start a background refresh unless one is already running"""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self.refresh,
+                name='s3-inventory-refresh',
+                daemon=True
+            )
+            self._refresh_thread.start()
+
+    def get_summary(self) -> Optional[Dict]:
+        """
+        Return the cached summary immediately, scheduling a refresh if stale
+
+        Returns:
+            Summary dict, or None until the first inventory has been recorded
+        """
+        if self.is_stale():
+            self.refresh_async()
+        return self._summary
+
+    @property
+    def last_error(self) -> Optional[str]:
+        return self._last_error
+
+
+# Global instance
+s3_inventory_cache = S3InventoryCache()
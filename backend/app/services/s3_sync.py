@@ -2,22 +2,27 @@
 S3 Spaces sync service - pulls PDFs from DigitalOcean Spaces
 Automatically processes documents for epistemic drift analysis
 """
+import asyncio
+import json
 import logging
 import re
 import tempfile
+import time
 import os
 from typing import List, Dict, Optional
-import boto3
 from botocore.exceptions import ClientError
+from sqlalchemy import text
 import uuid
 from datetime import datetime
 
 from app.core.config import settings
 from app.core.database import LocalSessionLocal
-from app.models.document import Document, DocumentChunk
+from app.models.document import Document
+from app.services.chunk_writer import ChunkBulkWriter
 from app.services.docling_processor import DoclingProcessor
 from app.services.embedding_service import EmbeddingService
 from app.services.authority_service import AuthorityService
+from app.services.s3_inventory import InventoryAccumulator, get_s3_client, s3_inventory_cache
 
 logger = logging.getLogger(__name__)
 
@@ -25,29 +30,25 @@ logger = logging.getLogger(__name__)
 class S3SyncService:
     """Sync documents from DigitalOcean Spaces to local database"""
     
+    SYNC_SOURCE = 's3_spaces'
+    
     def __init__(self):
         self.s3_client = None
         self.docling = DoclingProcessor()
         self.embeddings = EmbeddingService()
+        self.chunk_writer = ChunkBulkWriter()
         self.authorities = AuthorityService()  # For PID validation and metadata enrichment
         self._init_s3_client()
         self._valid_pids_cache = None  # Cache of PIDs from Postgres authorities
+        self._active_jobs = set()  # sync_ids of jobs running in this process
+        self._job_active = asyncio.Event()  # set while _active_jobs is non-empty
     
     def _init_s3_client(self):
-        """Initialize S3 client for DigitalOcean Spaces"""
-        if not settings.S3_ENDPOINT or not settings.S3_ACCESS_KEY:
-            logger.warning("S3 credentials not configured - sync disabled")
-            return
-        
+        """Attach the shared S3 client for DigitalOcean Spaces"""
         try:
-            self.s3_client = boto3.client(
-                's3',
-                endpoint_url=settings.S3_ENDPOINT,
-                aws_access_key_id=settings.S3_ACCESS_KEY,
-                aws_secret_access_key=settings.S3_SECRET_KEY,
-                region_name='nyc3'
-            )
-            logger.info("S3 client initialized successfully")
+            self.s3_client = get_s3_client()
+            if not self.s3_client:
+                logger.warning("S3 credentials not configured - sync disabled")
         except Exception as e:
             logger.error(f"Failed to initialize S3 client: {e}")
     
@@ -116,7 +117,6 @@ class S3SyncService:
         db = LocalSessionLocal()
         try:
             # Get all PIDs from documents table (already ingested)
-            from sqlalchemy import text
             result = db.execute(text(
                 "SELECT DISTINCT pid FROM documents WHERE pid IS NOT NULL"
             ))
@@ -156,6 +156,7 @@ class S3SyncService:
         try:
             assets = []
             filtered_count = 0
+            inventory = InventoryAccumulator()
             paginator = self.s3_client.get_paginator('list_objects_v2')
             pages = paginator.paginate(Bucket=settings.S3_BUCKET)
             
@@ -165,6 +166,7 @@ class S3SyncService:
                 
                 for obj in page['Contents']:
                     key = obj['Key']
+                    inventory.add(obj)
                     
                     # Filter for PDFs and TIFFs only (training-eligible formats)
                     allowed_extensions = ('.pdf', '.tiff', '.tif')
@@ -198,6 +200,9 @@ class S3SyncService:
                         'publication_year': year
                     })
             
+            # Full listing doubles as a fresh inventory for bucket statistics
+            s3_inventory_cache.record(inventory.summary())
+            
             logger.info(
                 f"Found {len(assets)} PID-linked training assets in S3 bucket "
                 f"({filtered_count} filtered out - no valid PID)"
@@ -246,6 +251,9 @@ class S3SyncService:
         
         CRITICAL: Requires PID in pdf_info - only authority-linked assets are processed
         
+        A document already stored for the key is skipped only once it is
+        completed; one left 'failed' or 'processing' is reprocessed in place.
+        
         Returns:
             document_id if successful, None otherwise
         """
@@ -263,36 +271,52 @@ class S3SyncService:
                 Document.s3_key == pdf_info['key']
             ).first()
             
-            if existing:
+            if existing and existing.processing_status == 'completed':
                 logger.info(f"Document {pdf_info['key']} already processed (PID: {existing.pid})")
                 return existing.document_id
             
-            # Generate document ID
-            document_id = f"doc_{uuid.uuid4().hex[:12]}"
+            publication_year = pdf_info.get('publication_year') or 1970  # Default mid-period
             
-            # Determine file type
-            if pdf_info['key'].lower().endswith('.pdf'):
-                file_type = 'application/pdf'
-            elif pdf_info['key'].lower().endswith(('.tiff', '.tif')):
-                file_type = 'image/tiff'
+            if existing:
+                # Left 'failed' or 'processing' by an earlier attempt: reprocess the
+                # same row; write_chunks replaces any chunks it left behind
+                logger.info(
+                    f"Reprocessing {pdf_info['key']} (PID: {existing.pid}, "
+                    f"was {existing.processing_status})"
+                )
+                document_id = existing.document_id
+                publication_year = existing.publication_year or publication_year
+                doc = existing
+                doc.processing_status = 'processing'
+                doc.processing_error = None
+                db.commit()
             else:
-                file_type = 'application/octet-stream'
-            
-            # Create document record with PID
-            doc = Document(
-                document_id=document_id,
-                pid=pdf_info['pid'],  # CRITICAL: Authority linkage
-                title=pdf_info['filename'],
-                publication_year=pdf_info.get('publication_year') or 1970,  # Default mid-period
-                filename=pdf_info['filename'],
-                file_type=file_type,
-                s3_key=pdf_info['key'],
-                file_size_bytes=pdf_info['size'],
-                processing_status='processing'
-            )
-            
-            db.add(doc)
-            db.commit()
+                # Generate document ID
+                document_id = f"doc_{uuid.uuid4().hex[:12]}"
+                
+                # Determine file type
+                if pdf_info['key'].lower().endswith('.pdf'):
+                    file_type = 'application/pdf'
+                elif pdf_info['key'].lower().endswith(('.tiff', '.tif')):
+                    file_type = 'image/tiff'
+                else:
+                    file_type = 'application/octet-stream'
+                
+                # Create document record with PID
+                doc = Document(
+                    document_id=document_id,
+                    pid=pdf_info['pid'],  # CRITICAL: Authority linkage
+                    title=pdf_info['filename'],
+                    publication_year=publication_year,
+                    filename=pdf_info['filename'],
+                    file_type=file_type,
+                    s3_key=pdf_info['key'],
+                    file_size_bytes=pdf_info['size'],
+                    processing_status='processing'
+                )
+                
+                db.add(doc)
+                db.commit()
             
             # Process with Docling
             logger.info(f"Processing {pdf_info['filename']} with Docling...")
@@ -304,43 +328,43 @@ class S3SyncService:
                 db.commit()
                 return None
             
-            # Update document with extracted text
-            doc.extracted_text = result.get('text', '')
-            doc.has_diagrams = len(result.get('diagrams', []))
+            extracted_text = result.get('text', '')
             
             # Chunk text for embeddings
-            chunks_text = self.docling.chunk_text(doc.extracted_text)
+            chunks_text = self.docling.chunk_text(extracted_text)
             
             logger.info(f"Generated {len(chunks_text)} chunks from {pdf_info['filename']}")
             
             # Generate embeddings for each chunk
             embeddings = self.embeddings.generate_batch_embeddings(chunks_text)
             
-            # Store chunks with embeddings
-            for idx, (chunk_text, embedding) in enumerate(zip(chunks_text, embeddings)):
-                if not embedding:
-                    continue
-                
-                chunk_id = f"{document_id}_chunk_{idx}"
-                
-                chunk = DocumentChunk(
-                    chunk_id=chunk_id,
-                    document_id=document_id,
-                    chunk_text=chunk_text,
-                    chunk_index=idx,
-                    chunk_type='paragraph',
-                    publication_year=doc.publication_year,
-                    embedding_vector=str(embedding),  # Store as JSON string
-                    embedding_model=self.embeddings.model_name
-                )
-                
-                db.add(chunk)
-            
-            # Mark as completed
-            doc.processing_status = 'completed'
-            doc.processed_at = datetime.utcnow()
-            
-            db.commit()
+            # Stream chunks with binary embeddings via COPY; the chunks, extracted
+            # text and completed status commit together, replacing any chunks
+            # left by an earlier attempt
+            chunk_rows = (
+                {
+                    'chunk_id': f"{document_id}_chunk_{idx}",
+                    'document_id': document_id,
+                    'chunk_text': chunk_text,
+                    'chunk_index': idx,
+                    'chunk_type': 'paragraph',
+                    'publication_year': publication_year,
+                    'embedding_vector': embedding,
+                    'embedding_model': self.embeddings.model_name
+                }
+                for idx, (chunk_text, embedding) in enumerate(zip(chunks_text, embeddings))
+                if embedding
+            )
+            self.chunk_writer.write_chunks(
+                document_id,
+                chunk_rows,
+                document_updates={
+                    'extracted_text': extracted_text,
+                    'has_diagrams': len(result.get('diagrams', [])),
+                    'processing_status': 'completed',
+                    'processed_at': datetime.utcnow()
+                }
+            )
             logger.info(f"Successfully processed {pdf_info['filename']}")
             
             return document_id
@@ -360,77 +384,395 @@ class S3SyncService:
         finally:
             db.close()
     
-    async def sync_from_s3(self, max_docs: Optional[int] = None) -> Dict:
+    def start_sync_job(
+        self,
+        max_docs: Optional[int] = None,
+        triggered_by: str = 'api',
+        sync_type: str = 'manual',
+        sync_config: Optional[Dict] = None
+    ) -> str:
         """
-        Sync all PDFs from S3 bucket
+        Register a persisted S3 sync job in sync_log
+        
+        The job is executed separately by run_sync_job(); its sync_id doubles
+        as the job id for progress polling and resumption.
         
         Args:
             max_docs: Maximum number of documents to process (None = all)
+            triggered_by: Who/what triggered the sync
+            sync_type: sync_log type of the job
+            sync_config: Stored in sync_log.config alongside max_docs
         
         Returns:
-            Summary of sync operation
+            sync_id of the new job
         """
-        if not self.s3_client:
+        db = LocalSessionLocal()
+        try:
+            sync_id = f"sync_{uuid.uuid4().hex[:12]}"
+            
+            db.execute(text("""
+                INSERT INTO sync_log (
+                    sync_id, sync_type, sync_source, status, triggered_by,
+                    config, sync_checkpoint
+                ) VALUES (
+                    :sync_id, :sync_type, :sync_source, 'running', :triggered_by,
+                    CAST(:config AS jsonb), CAST(:checkpoint AS jsonb)
+                )
+            """), {
+                'sync_id': sync_id,
+                'sync_type': sync_type,
+                'sync_source': self.SYNC_SOURCE,
+                'triggered_by': triggered_by,
+                'config': json.dumps({**(sync_config or {}), 'max_docs': max_docs}),
+                'checkpoint': json.dumps({'completed': 0, 'failed': 0})
+            })
+            db.commit()
+            
+            logger.info(f"Created S3 sync job {sync_id} (max_docs={max_docs})")
+            return sync_id
+            
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    def get_sync_job(self, sync_id: str) -> Optional[Dict]:
+        """
+        Get progress of a persisted S3 sync job
+        
+        Returns:
+            Job status dict, or None if no such job exists
+        """
+        db = LocalSessionLocal()
+        try:
+            row = db.execute(text("""
+                SELECT sync_id, status, sync_started_at, sync_completed_at,
+                       records_fetched, records_new, records_failed,
+                       sync_checkpoint, config, error_log
+                FROM sync_log
+                WHERE sync_id = :sync_id AND sync_source = :sync_source
+            """), {'sync_id': sync_id, 'sync_source': self.SYNC_SOURCE}).fetchone()
+            
+            if not row:
+                return None
+            
+            checkpoint = row.sync_checkpoint or {}
+            completed = checkpoint.get('completed', 0)
+            failed = checkpoint.get('failed', 0)
+            total = checkpoint.get('total')
+            
             return {
-                'error': 'S3 not configured',
-                'processed': 0,
-                'failed': 0,
-                'skipped': 0
+                'job_id': row.sync_id,
+                'status': row.status,
+                'active': sync_id in self._active_jobs,
+                'started_at': row.sync_started_at.isoformat() if row.sync_started_at else None,
+                'completed_at': row.sync_completed_at.isoformat() if row.sync_completed_at else None,
+                'total': total,
+                'completed': completed,
+                'failed': failed,
+                'remaining': max(total - completed - failed, 0) if total is not None else None,
+                'current_key': checkpoint.get('current_key'),
+                'config': row.config or {},
+                'error_log': row.error_log
             }
+        finally:
+            db.close()
+    
+    def _load_checkpoint(self, sync_id: str) -> Optional[Dict]:
+        """Load checkpoint and config for a job (None if job is unknown)"""
+        db = LocalSessionLocal()
+        try:
+            row = db.execute(text("""
+                SELECT sync_checkpoint, config FROM sync_log
+                WHERE sync_id = :sync_id AND sync_source = :sync_source
+            """), {'sync_id': sync_id, 'sync_source': self.SYNC_SOURCE}).fetchone()
+            
+            if not row:
+                return None
+            
+            checkpoint = row.sync_checkpoint or {}
+            checkpoint.setdefault('completed', 0)
+            checkpoint.setdefault('failed', 0)
+            checkpoint['config'] = row.config or {}
+            return checkpoint
+        finally:
+            db.close()
+    
+    def _completed_keys(self, sync_id: str) -> set:
+        """Keys the job already completed; failed ones are cleared so they are retried"""
+        db = LocalSessionLocal()
+        try:
+            db.execute(text("""
+                DELETE FROM s3_sync_job_objects WHERE sync_id = :sync_id AND status = 'failed'
+            """), {'sync_id': sync_id})
+            db.commit()
+            result = db.execute(text("""
+                SELECT s3_key FROM s3_sync_job_objects WHERE sync_id = :sync_id AND status = 'completed'
+            """), {'sync_id': sync_id})
+            return {row[0] for row in result}
+        finally:
+            db.close()
+    
+    def _save_checkpoint(
+        self,
+        sync_id: str,
+        checkpoint: Dict,
+        finished: Optional[List[Dict]] = None,
+        status: str = 'running'
+    ):
+        """
+        Persist progress so an interrupted job can resume
         
-        pdfs = self.list_pdfs_in_bucket()
+        Objects finished since the last save are inserted into
+        s3_sync_job_objects; sync_log only gets the counters, in the same
+        transaction.
         
-        if not pdfs:
-            return {
-                'message': 'No PDFs found in bucket',
-                'processed': 0,
-                'failed': 0,
-                'skipped': 0
-            }
+        Args:
+            sync_id: Job id
+            checkpoint: Counters, total and current key
+            finished: {'s3_key', 'status'} rows finished since the last save;
+                cleared once written
+            status: sync_log status to record
+        """
+        db = LocalSessionLocal()
+        try:
+            if finished:
+                db.execute(text("""
+                    INSERT INTO s3_sync_job_objects (sync_id, s3_key, status)
+                    VALUES (:sync_id, :s3_key, :status)
+                    ON CONFLICT (sync_id, s3_key) DO UPDATE
+                    SET status = EXCLUDED.status, finished_at = NOW()
+                """), [{'sync_id': sync_id, **row} for row in finished])
+            db.execute(text("""
+                UPDATE sync_log
+                SET sync_checkpoint = CAST(:checkpoint AS jsonb),
+                    records_fetched = :records_fetched,
+                    records_new = :records_new,
+                    records_failed = :records_failed,
+                    last_successful_pid = COALESCE(:last_pid, last_successful_pid),
+                    status = :status
+                WHERE sync_id = :sync_id
+            """), {
+                'sync_id': sync_id,
+                'checkpoint': json.dumps({
+                    k: v for k, v in checkpoint.items() if k != 'config'
+                }),
+                'records_fetched': checkpoint.get('total') or 0,
+                'records_new': checkpoint['completed'],
+                'records_failed': checkpoint['failed'],
+                'last_pid': checkpoint.get('last_pid'),
+                'status': status
+            })
+            db.commit()
+            if finished:
+                finished.clear()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to checkpoint S3 sync job {sync_id}: {e}")
+        finally:
+            db.close()
+    
+    def _complete_sync_job(
+        self,
+        sync_id: str,
+        checkpoint: Dict,
+        error_log: Optional[str] = None,
+        finished: Optional[List[Dict]] = None
+    ):
+        """Mark a job finished via complete_sync() so sync_metadata health is updated"""
+        failed = checkpoint['failed']
+        if error_log:
+            status = 'failed'
+        elif failed:
+            status = 'partial'
+        else:
+            status = 'completed'
         
-        # Filter by year if possible
-        pdfs_with_year = [p for p in pdfs if p['publication_year']]
-        pdfs_no_year = [p for p in pdfs if not p['publication_year']]
+        checkpoint.pop('current_key', None)
+        self._save_checkpoint(sync_id, checkpoint, finished, status=status)
         
-        logger.info(f"PDFs with year: {len(pdfs_with_year)}, without year: {len(pdfs_no_year)}")
+        db = LocalSessionLocal()
+        try:
+            db.execute(text("""
+                SELECT complete_sync(
+                    :sync_id, :records_new, 0, :records_failed, :status
+                )
+            """), {
+                'sync_id': sync_id,
+                'records_new': checkpoint['completed'],
+                'records_failed': failed,
+                'status': status
+            })
+            if error_log:
+                db.execute(text(
+                    "UPDATE sync_log SET error_log = :error_log WHERE sync_id = :sync_id"
+                ), {'sync_id': sync_id, 'error_log': error_log})
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to complete S3 sync job {sync_id}: {e}")
+        finally:
+            db.close()
         
-        # Limit number of documents
-        if max_docs:
-            pdfs = pdfs[:max_docs]
+        return status
+    
+    async def run_sync_job(self, sync_id: str) -> Dict:
+        """
+        Execute (or resume) a persisted S3 sync job
         
-        processed = 0
-        failed = 0
-        skipped = 0
+        Objects already recorded as completed for the job are skipped
+        without being downloaded again; failed objects are retried. Progress
+        is written every S3_SYNC_CHECKPOINT_EVERY objects or
+        S3_SYNC_CHECKPOINT_SECONDS, whichever comes first. After a crash the
+        unsaved objects are downloaded again, and process_pdf skips those
+        already ingested.
         
-        for pdf_info in pdfs:
-            try:
-                # Download PDF
-                temp_path = self.download_pdf_from_s3(pdf_info['key'])
-                
-                if not temp_path:
-                    failed += 1
-                    continue
-                
-                # Process PDF
-                doc_id = await self.process_pdf(pdf_info, temp_path)
+        Returns:
+            Final job status (see get_sync_job)
+        """
+        if sync_id in self._active_jobs:
+            logger.info(f"S3 sync job {sync_id} is already running in this process")
+            return self.get_sync_job(sync_id)
+        
+        checkpoint = self._load_checkpoint(sync_id)
+        if checkpoint is None:
+            raise ValueError(f"Unknown S3 sync job: {sync_id}")
+        
+        self._active_jobs.add(sync_id)
+        self._job_active.set()
+        finished = []
+        try:
+            if not self.s3_client:
+                self._complete_sync_job(sync_id, checkpoint, error_log='S3 not configured')
+                return self.get_sync_job(sync_id)
+            
+            assets = await asyncio.to_thread(self.list_training_assets_in_bucket)
+            max_docs = checkpoint['config'].get('max_docs')
+            if max_docs:
+                assets = assets[:max_docs]
+            
+            # Failed objects from a previous attempt get another try
+            completed_keys = await asyncio.to_thread(self._completed_keys, sync_id)
+            pending = [a for a in assets if a['key'] not in completed_keys]
+            checkpoint['total'] = len(assets)
+            checkpoint['completed'] = len(assets) - len(pending)
+            checkpoint['failed'] = 0
+            
+            logger.info(
+                f"S3 sync job {sync_id}: {len(assets)} assets, "
+                f"{len(assets) - len(pending)} already completed, {len(pending)} pending"
+            )
+            self._save_checkpoint(sync_id, checkpoint)
+            last_save = time.monotonic()
+            
+            for asset in pending:
+                key = asset['key']
+                checkpoint['current_key'] = key
+                doc_id = None
                 
-                # Clean up temp file
-                os.unlink(temp_path)
+                try:
+                    temp_path = await asyncio.to_thread(self.download_pdf_from_s3, key)
+                    if temp_path:
+                        try:
+                            doc_id = await self.process_pdf(asset, temp_path)
+                        finally:
+                            os.unlink(temp_path)
+                except Exception as e:
+                    logger.error(f"Error syncing {key}: {e}")
                 
                 if doc_id:
-                    processed += 1
+                    finished.append({'s3_key': key, 'status': 'completed'})
+                    checkpoint['completed'] += 1
+                    checkpoint['last_pid'] = asset.get('pid')
                 else:
-                    failed += 1
-                    
-            except Exception as e:
-                logger.error(f"Error syncing {pdf_info['key']}: {e}")
-                failed += 1
+                    finished.append({'s3_key': key, 'status': 'failed'})
+                    checkpoint['failed'] += 1
+                
+                if (
+                    len(finished) >= settings.S3_SYNC_CHECKPOINT_EVERY
+                    or time.monotonic() - last_save >= settings.S3_SYNC_CHECKPOINT_SECONDS
+                ):
+                    self._save_checkpoint(sync_id, checkpoint, finished)
+                    last_save = time.monotonic()
+            
+            self._complete_sync_job(sync_id, checkpoint, finished=finished)
+            
+        except Exception as e:
+            logger.error(f"S3 sync job {sync_id} failed: {e}")
+            self._complete_sync_job(sync_id, checkpoint, error_log=str(e), finished=finished)
+        finally:
+            self._active_jobs.discard(sync_id)
+            if not self._active_jobs:
+                self._job_active.clear()
+        
+        return self.get_sync_job(sync_id)
+    
+    def active_job_ids(self) -> List[str]:
+        """sync_ids of jobs running in this process"""
+        return list(self._active_jobs)
+    
+    async def wait_for_active_job(self) -> str:
+        """Wait until a job is running in this process and return its sync_id"""
+        while True:
+            await self._job_active.wait()
+            if self._active_jobs:
+                return next(iter(self._active_jobs))
+            # Finished before this waiter resumed; wait for the next one
+            await asyncio.sleep(0)
+    
+    def get_interrupted_job_ids(self) -> List[str]:
+        """
+        Find jobs left 'running' by a previous process (restart, crash)
+        
+        A job another worker is still running also shows as 'running'; resume
+        through the sync scheduler, whose S3 lock keeps the two from overlapping.
+        
+        Returns:
+            sync_ids that can be passed to run_sync_job() to resume
+        """
+        db = LocalSessionLocal()
+        try:
+            result = db.execute(text("""
+                SELECT sync_id FROM sync_log
+                WHERE sync_source = :sync_source AND status = 'running'
+                ORDER BY sync_started_at
+            """), {'sync_source': self.SYNC_SOURCE})
+            return [row[0] for row in result if row[0] not in self._active_jobs]
+        except Exception as e:
+            logger.warning(f"Could not look up interrupted S3 sync jobs: {e}")
+            return []
+        finally:
+            db.close()
+    
+    async def sync_from_s3(self, max_docs: Optional[int] = None) -> Dict:
+        """
+        Sync all PDFs from S3 bucket and wait for completion
+        
+        Runs as a checkpointed job, so an interrupted call can still be
+        resumed through run_sync_job().
+        
+        Args:
+            max_docs: Maximum number of documents to process (None = all)
+        
+        Returns:
+            Summary of sync operation
+        """
+        if not self.s3_client:
+            return {
+                'error': 'S3 not configured',
+                'processed': 0,
+                'failed': 0,
+                'skipped': 0
+            }
+        
+        sync_id = self.start_sync_job(max_docs=max_docs)
+        job = await self.run_sync_job(sync_id)
         
         return {
-            'total_pdfs': len(pdfs),
-            'processed': processed,
-            'failed': failed,
-            'skipped': skipped,
-            'pdfs_with_year': len(pdfs_with_year),
-            'pdfs_without_year': len(pdfs_no_year)
+            'job_id': sync_id,
+            'total_pdfs': job['total'] or 0,
+            'processed': job['completed'],
+            'failed': job['failed'],
+            'skipped': 0
         }
@@ -0,0 +1,476 @@
+"""
+Sync scheduler - one run per sync type, across every API worker and cron
+
+Each sync type (GraphQL records, media counts, authorities, S3) is a named job
+guarded by a Postgres session-level advisory lock, held on a dedicated
+connection for the whole run. A trigger for a job that is already running in
+this process joins that run and gets its result; if another process holds the
+lock the trigger fails with SyncJobBusyError instead of starting a second,
+overlapping sync. Postgres drops the lock if the holder dies.
+
+Every run is recorded in one sync_log row with the job name, lock wait,
+duration and number of coalesced triggers in config. Services that log their
+own runs (GraphQL pull, S3) write that row under their sync_source with the
+job config the scheduler hands them; for the others the scheduler writes it
+under the job's sync_source. Either way complete_sync() updates that source's
+sync_metadata health.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core.database import LocalSessionLocal, local_engine
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAMESPACE = 'sync_scheduler'
+
+
+@dataclass
+class SyncJob:
+    """A named sync that runs at most once at a time"""
+    name: str
+    run: Callable[..., Awaitable[Any]]  # (triggered_by, **options) -> service result
+    counts: Callable[[Any], Dict[str, int]]  # service result -> sync_log record counts
+    sync_source: str  # sync_log / sync_metadata source the runs are recorded under
+    # Service result -> the sync_log row the service wrote for the run. Such jobs
+    # are also called with sync_type and sync_config (the row's config) and the
+    # scheduler adds its timings to that row; None = the scheduler writes the row.
+    log_id: Optional[Callable[[Any], Optional[str]]] = None
+    interval_hours: float = 0  # 0 = only when triggered
+
+
+class SyncJobBusyError(Exception):
+    """The job is already running in another process"""
+
+    def __init__(self, job: str, running: Optional[Dict] = None):
+        self.job = job
+        self.running = running
+        super().__init__(f"Sync job '{job}' is already running in another process")
+
+
+class SyncScheduler:
+    """Runs registered sync jobs on triggers and intervals without overlap"""
+
+    def __init__(self, poll_seconds: int = 60):
+        self.poll_seconds = poll_seconds
+        self._jobs: Dict[str, SyncJob] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._coalesced: Dict[str, int] = {}
+        self._last_run: Dict[str, Dict] = {}
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def register(self, job: SyncJob):
+        self._jobs[job.name] = job
+
+    @property
+    def job_names(self) -> List[str]:
+        return list(self._jobs)
+
+    # Advisory lock and sync_log bookkeeping (blocking, run off the event loop)
+
+    def _try_lock(self, name: str):
+        """Take the job's advisory lock on a dedicated connection, or None if held elsewhere"""
+        conn = local_engine.connect()
+        try:
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:namespace), hashtext(:job))"),
+                {'namespace': LOCK_NAMESPACE, 'job': name}
+            ).scalar()
+            # Session-level lock: survives the commit, released by unlock or disconnect
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+
+        if not acquired:
+            conn.close()
+            return None
+        return conn
+
+    def _unlock(self, conn, name: str):
+        try:
+            conn.execute(
+                text("SELECT pg_advisory_unlock(hashtext(:namespace), hashtext(:job))"),
+                {'namespace': LOCK_NAMESPACE, 'job': name}
+            )
+            conn.commit()
+        except Exception as e:
+            logger.warning(f"Could not release advisory lock for sync job {name}: {e}")
+        finally:
+            conn.close()
+
+    def _start_log(self, job: SyncJob, triggered_by: str, sync_type: str, config: Dict[str, Any]) -> str:
+        db = LocalSessionLocal()
+        try:
+            sync_id = f"sync_{uuid.uuid4().hex[:12]}"
+            db.execute(text("""
+                INSERT INTO sync_log (
+                    sync_id, sync_type, sync_source, status, triggered_by, config
+                ) VALUES (
+                    :sync_id, :sync_type, :sync_source, 'running', :triggered_by,
+                    CAST(:config AS jsonb)
+                )
+            """), {
+                'sync_id': sync_id,
+                'sync_type': sync_type,
+                'sync_source': job.sync_source,
+                'triggered_by': triggered_by,
+                'config': json.dumps(config)
+            })
+            db.commit()
+            return sync_id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _complete_log(
+        self,
+        sync_id: str,
+        status: str,
+        counts: Dict[str, int],
+        timings: Dict[str, Any],
+        error_log: Optional[str] = None
+    ):
+        db = LocalSessionLocal()
+        try:
+            db.execute(text("""
+                SELECT complete_sync(
+                    :sync_id, :records_new, :records_updated, :records_failed, :status
+                )
+            """), {
+                'sync_id': sync_id,
+                'records_new': counts.get('records_new', 0),
+                'records_updated': counts.get('records_updated', 0),
+                'records_failed': counts.get('records_failed', 0),
+                'status': status
+            })
+            db.execute(text("""
+                UPDATE sync_log
+                SET records_fetched = :records_fetched,
+                    records_skipped = :records_skipped,
+                    config = config || CAST(:timings AS jsonb),
+                    error_log = :error_log
+                WHERE sync_id = :sync_id
+            """), {
+                'sync_id': sync_id,
+                'records_fetched': counts.get('records_fetched', 0),
+                'records_skipped': counts.get('records_skipped', 0),
+                'timings': json.dumps(timings),
+                'error_log': error_log
+            })
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to record sync job run {sync_id}: {e}")
+        finally:
+            db.close()
+
+    def _link_log(self, sync_id: str, config: Dict[str, Any]):
+        """Add the scheduler's job config and timings to a row the service completed itself"""
+        db = LocalSessionLocal()
+        try:
+            db.execute(text("""
+                UPDATE sync_log
+                SET config = COALESCE(config, '{}'::jsonb) || CAST(:config AS jsonb)
+                WHERE sync_id = :sync_id
+            """), {'sync_id': sync_id, 'config': json.dumps(config)})
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to record sync job run {sync_id}: {e}")
+        finally:
+            db.close()
+
+    def _running_elsewhere(self, name: str) -> Optional[Dict]:
+        """Latest 'running' sync_log row for the job (the run holding the lock)"""
+        db = LocalSessionLocal()
+        try:
+            row = db.execute(text("""
+                SELECT sync_id, sync_started_at, triggered_by FROM sync_log
+                WHERE config->>'job' = :job AND status = 'running'
+                ORDER BY sync_started_at DESC
+                LIMIT 1
+            """), {'job': name}).fetchone()
+            if not row:
+                return None
+            return {
+                'sync_id': row.sync_id,
+                'started_at': row.sync_started_at.isoformat() if row.sync_started_at else None,
+                'triggered_by': row.triggered_by
+            }
+        except Exception as e:
+            logger.warning(f"Could not look up running sync job {name}: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _started_within(self, name: str, hours: float) -> bool:
+        """Whether the job started a run in the last `hours` (compared on the database clock)"""
+        db = LocalSessionLocal()
+        try:
+            return bool(db.execute(text("""
+                SELECT EXISTS (
+                    SELECT 1 FROM sync_log
+                    WHERE config->>'job' = :job
+                      AND NOW() - sync_started_at < :hours * INTERVAL '1 hour'
+                )
+            """), {'job': name, 'hours': hours}).scalar())
+        finally:
+            db.close()
+
+    # Running jobs
+
+    async def _run(self, job: SyncJob, triggered_by: str, sync_type: str, options: Dict[str, Any]) -> Dict:
+        lock_started = time.perf_counter()
+        conn = await asyncio.to_thread(self._try_lock, job.name)
+        lock_wait_ms = (time.perf_counter() - lock_started) * 1000
+
+        if conn is None:
+            running = await asyncio.to_thread(self._running_elsewhere, job.name)
+            logger.info(f"Sync job {job.name} is already running in another process: {running}")
+            raise SyncJobBusyError(job.name, running)
+
+        try:
+            config = {'job': job.name, 'lock_wait_ms': round(lock_wait_ms, 1)}
+            sync_id = None
+            if job.log_id is None:
+                sync_id = await asyncio.to_thread(self._start_log, job, triggered_by, sync_type, config)
+            else:
+                options = {**options, 'sync_type': sync_type, 'sync_config': config}
+            logger.info(f"Started sync job {job.name}: {sync_id or job.sync_source} (triggered_by={triggered_by})")
+
+            started = time.perf_counter()
+            result, error = None, None
+            try:
+                result = await job.run(triggered_by, **options)
+                status = 'completed'
+            except Exception as e:
+                logger.error(f"Sync job {job.name} ({sync_id or job.sync_source}) failed: {e}")
+                status, error = 'failed', str(e)
+            duration_ms = (time.perf_counter() - started) * 1000
+
+            counts = job.counts(result) if result is not None else {}
+            if status == 'completed' and counts.get('records_failed'):
+                status = 'partial'
+            timings = {
+                'duration_ms': round(duration_ms, 1),
+                'coalesced_triggers': self._coalesced.get(job.name, 0)
+            }
+            if job.log_id is None:
+                await asyncio.to_thread(self._complete_log, sync_id, status, counts, timings, error)
+            else:
+                # The service completed its own row; the job tag is re-applied for resumed rows
+                sync_id = job.log_id(result) if result is not None else None
+                if sync_id is not None:
+                    await asyncio.to_thread(self._link_log, sync_id, {**config, **timings})
+
+            logger.info(f"Sync job {job.name} ({sync_id}) {status} in {duration_ms / 1000:.1f}s")
+            return {
+                'job': job.name,
+                'sync_id': sync_id,
+                'status': status,
+                'triggered_by': triggered_by,
+                'lock_wait_ms': round(lock_wait_ms, 1),
+                **timings,
+                'error': error,
+                'result': result
+            }
+        finally:
+            await asyncio.to_thread(self._unlock, conn, job.name)
+
+    def _finished(self, name: str, task: asyncio.Task):
+        if self._running.get(name) is task:
+            del self._running[name]
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            run = task.result()
+            self._last_run[name] = {k: v for k, v in run.items() if k != 'result'}
+        elif isinstance(error, SyncJobBusyError):
+            self._last_run[name] = {'job': name, 'status': 'busy', 'running_elsewhere': error.running}
+        else:
+            self._last_run[name] = {'job': name, 'status': 'error', 'error': str(error)}
+
+    def submit(
+        self,
+        name: str,
+        triggered_by: str = 'api',
+        sync_type: str = 'manual',
+        **options
+    ) -> Tuple[asyncio.Task, bool]:
+        """
+        Start a job, or join the run already in progress in this process
+
+        Options are passed to the job's run function; a trigger that joins a
+        running job gets that run, whatever options it was started with.
+
+        Returns:
+            Tuple of (task resolving to the run summary, coalesced)
+        """
+        job = self._jobs.get(name)
+        if job is None:
+            raise ValueError(f"Unknown sync job: {name}")
+
+        task = self._running.get(name)
+        if task is not None:
+            self._coalesced[name] = self._coalesced.get(name, 0) + 1
+            logger.info(f"Sync job {name} already running; trigger from {triggered_by} joins it")
+            return task, True
+
+        self._coalesced[name] = 0
+        task = asyncio.create_task(self._run(job, triggered_by, sync_type, options))
+        self._running[name] = task
+        task.add_done_callback(lambda t: self._finished(name, t))
+        return task, False
+
+    async def trigger(self, name: str, triggered_by: str = 'api', sync_type: str = 'manual', **options) -> Dict:
+        """
+        Run a job and wait for its result (shared with any coalesced triggers)
+
+        Raises:
+            ValueError: Unknown job name
+            SyncJobBusyError: Another process is running the job
+        """
+        task, coalesced = self.submit(name, triggered_by, sync_type, **options)
+        # Shield so a caller disconnecting does not cancel a run others may share
+        run = await asyncio.shield(task)
+        return {**run, 'coalesced': coalesced}
+
+    def status(self) -> List[Dict]:
+        return [
+            {
+                'job': name,
+                'running': name in self._running,
+                'interval_hours': job.interval_hours,
+                'coalesced_triggers': self._coalesced.get(name, 0) if name in self._running else 0,
+                'last_run': self._last_run.get(name)
+            }
+            for name, job in self._jobs.items()
+        ]
+
+    # Interval schedule
+
+    async def _run_due_jobs(self):
+        for name, job in self._jobs.items():
+            if job.interval_hours <= 0 or name in self._running:
+                continue
+
+            if await asyncio.to_thread(self._started_within, name, job.interval_hours):
+                continue
+
+            self.submit(name, triggered_by='scheduler', sync_type='scheduled')
+
+    async def run_forever(self):
+        logger.info(f"Sync scheduler started (jobs: {', '.join(self._jobs)})")
+        while True:
+            try:
+                await self._run_due_jobs()
+            except Exception as e:
+                logger.error(f"Sync scheduler tick failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self):
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self.run_forever())
+
+    def stop(self):
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            self._loop_task = None
+
+
+def register_default_jobs(scheduler: SyncScheduler, graphql_service, media_service, s3_service):
+    """Register the GraphQL, media count, authority and S3 syncs"""
+    from app.core.config import settings
+    from app.services import database_authorities_sync
+
+    async def run_graphql(triggered_by: str, sync_type: str, sync_config: Dict[str, Any], **options):
+        return await graphql_service.pull_sync_from_ddr(
+            dry_run=False, sync_type=sync_type, triggered_by=triggered_by, sync_config=sync_config
+        )
+
+    async def run_media_counts(triggered_by: str, **options):
+        return await asyncio.to_thread(media_service.sync_all_pid_media_counts)
+
+    async def run_authorities(triggered_by: str, incremental: bool = True, **options):
+        return {
+            'records_synced': await asyncio.to_thread(
+                database_authorities_sync.sync_all_authorities, incremental=incremental
+            )
+        }
+
+    async def run_s3(
+        triggered_by: str,
+        sync_type: str,
+        sync_config: Dict[str, Any],
+        job_id: Optional[str] = None,
+        max_docs: Optional[int] = None,
+        on_job: Optional[Callable[[str], None]] = None
+    ):
+        # A new job unless an existing one is being resumed; on_job hears the id once the lock is held
+        if job_id is None:
+            job_id = await asyncio.to_thread(
+                s3_service.start_sync_job,
+                max_docs=max_docs,
+                triggered_by=triggered_by,
+                sync_type=sync_type,
+                sync_config=sync_config
+            )
+        if on_job is not None:
+            on_job(job_id)
+        return await s3_service.run_sync_job(job_id)
+
+    scheduler.register(SyncJob(
+        name='graphql',
+        run=run_graphql,
+        counts=lambda r: {
+            'records_fetched': r['total_items'],
+            'records_new': r['new'],
+            'records_updated': r['updated'],
+            'records_skipped': r['unchanged'],
+            'records_failed': r['errors']
+        },
+        sync_source=graphql_service.SYNC_SOURCE,
+        log_id=lambda r: r['sync_id'],
+        interval_hours=settings.SYNC_GRAPHQL_INTERVAL_HOURS
+    ))
+    scheduler.register(SyncJob(
+        name='media_counts',
+        run=run_media_counts,
+        counts=lambda r: {
+            'records_fetched': r['pids_processed'] + r['errors'],
+            'records_updated': r['pids_processed'],
+            'records_failed': r['errors']
+        },
+        sync_source='ddr_media_counts',
+        interval_hours=settings.SYNC_MEDIA_COUNTS_INTERVAL_HOURS
+    ))
+    scheduler.register(SyncJob(
+        name='authorities',
+        run=run_authorities,
+        counts=lambda r: {'records_updated': r['records_synced']},
+        sync_source='ddr_authorities',
+        interval_hours=settings.SYNC_AUTHORITIES_INTERVAL_HOURS
+    ))
+    scheduler.register(SyncJob(
+        name='s3',
+        run=run_s3,
+        counts=lambda r: {
+            'records_fetched': r['total'] or 0,
+            'records_new': r['completed'],
+            'records_failed': r['failed']
+        },
+        sync_source=s3_service.SYNC_SOURCE,
+        log_id=lambda r: r['job_id'],
+        interval_hours=settings.SYNC_S3_INTERVAL_HOURS
+    ))
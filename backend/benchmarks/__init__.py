@@ -0,0 +1 @@
+"""Local DDR stand-in, sync throughput and Granite decoding benchmarks"""
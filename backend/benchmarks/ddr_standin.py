@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Local DDR Archive GraphQL stand-in
+
+Serves synthetic records_v1, record_v1, authority and database-authority
+payloads shaped like the real DDR API, with configurable volume, latency
+and error rate, so sync code can be load-tested without touching DDR.
+
+Only the query shapes this codebase sends are recognised (paginated and
+unpaginated records_v1, single and aliased record_v1 / authority lookups,
+authorities, and the AUTHORITY_DEFINITIONS vocabularies); it is not a
+general GraphQL server. All payloads are deterministic for a given seed.
+
+Usage (from backend/):
+    python -m benchmarks.ddr_standin --records 5000 --latency-ms 40 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+RECORD_PID_BASE = 100000000000
+MEDIA_PID_BASE = 500000000000
+
+_ALIASED_RE = re.compile(r'(\w+)\s*:\s*(record_v1|authority)\s*\(\s*(?:id|pid)\s*:\s*\$(\w+)\s*\)')
+_SINGLE_RE = re.compile(r'\b(record_v1|authority)\s*\(\s*(?:id|pid)\s*:\s*\$(\w+)\s*\)')
+_TOP_FIELD_RE = re.compile(r'^[^{]*\{\s*(\w+)\s*(?:\([^)]*\))?\s*\{([^{}]*)\}', re.S)
+
+
+@dataclass
+class StandinConfig:
+    """Volume, latency and failure knobs for the stand-in"""
+    records: int = 2000  # records_v1 size
+    media_per_record: int = 2  # attached media items per record
+    authority_rows: int = 50  # rows per database-authority type
+    latency_ms: float = 25.0  # mean added latency per request
+    jitter_ms: float = 10.0  # +/- uniform jitter on the latency
+    error_rate: float = 0.0  # fraction of requests answered with HTTP 503
+    not_found_rate: float = 0.05  # fraction of PIDs with no record/authority
+    seed: int = 1965
+
+
+def _rng(*parts) -> random.Random:
+    digest = hashlib.sha256(':'.join(str(p) for p in parts).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], 'big'))
+
+
+def _asset(pid: str, index: int, role: str, rng: random.Random) -> Dict:
+    extension = 'pdf' if role == 'pdf_master' else 'tif'
+    filename = f"{pid}_{index}_{role}.{extension}"
+    return {
+        'role': role,
+        'filename': filename,
+        'url': f"https://standin.local/ddr-archive/{pid}/{filename}",
+        'label': role.replace('_', ' '),
+        'use_for_ml': rng.random() < 0.8,
+        'ml_pages': '1-5' if rng.random() < 0.5 else '',
+        'ml_annotation': 'synthetic',
+        'mime': 'application/pdf' if extension == 'pdf' else 'image/tiff',
+    }
+
+
+class SyntheticArchive:
+    """Deterministic synthetic DDR records and authorities"""
+
+    def __init__(self, config: StandinConfig):
+        self.config = config
+
+    def is_missing(self, pid: str) -> bool:
+        return _rng(self.config.seed, 'missing', pid).random() < self.config.not_found_rate
+
+    def media_item(self, media_pid: str, title: str) -> Dict:
+        rng = _rng(self.config.seed, 'media', media_pid)
+        role = rng.choice(('pdf_master', 'pdf_master', 'tiff_master', 'jpg_only'))
+        assets = [] if role == 'jpg_only' else [_asset(media_pid, 0, role, rng)]
+        return {
+            'id': media_pid[-6:],
+            'pid': media_pid,
+            'title': f"{title} / media {media_pid[-3:]}",
+            'used_for_ml': rng.random() < 0.85,
+            'ml_annotation': 'synthetic',
+            'digital_assets': assets,
+            'pdf_files': [
+                {'role': a['role'], 'filename': a['filename'], 'url': a['url']}
+                for a in assets if a['role'] == 'pdf_master'
+            ],
+            'jpg_derivatives': [
+                {'role': rng.choice(('master', 'jpg_thumb')), 'filename': f"{media_pid}.jpg"}
+            ],
+        }
+
+    def record(self, index: int) -> Dict:
+        pid = str(RECORD_PID_BASE + index)
+        year = 1965 + index % 21
+        title = f"Synthetic design research record {index} | {year}"
+        media = [
+            self.media_item(str(MEDIA_PID_BASE + index * self.config.media_per_record + m), title)
+            for m in range(self.config.media_per_record)
+        ]
+        return {
+            'id': str(index),
+            'pid': pid,
+            'title': title,
+            'status': 'published',
+            'project_start_date': f"{year}-01-01",
+            'attached_media': media,
+        }
+
+    def record_by_pid(self, pid: str) -> Optional[Dict]:
+        if self.is_missing(pid):
+            return None
+        if pid.isdigit() and RECORD_PID_BASE <= int(pid) < RECORD_PID_BASE + self.config.records:
+            return self.record(int(pid) - RECORD_PID_BASE)
+        # Media PIDs (and anything else) resolve to a one-item record
+        return {'id': pid[-6:], 'pid': pid, 'title': f"Record {pid}", 'attached_media': [self.media_item(pid, f"Record {pid}")]}
+
+    def records_page(self, limit: Optional[int], offset: int) -> List[Dict]:
+        end = self.config.records if limit is None else min(self.config.records, offset + limit)
+        return [self.record(i) for i in range(offset, end)]
+
+    def authority(self, pid: str) -> Optional[Dict]:
+        if self.is_missing(pid):
+            return None
+        return {
+            'pid': pid,
+            'id': pid[-6:],
+            'title': f"Authority {pid}",
+            'description': 'Synthetic authority',
+            'caption': None,
+            'creator': 'Stand-in',
+            'date': '1970',
+            'subject': 'design research',
+            'type': 'record',
+            'format': 'application/pdf',
+            'language': 'en',
+            'coverage': None,
+            'rights': 'CC-BY',
+            'digitalAssets': [],
+        }
+
+    def vocabulary(self, authority_type: str, fields: List[str]) -> List[Dict]:
+        rows = []
+        for i in range(self.config.authority_rows):
+            row = {}
+            for field in fields:
+                if field in ('id', 'year'):
+                    row[field] = i + 1 if field == 'id' else 1965 + i % 21
+                elif field == 'is_primary':
+                    row[field] = i % 2 == 0
+                else:
+                    row[field] = f"{authority_type}:{field}:{i}"
+            rows.append(row)
+        return rows
+
+
+def resolve_query(archive: SyntheticArchive, query: str, variables: Dict) -> Dict:
+    """Answer the query shapes used by this codebase"""
+    aliased = _ALIASED_RE.findall(query)
+    if aliased:
+        data = {}
+        for alias, field, variable in aliased:
+            pid = str(variables.get(variable, ''))
+            data[alias] = archive.record_by_pid(pid) if field == 'record_v1' else archive.authority(pid)
+        return data
+
+    if 'records_v1' in query:
+        limit = variables.get('limit')
+        return {'records_v1': archive.records_page(limit, int(variables.get('offset') or 0))}
+
+    single = _SINGLE_RE.search(query)
+    if single:
+        field, variable = single.groups()
+        pid = str(variables.get(variable, ''))
+        return {field: archive.record_by_pid(pid) if field == 'record_v1' else archive.authority(pid)}
+
+    if re.search(r'\bauthorities\s*\(', query):
+        limit = int(variables.get('limit') or archive.config.records)
+        return {'authorities': [{'pid': str(RECORD_PID_BASE + i)} for i in range(min(limit, archive.config.records))]}
+
+    top = _TOP_FIELD_RE.search(query)
+    if top:
+        authority_type, selection = top.groups()
+        return {authority_type: archive.vocabulary(authority_type, selection.split())}
+
+    return {}
+
+
+def create_app(config: StandinConfig) -> FastAPI:
+    """Build the stand-in ASGI app"""
+    app = FastAPI(title="DDR GraphQL stand-in")
+    archive = SyntheticArchive(config)
+    failures = random.Random(config.seed)
+    app.state.requests = 0
+
+    @app.post("/graphql")
+    async def graphql(request: Request):
+        app.state.requests += 1
+        body = await request.json()
+
+        delay_ms = config.latency_ms + failures.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+        if failures.random() < config.error_rate:
+            return Response(status_code=503, headers={'Retry-After': '0'})
+
+        data = resolve_query(archive, body.get('query', ''), body.get('variables') or {})
+        return JSONResponse({'data': data})
+
+    return app
+
+
+def add_standin_arguments(parser: argparse.ArgumentParser):
+    defaults = StandinConfig()
+    parser.add_argument('--records', type=int, default=defaults.records)
+    parser.add_argument('--media-per-record', type=int, default=defaults.media_per_record)
+    parser.add_argument('--authority-rows', type=int, default=defaults.authority_rows)
+    parser.add_argument('--latency-ms', type=float, default=defaults.latency_ms)
+    parser.add_argument('--jitter-ms', type=float, default=defaults.jitter_ms)
+    parser.add_argument('--error-rate', type=float, default=defaults.error_rate)
+    parser.add_argument('--not-found-rate', type=float, default=defaults.not_found_rate)
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+
+
+def config_from_args(args: argparse.Namespace) -> StandinConfig:
+    return StandinConfig(
+        records=args.records,
+        media_per_record=args.media_per_record,
+        authority_rows=args.authority_rows,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        not_found_rate=args.not_found_rate,
+        seed=args.seed,
+    )
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local DDR GraphQL stand-in")
+    add_standin_arguments(parser)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"DDR stand-in on http://{args.host}:{args.port}/graphql")
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Speculative decoding benchmark for Granite on the local machine
+
+Loads the target model and the draft model once (GRANITE_MODEL_PATH and
+--draft-model / GRANITE_DRAFT_MODEL, quantized as GRANITE_QUANTIZATION says),
+then generates the same analysis prompts with plain decoding and with
+assisted generation, alternating per prompt so both modes see the same
+thermal and cache conditions. Reports tokens/s for each mode, the speedup,
+draft acceptance rate and tokens per target forward pass.
+
+With --temperature 0 (the default) assisted output must equal plain output
+token for token; any mismatch is reported and fails the run.
+
+Usage (from backend/):
+    GRANITE_MODEL_PATH=ibm-granite/granite-3.1-8b-instruct \\
+        python -m benchmarks.speculative_benchmark --draft-model ibm-granite/granite-3.1-1b-a400m-instruct
+    python -m benchmarks.speculative_benchmark --prompts 8 --max-tokens 128 --json-out spec.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+QUERIES = [
+    "How did the notion of the designer's rationality change between 1965 and 1985?",
+    "What role did systematic design methods play in early design research?",
+    "How were user participation and participatory design framed in the 1970s?",
+    "Which critiques of first-generation design methods appear in the sources?",
+    "How did the vocabulary used for design problems shift over the period?",
+    "What epistemological assumptions underpin the pattern language approach?",
+    "How did cybernetics influence theories of the design process?",
+    "In what ways did wicked problems change how design research framed its subject?",
+]
+
+CONTEXT = [
+    {
+        "id": 1,
+        "text": "Design methods in the 1960s focused on systematic approaches to problem-solving, emphasizing rationality and scientific rigor.",
+        "citation": "Jones, J.C. (1970). Design Methods. John Wiley & Sons, p. 47."
+    },
+    {
+        "id": 2,
+        "text": "By the mid-1970s, there was a shift towards participatory design and user-centered approaches, challenging earlier technocratic assumptions.",
+        "citation": "Alexander, C. (1977). A Pattern Language. Oxford University Press, p. 203."
+    }
+]
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    tokens = sum(r['new_tokens'] for r in runs)
+    seconds = sum(r['seconds'] for r in runs)
+    return {
+        'requests': len(runs),
+        'new_tokens': tokens,
+        'seconds': round(seconds, 2),
+        'tokens_per_second': round(tokens / seconds, 2) if seconds else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plain vs speculative Granite decoding benchmark")
+    parser.add_argument('--draft-model', default=os.getenv('GRANITE_DRAFT_MODEL', ''), help="Draft model id or path")
+    parser.add_argument('--draft-tokens', type=int, help="Tokens the draft proposes per round (GRANITE_DRAFT_TOKENS)")
+    parser.add_argument('--prompts', type=int, default=len(QUERIES), help="Number of prompts to run per mode")
+    parser.add_argument('--max-tokens', type=int, default=128, help="max_new_tokens per prompt")
+    parser.add_argument('--temperature', type=float, default=0.0, help="0 = greedy (outputs must match)")
+    parser.add_argument('--seed', type=int, default=1234, help="Sampling seed when temperature > 0")
+    parser.add_argument('--warmup', type=int, default=1, help="Untimed generations per mode first")
+    parser.add_argument('--json-out', help="Write results as JSON")
+    args = parser.parse_args()
+
+    if not args.draft_model:
+        parser.error("Set --draft-model or GRANITE_DRAFT_MODEL")
+
+    # Read by GraniteService at construction
+    os.environ['GRANITE_DRAFT_MODEL'] = args.draft_model
+    if args.draft_tokens:
+        os.environ['GRANITE_DRAFT_TOKENS'] = str(args.draft_tokens)
+
+    import torch
+    from app.services.granite_service import GraniteService
+    from app.services.granite_speculative import SpeculativeMetrics
+
+    service = GraniteService()
+    if not service.load_model():
+        sys.exit(f"Loading failed: {service.load_error}")
+    if service.draft_model is None:
+        sys.exit(f"Draft model {args.draft_model} did not load; see log")
+
+    queries = [QUERIES[i % len(QUERIES)] for i in range(args.prompts)]
+    max_new_tokens = args.max_tokens
+
+    def generate(query: str, assisted: bool) -> Dict:
+        service.set_speculative(assisted)
+        packed = service._pack_context(query, CONTEXT, max_new_tokens)
+        prompt = service._build_prompt(query, packed.chunks)
+        options = {'seed': args.seed} if args.temperature > 0 else {}
+        started = time.perf_counter()
+        result = service._generate_batch([prompt], max_new_tokens, args.temperature, **options)[0]
+        return {**result, 'seconds': time.perf_counter() - started}
+
+    for _ in range(args.warmup):
+        generate(queries[0], False)
+        generate(queries[0], True)
+    service.speculative_metrics = SpeculativeMetrics()
+
+    plain_runs, assisted_runs, mismatches = [], [], []
+    for i, query in enumerate(queries):
+        # Alternate which mode goes first so neither always runs on a warmer cache
+        order = (False, True) if i % 2 == 0 else (True, False)
+        outputs = {}
+        for assisted in order:
+            result = generate(query, assisted)
+            outputs[assisted] = result
+            (assisted_runs if assisted else plain_runs).append({
+                'query': query,
+                'new_tokens': result['new_tokens'],
+                'seconds': result['seconds'],
+                'speculative': result.get('speculative')
+            })
+
+        if args.temperature == 0 and outputs[True]['text'] != outputs[False]['text']:
+            mismatches.append(query)
+        print(
+            f"[{i + 1}/{len(queries)}] plain {outputs[False]['new_tokens']} tok, "
+            f"assisted {outputs[True]['new_tokens']} tok, "
+            f"acceptance {outputs[True]['speculative']['acceptance_rate']}"
+        )
+
+    plain = summarize(plain_runs)
+    assisted = summarize(assisted_runs)
+    totals = service.speculative_metrics.stats(args.draft_model, True)
+    report = {
+        'machine': {
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'torch_threads': torch.get_num_threads()
+        },
+        'target_model': service.model_name,
+        'draft_model': args.draft_model,
+        'quantized': service.quantized,
+        'max_new_tokens': max_new_tokens,
+        'temperature': args.temperature,
+        'plain': plain,
+        'assisted': assisted,
+        'speedup': round(assisted['tokens_per_second'] / plain['tokens_per_second'], 2) if plain['tokens_per_second'] else None,
+        'acceptance_rate': totals['acceptance_rate'],
+        'tokens_per_target_pass': totals['tokens_per_target_pass'],
+        'greedy_mismatches': mismatches
+    }
+
+    print(f"\n{'mode':<10}{'requests':>10}{'tokens':>9}{'seconds':>10}{'tok/s':>9}")
+    for name in ('plain', 'assisted'):
+        r = report[name]
+        print(f"{name:<10}{r['requests']:>10}{r['new_tokens']:>9}{r['seconds']:>10.2f}{r['tokens_per_second']:>9.2f}")
+    print(
+        f"\nspeedup {report['speedup']}x, acceptance {report['acceptance_rate']}, "
+        f"{report['tokens_per_target_pass']} tokens per target pass"
+    )
+
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump({'args': vars(args), **report}, f, indent=2)
+        print(f"\nWrote {args.json_out}")
+
+    if mismatches:
+        print(f"\nGreedy output differed for {len(mismatches)} prompt(s):")
+        for query in mismatches:
+            print(f"  {query}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
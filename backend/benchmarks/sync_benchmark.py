@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Sync throughput benchmark against the local DDR stand-in
+
+Starts the DDR GraphQL stand-in in-process (or uses --endpoint), points the
+shared DDR client at it and drives the real sync paths against the Postgres
+configured in the environment:
+
+    graphql       GraphQLSyncService.pull_sync_from_ddr
+    media_counts  PIDMediaCountService.sync_all_pid_media_counts
+    authorities   database_authorities_sync.sync_all_authorities
+
+For each phase it reports records/s, p95 DDR request latency and DB round
+trips (statements sent by any cursor on the app engine, including COPY and
+execute_values pages). Run it against a scratch database with migrations
+applied - it writes documents and authorities.
+
+Usage (from backend/):
+    POSTGRES_DB=epistemic_drift_bench python -m benchmarks.sync_benchmark --records 5000
+    python -m benchmarks.sync_benchmark --json-out bench.json --baseline last.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.ddr_standin import add_standin_arguments, config_from_args, create_app
+
+PHASES = ('graphql', 'media_counts', 'authorities')
+
+
+class RoundTripCounter:
+    """Counts statements sent to Postgres by cursors on the app engine"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self, n: int = 1):
+        with self._lock:
+            self.count += n
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+
+
+def install_round_trip_counter(engine) -> RoundTripCounter:
+    """Give every new pooled psycopg2 connection a counting cursor factory"""
+    import psycopg2.extensions
+    from sqlalchemy import event
+
+    counter = RoundTripCounter()
+
+    class CountingCursor(psycopg2.extensions.cursor):
+        def execute(self, query, vars=None):
+            counter.add()
+            return super().execute(query, vars)
+
+        def executemany(self, query, vars_list):
+            vars_list = list(vars_list)
+            counter.add(len(vars_list))
+            return super().executemany(query, vars_list)
+
+        def copy_expert(self, sql, file, size=8192):
+            counter.add()
+            return super().copy_expert(sql, file, size)
+
+    @event.listens_for(engine, 'connect')
+    def use_counting_cursor(dbapi_connection, connection_record):
+        dbapi_connection.cursor_factory = CountingCursor
+
+    # Connections opened before the listener keep the default cursor
+    engine.dispose()
+    return counter
+
+
+def start_standin(args) -> str:
+    """Run the stand-in on a background uvicorn server and return its endpoint"""
+    import uvicorn
+
+    config = uvicorn.Config(
+        create_app(config_from_args(args)),
+        host='127.0.0.1',
+        port=args.port,
+        log_level='warning'
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, name='ddr-standin', daemon=True).start()
+
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("DDR stand-in did not start")
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{args.port}/graphql"
+
+
+def run_phase(
+    name: str,
+    run: Callable[[], int],
+    counter: RoundTripCounter,
+    ddr_clients: List
+) -> Dict:
+    """Time one sync phase; run() returns the number of records it processed"""
+    counter.reset()
+    for client in ddr_clients:
+        client.metrics.reset()
+
+    started = time.perf_counter()
+    records = run()
+    elapsed = time.perf_counter() - started
+
+    queries = {}
+    for client in ddr_clients:
+        queries.update(client.metrics.snapshot())
+    requests = sum(q['count'] for q in queries.values())
+
+    return {
+        'phase': name,
+        'records': records,
+        'seconds': round(elapsed, 3),
+        'records_per_second': round(records / elapsed, 1) if elapsed else 0.0,
+        'ddr_requests': requests,
+        'ddr_errors': sum(q['errors'] for q in queries.values()),
+        'ddr_p95_ms': max((q['p95_ms'] for q in queries.values()), default=0.0),
+        'db_round_trips': counter.count,
+        'queries': queries
+    }
+
+
+def print_report(results: List[Dict]):
+    header = f"{'phase':<14}{'records':>9}{'seconds':>10}{'rec/s':>10}{'DDR req':>9}{'DDR err':>9}{'p95 ms':>9}{'DB trips':>10}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(
+            f"{r['phase']:<14}{r['records']:>9}{r['seconds']:>10.2f}{r['records_per_second']:>10.1f}"
+            f"{r['ddr_requests']:>9}{r['ddr_errors']:>9}{r['ddr_p95_ms']:>9.1f}{r['db_round_trips']:>10}"
+        )
+
+
+def check_regressions(results: List[Dict], baseline_path: str, max_regression: float) -> List[str]:
+    """Compare records/s with a previous --json-out file"""
+    with open(baseline_path) as f:
+        baseline = {r['phase']: r for r in json.load(f)['results']}
+
+    failures = []
+    for r in results:
+        previous = baseline.get(r['phase'])
+        if not previous or not previous['records_per_second']:
+            continue
+        change = r['records_per_second'] / previous['records_per_second'] - 1
+        if change < -max_regression:
+            failures.append(
+                f"{r['phase']}: {r['records_per_second']} rec/s vs baseline "
+                f"{previous['records_per_second']} ({change:+.0%})"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync throughput benchmark against a local DDR stand-in")
+    add_standin_arguments(parser)
+    parser.add_argument('--port', type=int, default=8765, help="Port for the in-process stand-in")
+    parser.add_argument('--endpoint', help="Use an already running stand-in instead of starting one")
+    parser.add_argument('--phases', default=','.join(PHASES), help="Comma-separated subset of: " + ', '.join(PHASES))
+    parser.add_argument('--json-out', help="Write results as JSON")
+    parser.add_argument('--baseline', help="Previous --json-out file to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.2, help="Allowed records/s drop vs baseline")
+    args = parser.parse_args()
+
+    phases = [p.strip() for p in args.phases.split(',') if p.strip()]
+    unknown = set(phases) - set(PHASES)
+    if unknown:
+        parser.error(f"Unknown phases: {', '.join(sorted(unknown))}")
+
+    endpoint = args.endpoint or start_standin(args)
+
+    # Settings are read at import time, so point them at the stand-in first
+    os.environ['DDR_GRAPHQL_ENDPOINT'] = endpoint
+
+    from app.core.database import LocalSessionLocal, local_engine
+    from app.services import database_authorities_sync
+    from app.services.ddr_client import get_async_ddr_client, get_ddr_client
+    from app.services.graphql_sync import GraphQLSyncService
+    from app.services.pid_media_count import PIDMediaCountService
+    from sqlalchemy import text
+
+    counter = install_round_trip_counter(local_engine)
+    ddr_clients = [get_ddr_client(), get_async_ddr_client()]
+
+    def graphql_phase() -> int:
+        async def run():
+            try:
+                return await GraphQLSyncService().pull_sync_from_ddr()
+            finally:
+                await get_async_ddr_client().aclose()
+
+        return asyncio.run(run())['total_items']
+
+    def media_counts_phase() -> int:
+        stats = PIDMediaCountService().sync_all_pid_media_counts()
+        return stats['pids_processed'] + stats['errors']
+
+    def authorities_phase() -> int:
+        # Force a full write so repeated runs measure the upsert, not the hash skip
+        db = LocalSessionLocal()
+        try:
+            db.execute(text("DELETE FROM database_authority_sync_state"))
+            db.commit()
+        finally:
+            db.close()
+        database_authorities_sync.sync_all_authorities()
+        return args.authority_rows * len(database_authorities_sync.AUTHORITY_DEFINITIONS)
+
+    runners: Dict[str, Callable[[], int]] = {
+        'graphql': graphql_phase,
+        'media_counts': media_counts_phase,
+        'authorities': authorities_phase,
+    }
+
+    results = [run_phase(name, runners[name], counter, ddr_clients) for name in phases]
+    print_report(results)
+
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump({'endpoint': endpoint, 'args': vars(args), 'results': results}, f, indent=2)
+        print(f"\nWrote {args.json_out}")
+
+    if args.baseline:
+        failures = check_regressions(results, args.baseline, args.max_regression)
+        if failures:
+            print("\nThroughput regressions:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print(f"\nNo phase regressed more than {args.max_regression:.0%} vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
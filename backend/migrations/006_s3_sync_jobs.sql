@@ -0,0 +1,20 @@
+-- Migration 006: Resumable S3 sync jobs
+-- S3 syncs run as background jobs tracked in sync_log. Per-object progress is
+-- checkpointed in sync_log.sync_checkpoint so an interrupted job can resume:
+--   {"total": 120, "completed_keys": [...], "failed_keys": [...], "current_key": "..."}
+
+-- Register S3 Spaces as a sync source so complete_sync() tracks its health
+INSERT INTO sync_metadata (
+    source_system,
+    sync_frequency_hours,
+    health_status
+) VALUES (
+    's3_spaces',
+    24,
+    'healthy'
+) ON CONFLICT (source_system) DO NOTHING;
+
+-- Fast lookup of unfinished jobs per source (resume on startup, progress polling)
+CREATE INDEX IF NOT EXISTS idx_sync_log_source_status ON sync_log(sync_source, status);
+
+COMMENT ON COLUMN sync_log.sync_checkpoint IS 'Resume point: completed/failed object keys for checkpointed jobs';
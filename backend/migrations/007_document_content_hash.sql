@@ -0,0 +1,28 @@
+-- Migration 007: Content hashes for incremental GraphQL sync
+-- Each document stores a SHA-256 of its GraphQL-derived fields (authority_id,
+-- authority_data, title, filename, file_type, s3_key).
+-- Incremental syncs compare hashes in bulk and rewrite only changed rows;
+-- new/updated/unchanged counts land in sync_log (unchanged = records_skipped).
+
+ALTER TABLE documents
+ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+
+CREATE INDEX IF NOT EXISTS idx_documents_pid_content_hash ON documents(pid, content_hash);
+
+-- Backfill from the stored values so the first incremental sync only rewrites
+-- rows that really differ. Must match graphql_sync.compute_content_hash().
+UPDATE documents
+SET content_hash = encode(sha256(convert_to(jsonb_build_object(
+        'authority_id', authority_id::text,
+        'authority_data', authority_data,
+        'title', title::text,
+        'filename', filename::text,
+        'file_type', file_type::text,
+        's3_key', s3_key::text
+    )::text, 'UTF8')), 'hex')
+WHERE content_hash IS NULL;
+
+-- GraphQL syncs are tracked under the same source as sync_metadata
+UPDATE sync_log SET sync_source = 'ddr_graphql' WHERE sync_source = 'graphql_ddr_archive';
+
+COMMENT ON COLUMN documents.content_hash IS 'SHA-256 of GraphQL-derived fields; rows are rewritten only when it changes';
@@ -0,0 +1,12 @@
+-- Migration 008: Payload hashes for database authorities sync
+-- database_authorities_sync hashes each authority type's GraphQL payload and
+-- skips the upsert entirely when the hash matches the last successful sync.
+
+CREATE TABLE IF NOT EXISTS database_authority_sync_state (
+    authority_type VARCHAR(50) PRIMARY KEY,   -- e.g., 'ref_epistemic_stance'
+    payload_hash VARCHAR(64) NOT NULL,        -- SHA-256 of the canonical JSON payload
+    record_count INTEGER NOT NULL DEFAULT 0,
+    synced_at TIMESTAMP DEFAULT NOW()
+);
+
+COMMENT ON TABLE database_authority_sync_state IS 'Last synced payload hash per authority type; unchanged types are not rewritten';
@@ -0,0 +1,34 @@
+-- Migration 009: Sync scheduler runs
+-- The in-process sync scheduler records one sync_log row per job run with
+-- sync_source = 'sync_scheduler' and the job, timings and coalesced trigger
+-- count in config:
+--   {"job": "media_counts", "lock_wait_ms": 3.1, "duration_ms": 81234.5, "coalesced_triggers": 2}
+-- Overlap is prevented with pg_try_advisory_lock(hashtext('sync_scheduler'), hashtext(<job>)).
+
+-- Last run / running run per job (interval schedule, 409 responses)
+CREATE INDEX IF NOT EXISTS idx_sync_log_scheduler_job
+    ON sync_log ((config->>'job'), sync_started_at DESC)
+    WHERE sync_source = 'sync_scheduler';
+
+-- Per-run timings for dashboards and regression checks
+CREATE OR REPLACE VIEW sync_job_runs AS
+SELECT
+    sl.sync_id,
+    sl.config->>'job' AS job,
+    sl.sync_type,
+    sl.triggered_by,
+    sl.status,
+    sl.sync_started_at,
+    sl.sync_completed_at,
+    (sl.config->>'lock_wait_ms')::NUMERIC AS lock_wait_ms,
+    (sl.config->>'duration_ms')::NUMERIC AS duration_ms,
+    COALESCE((sl.config->>'coalesced_triggers')::INTEGER, 0) AS coalesced_triggers,
+    sl.records_fetched,
+    sl.records_new,
+    sl.records_updated,
+    sl.records_failed
+FROM sync_log sl
+WHERE sl.sync_source = 'sync_scheduler'
+ORDER BY sl.sync_started_at DESC;
+
+COMMENT ON VIEW sync_job_runs IS 'Sync scheduler job runs with lock wait, duration and coalesced triggers';
@@ -0,0 +1,20 @@
+-- Migration 010: Granite response cache
+-- Deterministic Granite analyses (temperature 0 or an explicit seed) are cached
+-- by a SHA-256 key over model, normalized query, ordered context chunks (id +
+-- text hash), max_tokens, temperature and seed. The least recently used entries
+-- beyond GRANITE_RESPONSE_CACHE_MAX_ENTRIES are evicted on insert.
+
+CREATE TABLE IF NOT EXISTS granite_response_cache (
+    cache_key VARCHAR(64) PRIMARY KEY,
+    model_name VARCHAR(255) NOT NULL,
+    response JSONB NOT NULL,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT NOW(),
+    last_hit_at TIMESTAMP DEFAULT NOW()
+);
+
+-- LRU eviction order
+CREATE INDEX IF NOT EXISTS idx_granite_response_cache_last_hit ON granite_response_cache(last_hit_at DESC);
+
+COMMENT ON TABLE granite_response_cache IS 'Exact-match cache of deterministic Granite analysis results';
@@ -0,0 +1,16 @@
+-- Migration 011: Semantic cache over inference_logs
+-- Generated analyses are logged with their query embedding and a hash of the
+-- context chunks they were given. A new query reuses the closest logged answer
+-- from the same model and source set when cosine similarity passes
+-- GRANITE_SEMANTIC_CACHE_THRESHOLD.
+
+ALTER TABLE inference_logs
+ADD COLUMN IF NOT EXISTS source_set_hash VARCHAR(64);
+
+-- Candidate lookup: model + source set, newest first. The filtered set is small,
+-- so distances are computed exactly rather than through an ANN index.
+CREATE INDEX IF NOT EXISTS idx_inference_logs_semantic_cache
+ON inference_logs(model_version, source_set_hash, created_at DESC)
+WHERE query_embedding IS NOT NULL;
+
+COMMENT ON COLUMN inference_logs.source_set_hash IS 'SHA-256 of the context chunk ids and texts the prediction was generated from';
@@ -0,0 +1,36 @@
+-- Migration 012: Per-object progress for S3 sync jobs
+-- Finished objects are recorded one row each instead of being appended to a
+-- key list in sync_log.sync_checkpoint, which was rewritten in full after every
+-- object (quadratic over a bucket). sync_checkpoint keeps only small counters:
+--   {"total": 120, "completed": 80, "failed": 2, "current_key": "..."}
+
+CREATE TABLE IF NOT EXISTS s3_sync_job_objects (
+    sync_id VARCHAR(255) NOT NULL REFERENCES sync_log(sync_id) ON DELETE CASCADE,
+    s3_key TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL CHECK (status IN ('completed', 'failed')),
+    finished_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (sync_id, s3_key)
+);
+
+-- Carry over key lists from checkpoints written before this migration
+INSERT INTO s3_sync_job_objects (sync_id, s3_key, status)
+SELECT sync_id, jsonb_array_elements_text(sync_checkpoint->'completed_keys'), 'completed'
+FROM sync_log
+WHERE sync_source = 's3_spaces' AND jsonb_typeof(sync_checkpoint->'completed_keys') = 'array'
+ON CONFLICT (sync_id, s3_key) DO NOTHING;
+
+INSERT INTO s3_sync_job_objects (sync_id, s3_key, status)
+SELECT sync_id, jsonb_array_elements_text(sync_checkpoint->'failed_keys'), 'failed'
+FROM sync_log
+WHERE sync_source = 's3_spaces' AND jsonb_typeof(sync_checkpoint->'failed_keys') = 'array'
+ON CONFLICT (sync_id, s3_key) DO NOTHING;
+
+UPDATE sync_log
+SET sync_checkpoint = (sync_checkpoint - 'completed_keys' - 'failed_keys') || jsonb_build_object(
+    'completed', jsonb_array_length(COALESCE(sync_checkpoint->'completed_keys', '[]'::jsonb)),
+    'failed', jsonb_array_length(COALESCE(sync_checkpoint->'failed_keys', '[]'::jsonb))
+)
+WHERE sync_source = 's3_spaces' AND sync_checkpoint ? 'completed_keys';
+
+COMMENT ON TABLE s3_sync_job_objects IS 'Objects an S3 sync job has finished; completed ones are skipped on resume';
+COMMENT ON COLUMN sync_log.sync_checkpoint IS 'Resume point: counters and current object for checkpointed jobs';
@@ -0,0 +1,42 @@
+-- Migration 013: One sync_log row per scheduled sync run
+-- Scheduler runs were logged as a second sync_log row (sync_source
+-- 'sync_scheduler') next to the row the GraphQL and S3 services write, and
+-- complete_sync() found no sync_metadata for that source. Each run now has a
+-- single row under its own source carrying the job config:
+--   graphql -> ddr_graphql, s3 -> s3_spaces (written by the services)
+--   media_counts -> ddr_media_counts, authorities -> ddr_authorities (written by the scheduler)
+
+-- Register the sources the scheduler logs so complete_sync() tracks their health
+INSERT INTO sync_metadata (
+    source_system,
+    sync_frequency_hours,
+    health_status
+) VALUES
+    ('ddr_media_counts', 24, 'healthy'),
+    ('ddr_authorities', 24, 'healthy')
+ON CONFLICT (source_system) DO NOTHING;
+
+-- Jobs are identified by config->>'job' whatever the row's source
+DROP INDEX IF EXISTS idx_sync_log_scheduler_job;
+CREATE INDEX IF NOT EXISTS idx_sync_log_job
+    ON sync_log ((config->>'job'), sync_started_at DESC);
+
+CREATE OR REPLACE VIEW sync_job_runs AS
+SELECT
+    sl.sync_id,
+    sl.config->>'job' AS job,
+    sl.sync_type,
+    sl.triggered_by,
+    sl.status,
+    sl.sync_started_at,
+    sl.sync_completed_at,
+    (sl.config->>'lock_wait_ms')::NUMERIC AS lock_wait_ms,
+    (sl.config->>'duration_ms')::NUMERIC AS duration_ms,
+    COALESCE((sl.config->>'coalesced_triggers')::INTEGER, 0) AS coalesced_triggers,
+    sl.records_fetched,
+    sl.records_new,
+    sl.records_updated,
+    sl.records_failed
+FROM sync_log sl
+WHERE sl.config ? 'job'
+ORDER BY sl.sync_started_at DESC;
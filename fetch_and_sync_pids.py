@@ -2,15 +2,20 @@
 """
 Fetch PIDs from DDR Archive GraphQL and sync to droplet database
 """
-import requests
 import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Shared paginated fetcher lives in the backend package
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+from app.services.ddr_records_fetcher import DDRRecordsFetcher
 
 GRAPHQL_ENDPOINT = "https://api.ddrarchive.org/graphql"
+BATCH_SIZE = 100  # Parent records per INSERT statement
 
-# Query for parent authority records with attached media
-query = """
-{
-  records_v1(status: "published") {
+# Fields requested for each parent authority record (with attached media)
+RECORD_FIELDS = """
     id
     pid
     title
@@ -70,53 +75,44 @@ query = """
         ml_annotation
       }
     }
-  }
-}
 """
 
 def fetch_records():
-    """Fetch parent records from DDR Archive GraphQL"""
+    """
+    Fetch parent records from DDR Archive GraphQL, page by page
+    
+    Pages are fetched concurrently with per-page retry and yielded record by
+    record as they arrive; each record is also appended to
+    /tmp/records_v1_response.jsonl.
+    """
     print("🔍 Fetching records from DDR Archive GraphQL...")
     print(f"📡 Endpoint: {GRAPHQL_ENDPOINT}\n")
     
+    fetcher = DDRRecordsFetcher(RECORD_FIELDS, endpoint=GRAPHQL_ENDPOINT)
+    
     try:
-        response = requests.post(
-            GRAPHQL_ENDPOINT,
-            json={'query': query},
-            headers={'Content-Type': 'application/json'},
-            timeout=30
-        )
-        response.raise_for_status()
-        data = response.json()
-        
-        # Save response
-        with open('/tmp/records_v1_response.json', 'w') as f:
-            json.dump(data, f, indent=2)
-        print(f"💾 Response saved to /tmp/records_v1_response.json\n")
+        with open('/tmp/records_v1_response.jsonl', 'w') as saved:
+            for record in fetcher.iter_records_blocking():
+                saved.write(json.dumps(record) + '\n')
+                yield record
         
-        return data
+        print(f"💾 Response saved to /tmp/records_v1_response.jsonl\n")
         
     except Exception as e:
         print(f"❌ GraphQL request failed: {e}")
-        return None
-
-def analyze_records(data):
-    """Analyze the records and return parent PIDs with metadata"""
-    if not data or 'data' not in data:
-        print("❌ No data in response")
-        if data and 'errors' in data:
-            print(f"GraphQL Errors: {data['errors']}")
-        return []
     
-    records = data['data'].get('records_v1', [])
-    print(f"📊 Total parent records: {len(records)}\n")
-    
-    parent_records = []
+    if fetcher.graphql_errors:
+        print(f"GraphQL Errors: {fetcher.graphql_errors}")
+
+def analyze_records(records):
+    """Analyze records one at a time and yield parent PIDs with metadata"""
+    total = 0
     
     for record in records:
+        total += 1
         pid = record.get('pid')
         title = record.get('title', 'Untitled')
-        attached_media = record.get('attached_media', [])
+        attached_media = record.get('attached_media') or []
         
         # Count PDFs with ML TRUE flag
         pdf_count = 0
@@ -149,39 +145,38 @@ def analyze_records(data):
         print()
         
         if pid:
-            parent_records.append({
+            yield {
                 'pid': pid,
                 'title': title,
                 'pdf_count': pdf_count,
                 'year': record.get('project_start_date', '1970')[:4] if record.get('project_start_date') else '1970'
-            })
+            }
     
-    return parent_records
+    print(f"📊 Total parent records: {total}\n")
 
-def insert_pids_to_droplet(parent_records):
-    """Insert parent PIDs with metadata to droplet database"""
-    print(f"\n📝 Inserting {len(parent_records)} parent PIDs to droplet database...")
+def insert_pids_to_droplet(parent_records, batch_size=BATCH_SIZE):
+    """Insert parent PIDs with metadata to droplet database, one statement per batch"""
+    print(f"\n📝 Inserting parent PIDs to droplet database (batches of {batch_size})...")
     
-    for record in parent_records:
-        pid = record['pid']
-        title = record['title'].replace("'", "''")  # Escape single quotes
-        pdf_count = record['pdf_count']
-        year = record['year']
+    inserted = 0
+    batch = []
+    
+    def flush():
+        nonlocal inserted
+        values = []
+        for record in batch:
+            pid = record['pid']
+            title = record['title'].replace("'", "''")  # Escape single quotes
+            # Use double quotes in JSON, escape them for shell
+            json_str = json.dumps({"pdf_count": record['pdf_count']})
+            values.append(
+                f"('doc_pid_{pid}', '{title}', {record['year']}, '{pid}.pdf', '{pid}', "
+                f"{record['pdf_count']}, '{json_str}'::jsonb)"
+            )
         
-        # Create a document record with this PID and metadata
-        # Use double quotes in JSON, escape them for shell
-        json_str = json.dumps({"pdf_count": pdf_count})
         insert_sql = f"""
         INSERT INTO documents (document_id, title, publication_year, filename, pid, pdf_count, doc_metadata)
-        VALUES (
-            'doc_pid_{pid}',
-            '{title}',
-            {year},
-            '{pid}.pdf',
-            '{pid}',
-            {pdf_count},
-            '{json_str}'::jsonb
-        )
+        VALUES {', '.join(values)}
         ON CONFLICT (pid) DO UPDATE SET
             title = EXCLUDED.title,
             publication_year = EXCLUDED.publication_year,
@@ -190,40 +185,40 @@ def insert_pids_to_droplet(parent_records):
         """
         
         cmd = f'ssh root@104.248.170.26 "docker exec epistemic-drift-db psql -U postgres -d epistemic_drift -c \\"{insert_sql}\\""'
-        print(f"  Inserting PID: {pid} ({title})")
-        print(f"    PDF count (ML=TRUE): {pdf_count}")
-        import subprocess
+        print(f"  Inserting {len(batch)} PIDs: {batch[0]['pid']} .. {batch[-1]['pid']}")
         result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
         if result.returncode != 0:
             print(f"    ⚠️  Error: {result.stderr}")
         else:
+            inserted += len(batch)
             print(f"    ✅ Inserted")
+        batch.clear()
+    
+    for record in parent_records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush()
     
-    print("\n✅ Done!")
+    if batch:
+        flush()
+    
+    print(f"\n✅ Done! {inserted} parent PIDs synced")
+    return inserted
 
 if __name__ == "__main__":
-    # Fetch records
-    data = fetch_records()
+    # Stream records, analyze each one and insert in batches as they arrive
+    parent_records = analyze_records(fetch_records())
+    inserted = insert_pids_to_droplet(parent_records)
     
-    if data:
-        # Analyze and get parent records with metadata
-        parent_records = analyze_records(data)
-        
-        if parent_records:
-            print(f"\n🎯 Found {len(parent_records)} parent PIDs to sync")
-            
-            # Insert to droplet
-            insert_pids_to_droplet(parent_records)
-            
-            # Verify
-            print("\n🔍 Verifying database...")
-            import subprocess
-            result = subprocess.run(
-                'ssh root@104.248.170.26 "docker exec epistemic-drift-db psql -U postgres -d epistemic_drift -c \\"SELECT pid, title FROM documents WHERE pid IS NOT NULL ORDER BY pid;\\""',
-                shell=True,
-                capture_output=True,
-                text=True
-            )
-            print(result.stdout)
-        else:
-            print("❌ No parent PIDs found")
+    if inserted:
+        # Verify
+        print("\n🔍 Verifying database...")
+        result = subprocess.run(
+            'ssh root@104.248.170.26 "docker exec epistemic-drift-db psql -U postgres -d epistemic_drift -c \\"SELECT pid, title FROM documents WHERE pid IS NOT NULL ORDER BY pid;\\""',
+            shell=True,
+            capture_output=True,
+            text=True
+        )
+        print(result.stdout)
+    else:
+        print("❌ No parent PIDs found")
@@ -16,12 +16,10 @@ These policies ensure:
 import sys
 sys.path.insert(0, '/app')
 
-import requests
 import json
 from sqlalchemy import text
 from app.core.database import LocalSessionLocal
-
-GRAPHQL_ENDPOINT = "https://api.ddrarchive.org/graphql"
+from app.services.ddr_client import get_ddr_client
 
 query = """
 {
@@ -38,8 +36,7 @@ query = """
 """
 
 print("🔍 Fetching records from GraphQL...")
-response = requests.post(GRAPHQL_ENDPOINT, json={'query': query}, timeout=30)
-data = response.json()
+data = get_ddr_client().execute(query, operation='records_v1')
 
 records = data['data'].get('records_v1', [])
 print(f"📊 Found {len(records)} parent records\n")
@@ -11,13 +11,17 @@ This script:
 """
 import sys
 import os
-import requests
 import json
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import datetime
+from pathlib import Path
 import uuid
 
+# Shared paginated fetcher lives in the backend package
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+from app.services.ddr_records_fetcher import DDRRecordsFetcher, PageFetchError
+
 # Configuration
 GRAPHQL_ENDPOINT = "https://api.ddrarchive.org/graphql"
 DB_CONFIG = {
@@ -28,10 +32,8 @@ DB_CONFIG = {
     'password': 'postgres'
 }
 
-# GraphQL query for parent authority records
-PARENT_RECORDS_QUERY = """
-{
-  records_v1(status: "published") {
+# Fields requested for each parent authority record
+PARENT_RECORD_FIELDS = """
     id
     pid
     title
@@ -84,8 +86,6 @@ PARENT_RECORDS_QUERY = """
         ml_annotation
       }
     }
-  }
-}
 """
 
 
@@ -128,55 +128,42 @@ def complete_sync_log(cursor, sync_id, records_new, records_updated, records_fai
           status, error_log, sync_id))
 
 
-def fetch_graphql_records():
-    """Fetch parent records from DDR Archive GraphQL API"""
+def fetch_graphql_records(errors=None):
+    """
+    Fetch parent records from DDR Archive GraphQL API, page by page
+    
+    Pages are fetched concurrently with per-page retry and yielded record by
+    record as they arrive; each record is also appended to an audit file.
+    GraphQL errors are appended to the optional errors list.
+    """
     print("🔍 Fetching parent records from DDR Archive GraphQL...")
     print(f"📡 Endpoint: {GRAPHQL_ENDPOINT}\n")
     
-    try:
-        response = requests.post(
-            GRAPHQL_ENDPOINT,
-            json={'query': PARENT_RECORDS_QUERY},
-            headers={'Content-Type': 'application/json'},
-            timeout=30
-        )
-        response.raise_for_status()
-        data = response.json()
-        
-        # Save for audit trail
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        audit_file = f'/tmp/parent_pids_sync_{timestamp}.json'
-        with open(audit_file, 'w') as f:
-            json.dump(data, f, indent=2)
-        print(f"💾 Audit trail saved to {audit_file}\n")
-        
-        return data
-        
-    except Exception as e:
-        print(f"❌ GraphQL request failed: {e}")
-        return None
-
-
-def analyze_parent_records(data):
-    """Extract parent PIDs with metadata from GraphQL response"""
-    if not data or 'data' not in data:
-        print("❌ No data in response")
-        if data and 'errors' in data:
-            print(f"GraphQL Errors: {json.dumps(data['errors'], indent=2)}")
-        return []
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    audit_file = f'/tmp/parent_pids_sync_{timestamp}.jsonl'
+    fetcher = DDRRecordsFetcher(PARENT_RECORD_FIELDS, endpoint=GRAPHQL_ENDPOINT)
     
-    records = data['data'].get('records_v1', [])
-    print(f"📊 Found {len(records)} total parent records\n")
+    # Save for audit trail
+    with open(audit_file, 'w') as audit:
+        for record in fetcher.iter_records_blocking():
+            audit.write(json.dumps(record) + '\n')
+            yield record
     
-    parent_records = []
+    if errors is not None:
+        errors.extend(fetcher.graphql_errors)
     
+    print(f"💾 Audit trail saved to {audit_file}\n")
+
+
+def analyze_parent_records(records):
+    """Extract parent PIDs with metadata, one GraphQL record at a time"""
     for record in records:
         pid = record.get('pid')
         if not pid:
             continue
             
         title = record.get('title', 'Untitled')
-        attached_media = record.get('attached_media', [])
+        attached_media = record.get('attached_media') or []
         
         # Count PDFs with use_for_ml=TRUE
         pdf_count = 0
@@ -217,23 +204,21 @@ def analyze_parent_records(data):
             'synced_at': datetime.now().isoformat()
         }
         
-        parent_records.append({
-            'pid': pid,
-            'title': title,
-            'year': year,
-            'pdf_count': pdf_count,
-            'tiff_count': tiff_count,
-            'metadata': metadata
-        })
-        
         print(f"📄 PID: {pid}")
         print(f"   Title: {title}")
         print(f"   Year: {year}")
         print(f"   PDFs (ML=TRUE): {pdf_count}")
         print(f"   Attached Media: {len(attached_media)} items")
         print()
-    
-    return parent_records
+        
+        yield {
+            'pid': pid,
+            'title': title,
+            'year': year,
+            'pdf_count': pdf_count,
+            'tiff_count': tiff_count,
+            'metadata': metadata
+        }
 
 
 def sync_to_database(parent_records):
@@ -243,21 +228,32 @@ def sync_to_database(parent_records):
     Uses:
     - Direct database connection via SSH tunnel
     - Parameterized queries (no SQL injection)
-    - Transactions (rollback on errors)
+    - COPY into a staging table, one round trip per batch, then a single
+      INSERT ... ON CONFLICT merge that also writes the sync_log row
+    - One transaction (nothing is written if any step fails)
     - sync_log table (complete audit trail)
     """
-    print(f"\n🎯 Starting database sync for {len(parent_records)} parent PIDs...")
-    
     # Execute on server via SSH to avoid network accessibility issues
     # Transfer script data and run sync there
     import subprocess
     import tempfile
     
-    # Save parent records to temp file
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-        json.dump(parent_records, f, indent=2)
+    # Stream parent records to temp file as JSON lines (one record per line)
+    record_count = 0
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.jsonl', delete=False) as f:
+        for record in parent_records:
+            f.write(json.dumps(record) + '\n')
+            record_count += 1
         temp_file = f.name
     
+    if record_count == 0:
+        os.unlink(temp_file)
+        print("❌ No parent PIDs found. Aborting.")
+        return False
+    
+    print(f"\n🎯 Starting database sync for {record_count} parent PIDs...")
+    remote_script_file = None
+    
     try:
         # Transfer data to server
         subprocess.run([
@@ -267,15 +263,89 @@ def sync_to_database(parent_records):
         
         # Create remote execution script
         remote_script = """
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import csv
+import io
 import json
+import sys
+import time
 import uuid
-from datetime import datetime
 
-# Read data
-with open('/tmp/parent_pids_data.json', 'r') as f:
-    parent_records = json.load(f)
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+BATCH_SIZE = 1000  # Records per COPY into the staging table
+
+STAGE_COLUMNS = ('seq', 'pid', 'title', 'publication_year', 'pdf_count', 'tiff_count', 'doc_metadata')
+
+# Merge the staged batch into documents and write its sync_log row in one
+# statement; later records win if the same PID was fetched twice
+MERGE_SQL = \"\"\"
+    WITH merged AS (
+        INSERT INTO documents (
+            document_id, title, publication_year, filename, pid,
+            pdf_count, tiff_count, doc_metadata, last_synced_at, sync_version
+        )
+        SELECT DISTINCT ON (pid)
+            'doc_pid_' || pid, title, publication_year, pid || '.pdf', pid,
+            pdf_count, tiff_count, doc_metadata, NOW(), 1
+        FROM parent_pids_stage
+        ORDER BY pid, seq DESC
+        ON CONFLICT (pid) DO UPDATE SET
+            title = EXCLUDED.title,
+            publication_year = EXCLUDED.publication_year,
+            pdf_count = EXCLUDED.pdf_count,
+            tiff_count = EXCLUDED.tiff_count,
+            doc_metadata = EXCLUDED.doc_metadata,
+            last_synced_at = NOW(),
+            sync_version = documents.sync_version + 1
+        RETURNING pid, (xmax = 0) AS inserted
+    )
+    INSERT INTO sync_log (
+        sync_id, sync_type, sync_source, status, triggered_by,
+        sync_started_at, sync_completed_at, sync_duration_seconds,
+        records_fetched, records_new, records_updated, records_failed,
+        pids_processed, pids_failed, config
+    )
+    SELECT
+        %(sync_id)s, 'manual', 'ddr_graphql_parent_pids', 'completed', %(triggered_by)s,
+        NOW(), clock_timestamp(), EXTRACT(EPOCH FROM (clock_timestamp() - NOW())),
+        %(records_fetched)s,
+        COUNT(*) FILTER (WHERE inserted),
+        COUNT(*) FILTER (WHERE NOT inserted),
+        0,
+        COALESCE(jsonb_agg(pid), '[]'::jsonb), '[]'::jsonb,
+        %(config)s::jsonb
+    FROM merged
+    RETURNING records_new, records_updated
+\"\"\"
+
+def read_parent_record_batches():
+    # JSON lines: one parent record per line, read incrementally
+    batch = []
+    with open('/tmp/parent_pids_data.json', 'r') as f:
+        for line in f:
+            if line.strip():
+                batch.append(json.loads(line))
+                if len(batch) >= BATCH_SIZE:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+def copy_batch(cursor, batch, first_seq):
+    # One COPY round trip per batch into the transaction-local staging table
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for offset, record in enumerate(batch):
+        writer.writerow((
+            first_seq + offset, record['pid'], record['title'], record['year'],
+            record['pdf_count'], record['tiff_count'], json.dumps(record['metadata'])
+        ))
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY parent_pids_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
 
 # Connect to database (use 'db' hostname from docker-compose network)
 conn = psycopg2.connect(
@@ -288,83 +358,83 @@ conn = psycopg2.connect(
 )
 cursor = conn.cursor()
 
-# Start sync log
 sync_id = f"sync_{uuid.uuid4().hex[:12]}"
-cursor.execute(
-    \"\"\"INSERT INTO sync_log (sync_id, sync_type, sync_source, status, triggered_by, sync_started_at) 
-       VALUES (%s, %s, %s, %s, %s, NOW()) RETURNING sync_id\"\"\",
-    (sync_id, 'manual', 'ddr_graphql_parent_pids', 'running', 'script:sync_parent_pids.py (remote)')
-)
-conn.commit()
+triggered_by = 'script:sync_parent_pids.py (remote)'
 print(f"📝 Sync ID: {sync_id}")
 
-records_new = 0
-records_updated = 0
-records_failed = 0
-pids_processed = []
-pids_failed = []
+started = time.perf_counter()
+records_fetched = 0
+batches = 0
 
-# Process each record
-for record in parent_records:
-    pid = record['pid']
-    try:
-        cursor.execute("SELECT pid FROM documents WHERE pid = %s", (pid,))
-        existing = cursor.fetchone()
-        
-        if existing:
-            cursor.execute(
-                \"\"\"UPDATE documents SET title = %s, publication_year = %s, pdf_count = %s,
-                    tiff_count = %s, doc_metadata = %s::jsonb, last_synced_at = NOW(),
-                    sync_version = sync_version + 1 WHERE pid = %s\"\"\",
-                (record['title'], record['year'], record['pdf_count'], 
-                 record['tiff_count'], json.dumps(record['metadata']), pid)
-            )
-            records_updated += 1
-            print(f"  ✅ Updated: {pid} ({record['title']})")
-        else:
-            cursor.execute(
-                \"\"\"INSERT INTO documents (document_id, title, publication_year, filename, pid,
-                    pdf_count, tiff_count, doc_metadata, last_synced_at, sync_version)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s::jsonb, NOW(), 1)\"\"\",
-                (f"doc_pid_{pid}", record['title'], record['year'], f"{pid}.pdf",
-                 pid, record['pdf_count'], record['tiff_count'], json.dumps(record['metadata']))
-            )
-            records_new += 1
-            print(f"  ✅ Inserted: {pid} ({record['title']})")
-        
-        pids_processed.append(pid)
-    except Exception as e:
-        records_failed += 1
-        pids_failed.append(pid)
-        print(f"  ❌ Failed: {pid} - {e}")
+try:
+    # Documents, staging table and sync_log are all written in this one transaction
+    cursor.execute(\"\"\"
+        CREATE TEMP TABLE parent_pids_stage (
+            seq INTEGER,
+            pid VARCHAR(255) NOT NULL,
+            title TEXT,
+            publication_year INTEGER,
+            pdf_count INTEGER,
+            tiff_count INTEGER,
+            doc_metadata JSONB
+        ) ON COMMIT DROP
+    \"\"\")
+    
+    for batch in read_parent_record_batches():
+        batch_started = time.perf_counter()
+        copy_batch(cursor, batch, records_fetched)
+        records_fetched += len(batch)
+        batches += 1
+        elapsed = time.perf_counter() - batch_started
+        print(f"  📦 Batch {batches}: staged {len(batch)} records in {elapsed * 1000:.0f} ms "
+              f"({len(batch) / elapsed:.0f} records/s)")
+    
+    copy_seconds = time.perf_counter() - started
+    merge_started = time.perf_counter()
+    cursor.execute(MERGE_SQL, {
+        'sync_id': sync_id,
+        'triggered_by': triggered_by,
+        'records_fetched': records_fetched,
+        'config': json.dumps({'batch_size': BATCH_SIZE, 'batches': batches, 'method': 'copy_merge'})
+    })
+    counts = cursor.fetchone()
+    conn.commit()
+    merge_seconds = time.perf_counter() - merge_started
+except Exception as e:
+    conn.rollback()
+    print(f"❌ Sync failed, nothing was written: {e}")
+    cursor.execute(
+        \"\"\"INSERT INTO sync_log (sync_id, sync_type, sync_source, status, triggered_by,
+            sync_started_at, sync_completed_at, records_fetched, error_log)
+            VALUES (%s, 'manual', 'ddr_graphql_parent_pids', 'failed', %s, NOW(), NOW(), %s, %s)\"\"\",
+        (sync_id, triggered_by, records_fetched, str(e))
+    )
+    conn.commit()
+    conn.close()
+    sys.exit(1)
 
-conn.commit()
-
-# Complete sync log
-cursor.execute(
-    \"\"\"UPDATE sync_log SET sync_completed_at = NOW(),
-        sync_duration_seconds = EXTRACT(EPOCH FROM (NOW() - sync_started_at)),
-        records_new = %s, records_updated = %s, records_failed = %s,
-        pids_processed = %s::jsonb, pids_failed = %s::jsonb,
-        status = %s WHERE sync_id = %s\"\"\",
-    (records_new, records_updated, records_failed,
-     json.dumps(pids_processed), json.dumps(pids_failed),
-     'completed' if records_failed == 0 else 'partial', sync_id)
-)
-conn.commit()
+total_seconds = time.perf_counter() - started
+# CREATE TEMP + one COPY per batch + merge/sync_log + COMMIT
+round_trips = batches + 3
 
 print(f"\\n{'='*60}")
 print(f"✅ Sync completed: {sync_id}")
 print(f"{'='*60}")
-print(f"New: {records_new}, Updated: {records_updated}, Failed: {records_failed}")
+print(f"New: {counts['records_new']}, Updated: {counts['records_updated']}, Failed: 0")
+print(f"Staged {records_fetched} records in {copy_seconds:.2f}s "
+      f"({records_fetched / copy_seconds if copy_seconds else 0:.0f} records/s)")
+print(f"Merged in {merge_seconds:.2f}s; total {total_seconds:.2f}s "
+      f"({records_fetched / total_seconds if total_seconds else 0:.0f} records/s, "
+      f"{round_trips} DB round trips for {batches} batches)")
 
 # Verify
 cursor.execute(
-    \"\"\"SELECT pid, title, pdf_count, TO_CHAR(last_synced_at, 'YYYY-MM-DD HH24:MI:SS') as synced
-        FROM documents WHERE pid IS NOT NULL ORDER BY last_synced_at DESC\"\"\"
+    \"\"\"SELECT pid, title, pdf_count, TO_CHAR(last_synced_at, 'YYYY-MM-DD HH24:MI:SS') as synced,
+        COUNT(*) OVER () AS total
+        FROM documents WHERE pid IS NOT NULL ORDER BY last_synced_at DESC LIMIT 20\"\"\"
 )
 results = cursor.fetchall()
-print(f"\\n🔍 Database now has {len(results)} PIDs:")
+print(f"\\n🔍 Database now has {results[0]['total'] if results else 0} PIDs (most recent shown):")
 for row in results:
     print(f"  • {row['pid']}: {row['title']} (PDFs: {row['pdf_count']}, Synced: {row['synced']})")
 
@@ -399,10 +469,10 @@ conn.close()
         
     finally:
         # Cleanup temp files
-        import os
         try:
             os.unlink(temp_file)
-            os.unlink(remote_script_file)
+            if remote_script_file:
+                os.unlink(remote_script_file)
         except:
             pass
 
@@ -415,22 +485,19 @@ def main():
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*60 + "\n")
     
-    # Step 1: Fetch from GraphQL
-    data = fetch_graphql_records()
-    if not data:
+    # Steps 1-3: Stream records from GraphQL, extract parent PIDs one at a
+    # time and spool them for the database sync with provenance
+    graphql_errors = []
+    try:
+        parent_records = analyze_parent_records(fetch_graphql_records(errors=graphql_errors))
+        success = sync_to_database(parent_records)
+    except PageFetchError as e:
+        print(f"❌ GraphQL request failed: {e}")
         print("❌ Failed to fetch GraphQL data. Aborting.")
         sys.exit(1)
     
-    # Step 2: Analyze and extract parent PIDs
-    parent_records = analyze_parent_records(data)
-    if not parent_records:
-        print("❌ No parent PIDs found. Aborting.")
-        sys.exit(1)
-    
-    print(f"🎯 Found {len(parent_records)} parent PIDs to sync\n")
-    
-    # Step 3: Sync to database with provenance
-    success = sync_to_database(parent_records)
+    if graphql_errors:
+        print(f"GraphQL Errors: {json.dumps(graphql_errors, indent=2)}")
     
     if success:
         print("\n✅ All done! PIDs synced with full provenance tracking.")
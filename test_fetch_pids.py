@@ -2,8 +2,13 @@
 """
 Quick test to fetch PIDs from DDR Archive GraphQL
 """
-import requests
 import json
+import sys
+from pathlib import Path
+
+# Shared DDR client lives in the backend package
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+from app.services.ddr_client import DDRClient, DDRClientError
 
 # Your 4 PIDs to test
 TEST_PIDS = [
@@ -42,15 +47,8 @@ query GetAllMediaItems {
 def fetch_graphql():
     """Fetch from DDR Archive GraphQL"""
     try:
-        response = requests.post(
-            GRAPHQL_ENDPOINT,
-            json={'query': query},
-            headers={'Content-Type': 'application/json'},
-            timeout=30
-        )
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
+        return DDRClient(endpoint=GRAPHQL_ENDPOINT, timeout=30).execute(query)
+    except DDRClientError as e:
         print(f"❌ GraphQL request failed: {e}")
         return None
 